@@ -0,0 +1,14 @@
+"""
+Benchmarks y herramientas de carga del servidor.
+
+Se ejecutan desde la raíz del proyecto, por ejemplo:
+
+    python -m benchmarks.bench_pipeline
+"""
+import os
+from dotenv import load_dotenv
+
+# Los benchmarks corren sin .env: usamos una clave de prueba si no hay otra.
+# Los .enc de los fixtures se generan con la misma Config.ENCRYPTION_KEY.
+load_dotenv()
+os.environ.setdefault("ENCRYPTION_KEY", "42" * 32)
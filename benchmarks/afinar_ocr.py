@@ -0,0 +1,228 @@
+"""
+Afinación offline de los parámetros de `preprocess_for_ocr` para el MRZ.
+
+Evalúa una grilla de parámetros sobre un corpus etiquetado y escribe un
+perfil que el servicio carga con `OCR_PERFIL_PATH`. Cada combinación se
+evalúa en un proceso worker (que rasteriza el corpus una sola vez) con el
+mismo `_leer_mrz` del servicio pero sin reintentos, y se mide:
+
+- exactitud de campos: fracción de campos esperados que se extrajeron bien
+  (un documento rechazado por dígitos de control no acierta ninguno);
+- tiempo por documento (banda MRZ + preprocesamiento + OCR), media y p90.
+
+El ranking pone primero las combinaciones que alcanzan `--objetivo`, de la
+más rápida a la más lenta, y después el resto por exactitud. La recomendada
+es la primera.
+
+El corpus es una carpeta con un `fixtures.json` como el que genera
+`benchmarks.fixtures`: una lista de {"ruta" (o "nombre", relativo a la
+carpeta), "esperado": {"metodo", campo: valor, ...}}. Solo se usan los
+documentos cuyo método esperado es MRZ-OCR.
+
+Uso:
+    python -m benchmarks.afinar_ocr --corpus benchmarks/fixtures --salida perfil_ocr.json
+    python -m benchmarks.afinar_ocr --corpus etiquetadas/ --objetivo 0.98 --muestras 40 -p 4
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+import benchmarks  # noqa: F401  (clave de prueba si no hay .env)
+
+# Se mide el OCR, no el cache de resultados
+os.environ["CACHE_ENABLED"] = "False"
+
+from src.config import Config
+from src.utils.perfil_ocr import guardar_perfil_ocr
+
+_corpus = None
+_servicio = None
+_limite_ms = None
+
+
+def espacio_parametros():
+    """Combinaciones de la grilla (los bloques adaptativos son impares: OpenCV no acepta pares)."""
+    filtros = [
+        {"blur_kind": "none"},
+        {"blur_kind": "gaussian", "blur_ksize": 3},
+        {"blur_kind": "gaussian", "blur_ksize": 5},
+        {"blur_kind": "median", "blur_ksize": 3},
+    ]
+    umbrales = [{"threshold_kind": "otsu"}, {"threshold_kind": "none"}] + [
+        {"threshold_kind": "adaptive", "adaptive_block": bloque, "adaptive_C": c}
+        for bloque in (17, 31) for c in (3, 10)
+    ]
+    return [
+        {"clahe_clip": clip, "clahe_tile": tile, **filtro, **umbral}
+        for clip in (0.6, 1.2, 2.0)
+        for tile in (8, 16)
+        for filtro in filtros
+        for umbral in umbrales
+    ]
+
+
+def cargar_corpus(directorio):
+    """Documentos MRZ etiquetados del índice fixtures.json de `directorio`."""
+    directorio = Path(directorio)
+    indice = directorio / "fixtures.json"
+    if not indice.exists():
+        raise FileNotFoundError(f"No hay {indice}: genera uno con `python -m benchmarks.fixtures --dir {directorio}`")
+
+    documentos = []
+    for doc in json.loads(indice.read_text()):
+        esperado = doc.get("esperado", {})
+        if esperado.get("metodo", "MRZ-OCR") != "MRZ-OCR":
+            continue
+        documentos.append({
+            "nombre": doc.get("nombre") or Path(doc["ruta"]).name,
+            "ruta": doc.get("ruta") or str(directorio / doc["nombre"]),
+            "esperado": {k: v for k, v in esperado.items() if k != "metodo"},
+        })
+    return documentos
+
+
+def _iniciar_worker(documentos, dpi, limite_ms):
+    global _corpus, _servicio, _limite_ms
+    from src.services.validar_cedula_service import ValidacionCedulaService
+    from src.utils.document_processing import obtener_imagen_para_barcode
+
+    # Cada combinación se evalúa sola: sin las variantes de reintento
+    Config.MRZ_REINTENTOS_MS = 0
+    _servicio = ValidacionCedulaService()
+    _limite_ms = limite_ms
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        # La misma imagen que usa el OCR del MRZ en el servicio
+        _corpus = [
+            (doc["nombre"], obtener_imagen_para_barcode(doc["ruta"], dpi=dpi, color="gris"), doc["esperado"])
+            for doc in documentos
+        ]
+
+
+def evaluar(parametros):
+    """Exactitud y tiempos de una combinación sobre el corpus del worker."""
+    from src.utils.plazos import PlazoAgotado, aplicar_plazo
+
+    _servicio.parametros_ocr = parametros
+    tiempos = []
+    aciertos = total = correctos = erroneos = 0
+
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        for _nombre, imagen, esperado in _corpus:
+            inicio = time.perf_counter()
+            try:
+                # Un OCR que no termina en el límite cuenta como fallo
+                with aplicar_plazo(inicio + _limite_ms / 1000):
+                    datos = _servicio._leer_mrz(imagen, {"etapas": [], "parcial": {}})
+            except (ValueError, PlazoAgotado):
+                datos = {}
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+            bien = sum(datos.get(campo) == valor for campo, valor in esperado.items())
+            aciertos += bien
+            total += len(esperado)
+            if datos:
+                correctos += bien == len(esperado)
+                erroneos += bien < len(esperado)
+
+    ordenados = sorted(tiempos)
+    return {
+        "parametros": parametros,
+        "exactitud_campos": round(aciertos / total, 4) if total else 0.0,
+        "documentos_correctos": correctos,
+        "aceptados_erroneos": erroneos,
+        "ms_medio": round(sum(tiempos) / len(tiempos), 1),
+        "ms_p90": round(ordenados[min(len(ordenados) - 1, int(0.9 * len(ordenados)))], 1),
+    }
+
+
+def ordenar(resultados, objetivo):
+    """Primero las que cumplen el objetivo (más rápidas primero), luego por exactitud."""
+    for r in resultados:
+        r["cumple_objetivo"] = r["exactitud_campos"] >= objetivo and r["aceptados_erroneos"] == 0
+    return sorted(resultados, key=lambda r: (
+        not r["cumple_objetivo"],
+        r["ms_medio"] if r["cumple_objetivo"] else -r["exactitud_campos"],
+        r["ms_medio"],
+    ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Afina los parámetros de preprocesamiento del OCR del MRZ")
+    parser.add_argument("--corpus", required=True, help="Carpeta con fixtures.json y los documentos")
+    parser.add_argument("--salida", default="perfil_ocr.json")
+    parser.add_argument("--objetivo", type=float, default=0.95, help="Exactitud de campos mínima")
+    parser.add_argument("-p", "--procesos", type=int, default=os.cpu_count())
+    parser.add_argument("--muestras", type=int, default=None,
+                        help="Evaluar solo N combinaciones al azar de la grilla")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--limite-ms", type=float, default=3000, help="Tiempo máximo de OCR por documento")
+    args = parser.parse_args(argv)
+
+    documentos = cargar_corpus(args.corpus)
+    if not documentos:
+        print("⚠ El corpus no tiene documentos MRZ etiquetados")
+        return 1
+
+    from src.services.validar_cedula_service import ValidacionCedulaService
+    actuales = ValidacionCedulaService().parametros_ocr
+
+    candidatos = espacio_parametros()
+    if args.muestras and args.muestras < len(candidatos):
+        candidatos = random.Random(args.semilla).sample(candidatos, args.muestras)
+    # Las demás claves (p. ej. blur_sigma) se heredan de los parámetros actuales
+    candidatos = [actuales] + [{**actuales, **c} for c in candidatos]
+
+    dpi = max(Config.DPI_CASCADA)
+    print(f"🔎 {len(candidatos)} combinaciones x {len(documentos)} documentos "
+          f"en {args.procesos} procesos ({dpi} DPI)")
+
+    inicio = time.perf_counter()
+    resultados = []
+    # spawn: cada worker crea su propio motor OCR, igual que los del servidor
+    with ProcessPoolExecutor(
+        max_workers=args.procesos,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_iniciar_worker,
+        initargs=(documentos, dpi, args.limite_ms),
+    ) as pool:
+        futuros = [pool.submit(evaluar, c) for c in candidatos]
+        for n, futuro in enumerate(as_completed(futuros), 1):
+            resultados.append(futuro.result())
+            print(f"  {n}/{len(candidatos)}", end="\r", flush=True)
+
+    referencia = resultados[[r["parametros"] for r in resultados].index(actuales)]
+    ranking = ordenar(resultados, args.objetivo)
+    mejor = ranking[0]
+    if not mejor["cumple_objetivo"]:
+        print(f"\n⚠ Ninguna combinación alcanza el objetivo {args.objetivo}: se recomienda la más exacta")
+
+    guardar_perfil_ocr(
+        args.salida,
+        recomendado=mejor["parametros"],
+        ranking=ranking,
+        fecha=time.strftime("%Y-%m-%dT%H:%M:%S"),
+        corpus=str(args.corpus),
+        documentos=len(documentos),
+        dpi=dpi,
+        objetivo=args.objetivo,
+        referencia=referencia,
+    )
+
+    print(f"\n{'exactitud':>10}{'correctos':>11}{'erróneos':>10}{'ms medio':>10}{'ms p90':>9}  parámetros")
+    for r, marca in [(r, "") for r in ranking[:10]] + [(referencia, "  (actuales)")]:
+        print(f"{r['exactitud_campos']:>10}{r['documentos_correctos']:>11}{r['aceptados_erroneos']:>10}"
+              f"{r['ms_medio']:>10}{r['ms_p90']:>9}  {json.dumps(r['parametros'])}{marca}")
+    print(f"\n💾 Perfil en {args.salida} ({time.perf_counter() - inicio:.0f} s). "
+          f"Cárgalo con OCR_PERFIL_PATH={args.salida}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
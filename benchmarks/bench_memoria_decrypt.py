@@ -0,0 +1,120 @@
+"""
+Pico de memoria (RSS) al desencriptar un .enc grande.
+
+Cada modo corre en un subproceso limpio y reporta cuánto creció su pico de
+RSS (VmHWM) respecto al RSS que tenía antes de desencriptar:
+
+- leer_completo: el algoritmo anterior (f.read(), decrypt de todo y slice
+  para quitar el padding), como referencia.
+- decrypt_file: mmap + bloques sobre un buffer preasignado.
+- decrypt_file_sha: mmap + bloques hacia un destino (sha256), sin armar el
+  texto plano.
+
+Uso:
+    python -m benchmarks.bench_memoria_decrypt --mb 64
+"""
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import benchmarks  # noqa: F401  (clave de prueba si no hay .env)
+
+MODOS = ["leer_completo", "decrypt_file", "decrypt_file_sha"]
+
+
+def _memoria_kb(campo):
+    with open("/proc/self/status") as f:
+        for linea in f:
+            if linea.startswith(campo + ":"):
+                return int(linea.split()[1])
+    return 0
+
+
+def _leer_completo(ruta):
+    from Crypto.Cipher import AES
+    from src.config import Config
+    from src.utils.document_processing import IV_LENGTH
+
+    with open(ruta, 'rb') as f:
+        encrypted_data = f.read()
+    cipher = AES.new(Config.ENCRYPTION_KEY, AES.MODE_CBC, encrypted_data[:IV_LENGTH])
+    decrypted = cipher.decrypt(encrypted_data[IV_LENGTH:])
+    return decrypted[:-decrypted[-1]]
+
+
+def medir_modo(modo, ruta):
+    """Corre un modo en este proceso y retorna su resultado (usar en un subproceso)."""
+    from src.utils.document_processing import decrypt_file
+
+    rss_inicial = _memoria_kb("VmRSS")
+    inicio = time.perf_counter()
+
+    if modo == "leer_completo":
+        texto = _leer_completo(ruta)
+        digest = hashlib.sha256(texto).hexdigest()
+    elif modo == "decrypt_file":
+        texto = decrypt_file(ruta)
+        digest = hashlib.sha256(texto).hexdigest()
+    elif modo == "decrypt_file_sha":
+        sha = hashlib.sha256()
+        decrypt_file(ruta, destino=sha.update)
+        digest = sha.hexdigest()
+    else:
+        raise ValueError(f"Modo desconocido: {modo}")
+
+    return {
+        "modo": modo,
+        "tiempo_ms": round((time.perf_counter() - inicio) * 1000, 1),
+        "pico_extra_mb": round((_memoria_kb("VmHWM") - rss_inicial) / 1024, 1),
+        "sha256": digest,
+    }
+
+
+def generar_archivo(directorio, mb):
+    from benchmarks.fixtures import encriptar
+
+    ruta = os.path.join(directorio, f"documento_{mb}mb.pdf.enc")
+    with open(ruta, "wb") as f:
+        f.write(encriptar(os.urandom(mb * 1024 * 1024)))
+    return ruta
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pico de RSS al desencriptar archivos grandes")
+    parser.add_argument("--mb", type=int, default=64, help="Tamaño del documento de prueba")
+    parser.add_argument("--modo", choices=MODOS, help=argparse.SUPPRESS)
+    parser.add_argument("--archivo", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.modo:
+        print(json.dumps(medir_modo(args.modo, args.archivo)))
+        return 0
+
+    with tempfile.TemporaryDirectory() as directorio:
+        ruta = generar_archivo(directorio, args.mb)
+        print(f"Documento de prueba: {os.path.getsize(ruta) / (1024 * 1024):.1f} MB\n")
+        print(f"{'modo':<20}{'tiempo ms':>12}{'pico extra MB':>16}")
+
+        digests = set()
+        for modo in MODOS:
+            salida = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_memoria_decrypt", "--modo", modo, "--archivo", ruta],
+                capture_output=True, text=True, check=True
+            ).stdout
+            r = json.loads(salida.strip().splitlines()[-1])
+            digests.add(r["sha256"])
+            print(f"{modo:<20}{r['tiempo_ms']:>12}{r['pico_extra_mb']:>16}")
+
+    if len(digests) != 1:
+        print("\n⚠ Los modos no produjeron el mismo texto plano")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Benchmark de las funciones de src/utils/document_processing.py y del
+`validar_cedula` de punta a punta sobre cédulas sintéticas.
+
+Uso:
+    python -m benchmarks.bench_pipeline                      # compara contra el baseline
+    python -m benchmarks.bench_pipeline --guardar-baseline   # guarda un baseline nuevo
+    python -m benchmarks.bench_pipeline --filtro pdf_to_images -n 20
+
+Reporta throughput, p50/p99 y pico de memoria (tracemalloc) por caso.
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+import benchmarks  # noqa: F401  (clave de prueba si no hay .env)
+
+# Medimos el pipeline, no el cache de resultados
+os.environ["CACHE_ENABLED"] = "False"
+
+from benchmarks.fixtures import generar_fixtures, payload_pdf417, lineas_mrz_td1, PERSONAS
+from src.utils import document_processing as dp
+from src.utils.procesar_qr import leer_qr_code
+from src.utils.codigos_barras import leer_codigos_barras
+from src.utils.mrz import localizar_banda_mrz, leer_mrz
+from src.utils.preprocesamiento_ocr import PreprocesadorOCR
+from src.utils.motor_ocr import obtener_motor_ocr, MotorOCRNoDisponible
+
+DIR_BENCH = Path(__file__).resolve().parent
+BASELINE_DEFAULT = DIR_BENCH / "baseline.json"
+FIXTURES_DEFAULT = DIR_BENCH / "fixtures"
+
+
+def _percentil(ordenados, p):
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, max(0, int(round(p * len(ordenados))) - 1))
+    return ordenados[indice]
+
+
+def medir(func, repeticiones, calentamiento=1):
+    """
+    Ejecuta `func` varias veces y resume sus tiempos.
+    El pico de memoria se mide en una corrida aparte porque tracemalloc
+    agrega overhead a los tiempos.
+    """
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        for _ in range(calentamiento):
+            func()
+
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            func()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+
+        tracemalloc.start()
+        try:
+            func()
+            _, pico = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    ordenados = sorted(tiempos)
+    total_s = sum(tiempos) / 1000
+    return {
+        "n": repeticiones,
+        "throughput_ops_s": round(repeticiones / total_s, 2) if total_s else 0.0,
+        "media_ms": round(sum(tiempos) / len(tiempos), 3),
+        "p50_ms": round(_percentil(ordenados, 0.50), 3),
+        "p99_ms": round(_percentil(ordenados, 0.99), 3),
+        "pico_memoria_mb": round(pico / (1024 * 1024), 3),
+    }
+
+
+def _cargar_fixtures(directorio):
+    indice = Path(directorio) / "fixtures.json"
+    if not indice.exists():
+        print(f"Generando fixtures en {directorio}...")
+        return generar_fixtures(directorio)
+    return json.loads(indice.read_text())
+
+
+def _buscar(fixtures, **filtros):
+    for f in fixtures:
+        if all(f[k] == v for k, v in filtros.items()):
+            return f
+    raise LookupError(f"No hay fixture con {filtros}")
+
+
+def construir_casos(fixtures):
+    """
+    Arma la lista de casos (nombre, función sin argumentos).
+    Las imágenes de entrada de los decodificadores se preparan una sola vez.
+    """
+    casos = []
+
+    def agregar(nombre, func):
+        casos.append((nombre, func))
+
+    pdf417_1 = _buscar(fixtures, tipo="pdf417", paginas=1, degradacion="limpio", encriptado=False)
+    pdf417_2 = _buscar(fixtures, tipo="pdf417", paginas=2, degradacion="limpio", encriptado=False)
+    pdf417_enc = _buscar(fixtures, tipo="pdf417", paginas=1, degradacion="limpio", encriptado=True)
+    qr_1 = _buscar(fixtures, tipo="qr", paginas=1, degradacion="limpio", encriptado=False)
+    mrz_1 = _buscar(fixtures, tipo="mrz", paginas=1, degradacion="limpio", encriptado=False)
+
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        img_pdf417 = dp.obtener_imagen_para_barcode(pdf417_1["ruta"])
+        img_pdf417_gris = dp.obtener_imagen_para_barcode(pdf417_1["ruta"], color="gris")
+        img_qr = dp.obtener_imagen_para_barcode(qr_1["ruta"])
+        img_mrz = dp.obtener_imagen_para_barcode(mrz_1["ruta"])
+        img_mrz_proc = dp.preprocess_for_ocr(img_mrz, adaptive_block=16, threshold_kind="adaptive")
+
+    # Etapas de document_processing
+    agregar("decrypt_file[enc]", lambda: dp.decrypt_file(pdf417_enc["ruta"]))
+    agregar("pdf_to_images[1pag]", lambda: dp.pdf_to_images(pdf417_1["ruta"], dpi=300))
+    agregar("pdf_to_images[2pag]", lambda: dp.pdf_to_images(pdf417_2["ruta"], dpi=300))
+    agregar("obtener_imagen_para_barcode[1pag]", lambda: dp.obtener_imagen_para_barcode(pdf417_1["ruta"]))
+    agregar("obtener_imagen_para_barcode[2pag]", lambda: dp.obtener_imagen_para_barcode(pdf417_2["ruta"]))
+    agregar("obtener_imagen_para_barcode[enc]", lambda: dp.obtener_imagen_para_barcode(pdf417_enc["ruta"]))
+    agregar("obtener_imagen_para_barcode[1pag,gris]",
+            lambda: dp.obtener_imagen_para_barcode(pdf417_1["ruta"], color="gris"))
+    agregar("obtener_imagen_para_barcode[2pag,gris]",
+            lambda: dp.obtener_imagen_para_barcode(pdf417_2["ruta"], color="gris"))
+    agregar("obtener_imagen_para_barcode[1pag,gris,150dpi]",
+            lambda: dp.obtener_imagen_para_barcode(pdf417_1["ruta"], dpi=150, color="gris"))
+    agregar("crop_mrz_last_quarter", lambda: dp.crop_mrz_last_quarter(img_mrz))
+    agregar("leer_pdf417_zxing[pdf417]", lambda: dp.leer_pdf417_zxing(img_pdf417))
+    agregar("leer_pdf417_zxing[sin_codigo]", lambda: dp.leer_pdf417_zxing(img_mrz))
+    agregar("leer_pdf417_zxing[pdf417,gris]", lambda: dp.leer_pdf417_zxing(img_pdf417_gris))
+    agregar("leer_qr_code[qr]", lambda: leer_qr_code(img_qr))
+    agregar("leer_codigos_barras[pdf417]", lambda: leer_codigos_barras(img_pdf417_gris))
+    agregar("leer_codigos_barras[pdf417,roi]", lambda: leer_codigos_barras(img_pdf417_gris, localizar=True))
+    agregar("leer_codigos_barras[qr,roi]", lambda: leer_codigos_barras(img_qr, localizar=True))
+    agregar("leer_codigos_barras[sin_codigo,roi]", lambda: leer_codigos_barras(img_mrz, localizar=True))
+    agregar("hash_documento[enc]", lambda: dp.hash_documento(pdf417_enc["ruta"]))
+
+    payload = payload_pdf417(PERSONAS[0])
+    agregar("extraer_datos_cedula_pdf417", lambda: dp.extraer_datos_cedula_pdf417(payload))
+
+    parametros_adaptive = dict(clahe_clip=1.2, clahe_tile=8, blur_ksize=5,
+                               threshold_kind="adaptive", adaptive_block=16, adaptive_C=3)
+    agregar("preprocess_for_ocr[adaptive]", lambda: dp.preprocess_for_ocr(img_mrz, **parametros_adaptive))
+    agregar("preprocess_for_ocr[otsu]", lambda: dp.preprocess_for_ocr(img_mrz))
+
+    # El camino compilado sin la copia del wrapper: en régimen no asigna memoria
+    preprocesador_adaptive = PreprocesadorOCR(**parametros_adaptive)
+    preprocesador_otsu = PreprocesadorOCR()
+    agregar("PreprocesadorOCR[adaptive]", lambda: preprocesador_adaptive(img_mrz))
+    agregar("PreprocesadorOCR[otsu]", lambda: preprocesador_otsu(img_mrz))
+
+    texto_mrz = "\n".join(lineas_mrz_td1(PERSONAS[0]))
+
+    def parse_mrz():
+        lineas = [dp.fix_common_mrz_errors(ln) for ln in dp.get_mrz_candidate_lines(texto_mrz)]
+        dp.obtener_nombre_apellido(lineas[2])
+        dp.obtener_numero_identidad(lineas[0])
+        dp.obtener_fecha_nacimiento(lineas[1])
+        dp.obtener_fecha_expiracion(lineas[1])
+        dp.obtener_nacionalidad(lineas[1])
+
+    agregar("parse_mrz", parse_mrz)
+    agregar("leer_mrz[td1]", lambda: leer_mrz(texto_mrz))
+    agregar("localizar_banda_mrz", lambda: localizar_banda_mrz(img_mrz))
+
+    try:
+        motor = obtener_motor_ocr()
+        tesseract = True
+        print(f"Motor OCR: {motor.nombre}")
+    except MotorOCRNoDisponible:
+        tesseract = False
+
+    if tesseract:
+        agregar("ocr_mrz", lambda: dp.ocr_mrz(img_mrz_proc))
+
+    # Punta a punta: un caso por tipo de código y degradación
+    if tesseract:
+        from src.services.validar_cedula_service import ValidacionCedulaService
+        servicio = ValidacionCedulaService()
+        for f in fixtures:
+            if f["nombre"].endswith("_0.pdf") or f["nombre"] == pdf417_enc["nombre"]:
+                agregar(f"validar_cedula[{f['nombre']}]", lambda ruta=f["ruta"]: servicio.validar_cedula(ruta))
+    else:
+        print("⚠ No hay Tesseract (libtesseract ni ejecutable): se omiten ocr_mrz y validar_cedula")
+
+    return casos
+
+
+def comparar(resultados, baseline, tolerancia):
+    """Imprime la tabla y retorna los casos cuyo p50 empeoró más que `tolerancia`."""
+    regresiones = []
+    print(f"\n{'caso':<58}{'p50 ms':>10}{'p99 ms':>10}{'ops/s':>10}{'MB':>9}{'vs base':>10}")
+    for nombre, r in resultados.items():
+        base = baseline.get("casos", {}).get(nombre)
+        comparacion = ""
+        if base and base["p50_ms"] > 0:
+            ratio = r["p50_ms"] / base["p50_ms"]
+            comparacion = f"{ratio:.2f}x"
+            if ratio > 1 + tolerancia:
+                comparacion += " ⚠"
+                regresiones.append(nombre)
+        print(f"{nombre:<58}{r['p50_ms']:>10}{r['p99_ms']:>10}{r['throughput_ops_s']:>10}"
+              f"{r['pico_memoria_mb']:>9}{comparacion:>10}")
+    return regresiones
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del pipeline de validación de cédulas")
+    parser.add_argument("--fixtures", default=str(FIXTURES_DEFAULT))
+    parser.add_argument("-n", "--repeticiones", type=int, default=10)
+    parser.add_argument("--filtro", default=None, help="Solo casos cuyo nombre contenga este texto")
+    parser.add_argument("--baseline", default=str(BASELINE_DEFAULT))
+    parser.add_argument("--guardar-baseline", action="store_true")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="Regresión si p50 > baseline * (1 + tolerancia)")
+    args = parser.parse_args(argv)
+
+    fixtures = _cargar_fixtures(args.fixtures)
+    casos = construir_casos(fixtures)
+
+    resultados = {}
+    for nombre, func in casos:
+        if args.filtro and args.filtro not in nombre:
+            continue
+        print(f"⏱ {nombre}...", flush=True)
+        resultados[nombre] = medir(func, args.repeticiones)
+
+    ruta_baseline = Path(args.baseline)
+    baseline = json.loads(ruta_baseline.read_text()) if ruta_baseline.exists() else {}
+    regresiones = comparar(resultados, baseline, args.tolerancia)
+
+    if args.guardar_baseline:
+        baseline_nuevo = {
+            "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "maquina": platform.machine(),
+            "cpus": os.cpu_count(),
+            # Al filtrar solo se actualizan los casos medidos
+            "casos": {**baseline.get("casos", {}), **resultados},
+        }
+        ruta_baseline.write_text(json.dumps(baseline_nuevo, indent=2))
+        print(f"\n💾 Baseline guardado en {ruta_baseline}")
+    elif regresiones:
+        print(f"\n⚠ {len(regresiones)} regresiones respecto al baseline")
+        return 1
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
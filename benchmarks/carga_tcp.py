@@ -0,0 +1,356 @@
+"""
+Generador de carga y medición de latencia para el servidor TCP.
+
+Abre N conexiones y reproduce una mezcla de PING, validar_cedula y
+talentoHumano_procesamiento_imagen sobre archivos de fixtures.
+
+Modos:
+- Lazo cerrado (por defecto): cada conexión envía una petición y espera su
+  respuesta antes de enviar la siguiente.
+- Tasa constante (--tasa R): se programan R peticiones por segundo sin
+  importar cuánto tarde el servidor; la latencia se mide desde el instante
+  programado para no esconder la espera (coordinated omission).
+
+Uso:
+    python -m benchmarks.carga_tcp -c 8 -d 30
+    python -m benchmarks.carga_tcp -c 4 --tasa 10 --mezcla PING=1,validar_cedula=4 \\
+        --imagenes /ruta/fotos --json resultado.json
+
+Requiere el servidor en modo async (framing por líneas con 'id').
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+DIR_BENCH = Path(__file__).resolve().parent
+EXTENSIONES_IMAGEN = {".jpg", ".jpeg", ".png", ".bmp", ".webp"}
+
+
+class ConexionCarga:
+    """Conexión persistente que permite varias peticiones en vuelo (por 'id')."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, host, port):
+        self.host = host
+        self.port = port
+        self._pendientes = {}
+        # PING no lleva id: el servidor responde los PONG en orden, así que el
+        # n-ésimo PONG es del n-ésimo PING de la conexión
+        self._pings = {}
+        self._pings_enviados = itertools.count()
+        self._pongs_recibidos = itertools.count()
+
+    async def abrir(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port, limit=2 ** 24)
+        self._lector = asyncio.create_task(self._leer())
+
+    async def _leer(self):
+        try:
+            while True:
+                linea = await self.reader.readline()
+                if not linea:
+                    break
+                linea = linea.strip()
+                if linea == b"PONG":
+                    # Si ese PING ya expiró no hay futuro: el PONG se descarta
+                    futuro = self._pings.pop(next(self._pongs_recibidos), None)
+                    if futuro is not None and not futuro.done():
+                        futuro.set_result({"success": True})
+                    continue
+
+                respuesta = json.loads(linea)
+                futuro = self._pendientes.pop(respuesta.get("id"), None)
+                if futuro is not None and not futuro.done():
+                    futuro.set_result(respuesta)
+        finally:
+            error = ConnectionError("Conexión cerrada por el servidor")
+            for futuro in itertools.chain(self._pendientes.values(), self._pings.values()):
+                if not futuro.done():
+                    futuro.set_exception(error)
+
+    async def enviar(self, action, data, timeout):
+        futuro = asyncio.get_running_loop().create_future()
+
+        if action == "PING":
+            pendientes, id_mensaje = self._pings, next(self._pings_enviados)
+            self.writer.write(b"PING\n")
+        else:
+            pendientes, id_mensaje = self._pendientes, next(self._ids)
+            mensaje = {"id": id_mensaje, "action": action, "data": data, "timing": True}
+            self.writer.write(json.dumps(mensaje).encode() + b"\n")
+
+        pendientes[id_mensaje] = futuro
+        await self.writer.drain()
+        try:
+            return await asyncio.wait_for(futuro, timeout)
+        finally:
+            pendientes.pop(id_mensaje, None)
+
+    async def cerrar(self):
+        self._lector.cancel()
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except Exception:
+            pass
+
+
+class Estadisticas:
+    """Acumula latencias, errores, timeouts y espera en cola por acción."""
+
+    def __init__(self):
+        self.latencias = {}
+        self.cola = {}
+        self.errores = {}
+        self.ocupado = {}
+        self.timeouts = {}
+        self.inicio = None
+        self.fin = None
+
+    def registrar(self, action, ms, respuesta):
+        # Los rechazos por cola llena no cuentan como completadas
+        if isinstance(respuesta, dict) and respuesta.get("status") == 503:
+            self.ocupado[action] = self.ocupado.get(action, 0) + 1
+            return
+
+        self.latencias.setdefault(action, []).append(ms)
+
+        timing = respuesta.get("server_timing") if isinstance(respuesta, dict) else None
+        if timing and "cola_ms" in timing:
+            self.cola.setdefault(action, []).append(timing["cola_ms"])
+
+        if not isinstance(respuesta, dict) or respuesta.get("success") is False or respuesta.get("status", 200) >= 400:
+            self.errores[action] = self.errores.get(action, 0) + 1
+
+    def registrar_timeout(self, action):
+        self.timeouts[action] = self.timeouts.get(action, 0) + 1
+
+    def registrar_error(self, action):
+        self.errores[action] = self.errores.get(action, 0) + 1
+
+    @staticmethod
+    def _percentiles(valores):
+        if not valores:
+            return {}
+        ordenados = sorted(valores)
+
+        def p(q):
+            return round(ordenados[min(len(ordenados) - 1, int(q * len(ordenados)))], 3)
+
+        return {"p50_ms": p(0.50), "p90_ms": p(0.90), "p99_ms": p(0.99), "max_ms": round(ordenados[-1], 3)}
+
+    def reporte(self):
+        duracion = (self.fin - self.inicio) if self.inicio and self.fin else 0
+        acciones = sorted(set(self.latencias) | set(self.timeouts) | set(self.errores) | set(self.ocupado))
+        por_accion = {}
+        for action in acciones:
+            completadas = len(self.latencias.get(action, []))
+            intentos = completadas + self.timeouts.get(action, 0) + self.ocupado.get(action, 0)
+            por_accion[action] = {
+                "completadas": completadas,
+                "throughput_rps": round(completadas / duracion, 2) if duracion else 0.0,
+                "latencia": self._percentiles(self.latencias.get(action, [])),
+                "cola_servidor": self._percentiles(self.cola.get(action, [])),
+                "tasa_error": round(self.errores.get(action, 0) / intentos, 4) if intentos else 0.0,
+                "tasa_timeout": round(self.timeouts.get(action, 0) / intentos, 4) if intentos else 0.0,
+                "ocupado_503": self.ocupado.get(action, 0),
+            }
+
+        total = sum(len(v) for v in self.latencias.values())
+        return {
+            "duracion_s": round(duracion, 2),
+            "completadas": total,
+            "throughput_rps": round(total / duracion, 2) if duracion else 0.0,
+            "acciones": por_accion,
+        }
+
+
+def _parsear_mezcla(texto):
+    mezcla = {}
+    for parte in texto.split(","):
+        nombre, _, peso = parte.partition("=")
+        mezcla[nombre.strip()] = float(peso or 1)
+    return mezcla
+
+
+def _cargar_documentos(directorio):
+    indice = Path(directorio) / "fixtures.json"
+    if indice.exists():
+        return [f["ruta"] for f in json.loads(indice.read_text())]
+    return [str(p.resolve()) for p in Path(directorio).glob("*.pdf*")]
+
+
+def _cargar_imagenes(directorio):
+    if not directorio:
+        return []
+    return [str(p.resolve()) for p in sorted(Path(directorio).iterdir())
+            if p.suffix.lower() in EXTENSIONES_IMAGEN]
+
+
+def construir_generador(mezcla, documentos, imagenes):
+    """Devuelve una función que elige la próxima (acción, data) según la mezcla."""
+    archivos = {
+        "validar_cedula": ("urlIdentificacion", documentos),
+        "talentoHumano_procesamiento_imagen": ("urlImagen", imagenes),
+    }
+
+    for action in list(mezcla):
+        if action in archivos and not archivos[action][1]:
+            print(f"⚠ Sin archivos para {action}, se quita de la mezcla")
+            del mezcla[action]
+    if not mezcla:
+        raise ValueError("La mezcla quedó vacía")
+
+    acciones = list(mezcla)
+    pesos = [mezcla[a] for a in acciones]
+
+    def siguiente():
+        action = random.choices(acciones, pesos)[0]
+        if action in archivos:
+            campo, rutas = archivos[action]
+            return action, {campo: random.choice(rutas)}
+        return action, {}
+
+    return siguiente
+
+
+async def _una_peticion(conexion, action, data, timeout, stats, t0=None):
+    t0 = t0 if t0 is not None else time.perf_counter()
+    try:
+        respuesta = await conexion.enviar(action, data, timeout)
+    except asyncio.TimeoutError:
+        stats.registrar_timeout(action)
+        return None
+    except ConnectionError:
+        stats.registrar_error(action)
+        return None
+    stats.registrar(action, (time.perf_counter() - t0) * 1000, respuesta)
+    return respuesta
+
+
+async def lazo_cerrado(conexiones, duracion, generador, timeout, stats):
+    fin = time.perf_counter() + duracion
+
+    async def cliente(conexion):
+        while time.perf_counter() < fin:
+            action, data = generador()
+            respuesta = await _una_peticion(conexion, action, data, timeout, stats)
+            # Un cliente real respeta la pista de reintento del servidor
+            if isinstance(respuesta, dict) and respuesta.get("status") == 503:
+                await asyncio.sleep(respuesta.get("retry_after_ms", 100) / 1000)
+
+    await asyncio.gather(*(cliente(c) for c in conexiones))
+
+
+async def tasa_constante(conexiones, duracion, tasa, generador, timeout, stats):
+    intervalo = 1.0 / tasa
+    inicio = time.perf_counter()
+    tareas = []
+
+    for i in itertools.count():
+        programado = inicio + i * intervalo
+        if programado >= inicio + duracion:
+            break
+        espera = programado - time.perf_counter()
+        if espera > 0:
+            await asyncio.sleep(espera)
+
+        action, data = generador()
+        conexion = conexiones[i % len(conexiones)]
+        tareas.append(asyncio.create_task(
+            _una_peticion(conexion, action, data, timeout, stats, t0=programado)
+        ))
+
+    await asyncio.gather(*tareas)
+
+
+async def _metricas_servidor(host, port):
+    """Lee el histograma de cola del servidor (comando METRICS), si lo expone."""
+    try:
+        reader, writer = await asyncio.open_connection(host, port, limit=2 ** 24)
+        writer.write(b"METRICS\n")
+        await writer.drain()
+        linea = await asyncio.wait_for(reader.readline(), 5)
+        writer.close()
+        return json.loads(linea).get("latencias", {}).get("cola")
+    except Exception:
+        return None
+
+
+async def ejecutar_carga(args):
+    random.seed(args.semilla)
+    documentos = _cargar_documentos(args.fixtures)
+    imagenes = _cargar_imagenes(args.imagenes)
+    generador = construir_generador(_parsear_mezcla(args.mezcla), documentos, imagenes)
+
+    conexiones = [ConexionCarga(args.host, args.port) for _ in range(args.conexiones)]
+    await asyncio.gather(*(c.abrir() for c in conexiones))
+
+    stats = Estadisticas()
+    stats.inicio = time.perf_counter()
+    try:
+        if args.tasa:
+            await tasa_constante(conexiones, args.duracion, args.tasa, generador, args.timeout, stats)
+        else:
+            await lazo_cerrado(conexiones, args.duracion, generador, args.timeout, stats)
+    finally:
+        stats.fin = time.perf_counter()
+        await asyncio.gather(*(c.cerrar() for c in conexiones))
+
+    reporte = stats.reporte()
+    reporte["modo"] = f"tasa_constante({args.tasa}/s)" if args.tasa else "lazo_cerrado"
+    reporte["conexiones"] = args.conexiones
+    reporte["cola_servidor_metrics"] = await _metricas_servidor(args.host, args.port)
+    return reporte
+
+
+def imprimir_reporte(reporte):
+    print(f"\nModo: {reporte['modo']}  conexiones: {reporte['conexiones']}  "
+          f"duración: {reporte['duracion_s']} s")
+    print(f"Completadas: {reporte['completadas']}  throughput: {reporte['throughput_rps']} req/s\n")
+    print(f"{'acción':<36}{'n':>7}{'rps':>8}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}"
+          f"{'cola p50':>10}{'err %':>8}{'t.o. %':>8}{'503':>6}")
+    for action, r in reporte["acciones"].items():
+        lat = r["latencia"]
+        cola = r["cola_servidor"]
+        print(f"{action:<36}{r['completadas']:>7}{r['throughput_rps']:>8}"
+              f"{lat.get('p50_ms', '-'):>9}{lat.get('p90_ms', '-'):>9}{lat.get('p99_ms', '-'):>9}"
+              f"{lat.get('max_ms', '-'):>9}{cola.get('p50_ms', '-'):>10}"
+              f"{r['tasa_error'] * 100:>8.2f}{r['tasa_timeout'] * 100:>8.2f}{r['ocupado_503']:>6}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Prueba de carga del servidor TCP")
+    parser.add_argument("--host", default=os.environ.get("HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.environ.get("PORT", 65432)))
+    parser.add_argument("-c", "--conexiones", type=int, default=4)
+    parser.add_argument("-d", "--duracion", type=float, default=30.0, help="Segundos de carga")
+    parser.add_argument("--tasa", type=float, default=None,
+                        help="Peticiones por segundo (tasa constante). Sin esto: lazo cerrado")
+    parser.add_argument("--mezcla", default="PING=1,validar_cedula=4,talentoHumano_procesamiento_imagen=1")
+    parser.add_argument("--fixtures", default=str(DIR_BENCH / "fixtures"),
+                        help="Directorio con PDFs (ver benchmarks.fixtures)")
+    parser.add_argument("--imagenes", default=None, help="Directorio con fotos para carnets")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Timeout por petición (s)")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--json", default=None, help="Guardar el reporte en este archivo")
+    args = parser.parse_args(argv)
+
+    reporte = asyncio.run(ejecutar_carga(args))
+    imprimir_reporte(reporte)
+
+    if args.json:
+        Path(args.json).write_text(json.dumps(reporte, indent=2))
+        print(f"\n💾 Reporte guardado en {args.json}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
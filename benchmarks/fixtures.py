@@ -0,0 +1,272 @@
+"""
+Generación local (sin red) de cédulas sintéticas en PDF.
+
+Variantes:
+- PDF417 con el layout de la cédula colombiana (campos separados por NUL).
+- QR con los datos en JSON.
+- Zona MRZ TD1 (3 líneas de 30 caracteres) con dígitos de control válidos.
+- PDF de una página (código en la mitad inferior) y de dos páginas (reverso).
+- Copias .enc con el esquema de Config.ENCRYPTION_KEY (IV + AES-CBC + PKCS7).
+- Escaneos degradados: ruido, rotación y baja resolución.
+"""
+import json
+import os
+from pathlib import Path
+
+import cv2
+import fitz
+import numpy as np
+import zxingcpp
+from Crypto.Cipher import AES
+
+from src.config import Config
+
+IV_LENGTH = 16
+
+PERSONAS = [
+    {
+        "cedula": "1023456789",
+        "apellido1": "GOMEZ",
+        "apellido2": "RESTREPO",
+        "nombres": "JUAN CARLOS",
+        "sexo": "M",
+        "fecha_nacimiento": "19900115",
+        "rh": "O+",
+    },
+    {
+        "cedula": "52876543",
+        "apellido1": "MARTINEZ",
+        "apellido2": "LOPEZ",
+        "nombres": "ANA MARIA",
+        "sexo": "F",
+        "fecha_nacimiento": "19851203",
+        "rh": "A-",
+    },
+]
+
+DEGRADACIONES = ["limpio", "ruido", "rotado", "baja_resolucion"]
+
+
+def payload_pdf417(persona):
+    """Texto del PDF417 con el orden de campos de la cédula colombiana."""
+    campos = [
+        "PubDSK_1",
+        persona["cedula"],
+        persona["apellido1"],
+        persona["apellido2"],
+        *persona["nombres"].split(),
+        f"0{persona['sexo']}{persona['fecha_nacimiento']}",
+        "05001",
+        persona["rh"],
+    ]
+    return "\x00".join(campos)
+
+
+def payload_qr(persona):
+    return json.dumps({
+        "numeroDocumento": persona["cedula"],
+        "apellidos": f"{persona['apellido1']} {persona['apellido2']}",
+        "nombres": persona["nombres"],
+        "fechaNacimiento": persona["fecha_nacimiento"],
+        "sexo": persona["sexo"],
+    })
+
+
+def digito_control_mrz(texto):
+    """Dígito de control ICAO 9303 (pesos 7, 3, 1)."""
+    valores = {str(d): d for d in range(10)}
+    valores.update({chr(ord("A") + i): 10 + i for i in range(26)})
+    valores["<"] = 0
+    total = sum(valores[c] * (7, 3, 1)[i % 3] for i, c in enumerate(texto))
+    return str(total % 10)
+
+
+def lineas_mrz_td1(persona, pais="COL", expiracion="330101"):
+    """Las 3 líneas MRZ TD1 (30 caracteres) de la persona."""
+    numero = persona["cedula"][:9].ljust(9, "<")
+    linea1 = f"I<{pais}{numero}{digito_control_mrz(numero)}".ljust(30, "<")
+
+    nacimiento = persona["fecha_nacimiento"][2:]
+    linea2 = (
+        f"{nacimiento}{digito_control_mrz(nacimiento)}{persona['sexo']}"
+        f"{expiracion}{digito_control_mrz(expiracion)}{pais}"
+    ).ljust(29, "<")
+    compuesto = linea1[5:30] + linea2[0:7] + linea2[8:15] + linea2[18:29]
+    linea2 += digito_control_mrz(compuesto)
+
+    apellidos = f"{persona['apellido1']}<{persona['apellido2']}"
+    nombres = persona["nombres"].replace(" ", "<")
+    linea3 = f"{apellidos}<<{nombres}".ljust(30, "<")[:30]
+    return [linea1, linea2, linea3]
+
+
+def _png(img):
+    ok, buffer = cv2.imencode(".png", img)
+    if not ok:
+        raise ValueError("No se pudo codificar la imagen")
+    return buffer.tobytes()
+
+
+def _imagen_codigo(formato, texto, ancho, alto):
+    return np.array(zxingcpp.write_barcode(formato, texto, ancho, alto))
+
+
+def _pagina_frente(doc, persona):
+    page = doc.new_page(width=612, height=792)
+    page.insert_text((72, 90), "REPUBLICA DE COLOMBIA", fontsize=16)
+    page.insert_text((72, 120), f"CEDULA {persona['cedula']}", fontsize=12)
+    page.insert_text((72, 140), f"{persona['apellido1']} {persona['apellido2']}", fontsize=12)
+    page.insert_text((72, 160), persona["nombres"], fontsize=12)
+    return page
+
+
+def _insertar_codigo(page, tipo, persona, rect):
+    if tipo == "pdf417":
+        img = _imagen_codigo(zxingcpp.BarcodeFormat.PDF417, payload_pdf417(persona), 900, 300)
+    else:
+        img = _imagen_codigo(zxingcpp.BarcodeFormat.QRCode, payload_qr(persona), 400, 400)
+    page.insert_image(rect, stream=_png(img))
+
+
+def _insertar_mrz(page, persona, y0):
+    for i, linea in enumerate(lineas_mrz_td1(persona)):
+        page.insert_text((60, y0 + i * 26), linea, fontname="cour", fontsize=19)
+
+
+def crear_pdf(tipo, persona, paginas):
+    """
+    Crea el PDF limpio en memoria.
+
+    Args:
+        tipo: 'pdf417', 'qr' o 'mrz'.
+        persona: Datos de la persona.
+        paginas: 1 (código en la mitad inferior) o 2 (código en el reverso).
+    """
+    doc = fitz.open()
+    frente = _pagina_frente(doc, persona)
+    destino = frente if paginas == 1 else doc.new_page(width=612, height=792)
+
+    if tipo == "mrz":
+        _insertar_mrz(destino, persona, 600)
+    elif tipo == "qr":
+        _insertar_codigo(destino, tipo, persona, fitz.Rect(206, 450, 406, 650))
+    else:
+        _insertar_codigo(destino, tipo, persona, fitz.Rect(56, 480, 556, 650))
+
+    data = doc.tobytes()
+    doc.close()
+    return data
+
+
+def degradar(img, tipo, semilla=0):
+    """Simula un escaneo de mala calidad sobre una página rasterizada (BGR)."""
+    if tipo == "ruido":
+        rng = np.random.default_rng(semilla)
+        ruido = rng.normal(0, 18, img.shape)
+        return np.clip(img.astype(np.float32) + ruido, 0, 255).astype(np.uint8)
+
+    if tipo == "rotado":
+        h, w = img.shape[:2]
+        matriz = cv2.getRotationMatrix2D((w / 2, h / 2), 2.5, 1.0)
+        return cv2.warpAffine(img, matriz, (w, h), borderValue=(255, 255, 255))
+
+    if tipo == "baja_resolucion":
+        h, w = img.shape[:2]
+        pequena = cv2.resize(img, (w // 3, h // 3), interpolation=cv2.INTER_AREA)
+        return cv2.resize(pequena, (w, h), interpolation=cv2.INTER_LINEAR)
+
+    return img
+
+
+def escanear_pdf(pdf_bytes, degradacion, dpi=200, semilla=0):
+    """Rasteriza cada página, la degrada y arma un PDF de imágenes (como un escáner)."""
+    origen = fitz.open(stream=pdf_bytes, filetype="pdf")
+    destino = fitz.open()
+    for i, page in enumerate(origen):
+        pix = page.get_pixmap(dpi=dpi)
+        img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+        img = cv2.cvtColor(img[:, :, :3], cv2.COLOR_RGB2BGR)
+        img = degradar(img, degradacion, semilla + i)
+
+        nueva = destino.new_page(width=page.rect.width, height=page.rect.height)
+        nueva.insert_image(nueva.rect, stream=_png(img))
+    data = destino.tobytes()
+    origen.close()
+    destino.close()
+    return data
+
+
+def encriptar(data, key=None):
+    """Mismo esquema que espera decrypt_file: IV de 16 bytes + AES-CBC con PKCS7."""
+    key = key or Config.ENCRYPTION_KEY
+    pad = 16 - len(data) % 16
+    iv = os.urandom(IV_LENGTH)
+    cipher = AES.new(key, AES.MODE_CBC, iv)
+    return iv + cipher.encrypt(data + bytes([pad]) * pad)
+
+
+def esperado(tipo, persona):
+    """Campos que el pipeline debería extraer de la cédula sintética."""
+    campos = {
+        "metodo": {"pdf417": "PDF417", "qr": "QR", "mrz": "MRZ-OCR"}[tipo],
+        "cedula": persona["cedula"] if tipo != "mrz" else persona["cedula"][:9],
+        "sexo": persona["sexo"],
+    }
+    if tipo == "mrz":
+        # Con el formato en que los devuelve el MRZ (los usa benchmarks.afinar_ocr)
+        campos.update({
+            "fecha_nacimiento": persona["fecha_nacimiento"][2:],
+            "apellidos": f"{persona['apellido1']} {persona['apellido2']}",
+            "nombres": persona["nombres"],
+        })
+    return campos
+
+
+def generar_fixtures(directorio, tipos=("pdf417", "qr", "mrz"), degradaciones=DEGRADACIONES):
+    """
+    Escribe todas las variantes en `directorio`.
+
+    Returns:
+        list[dict]: Un registro por archivo con nombre, ruta y datos esperados.
+    """
+    directorio = Path(directorio)
+    directorio.mkdir(parents=True, exist_ok=True)
+    fixtures = []
+
+    for n, persona in enumerate(PERSONAS):
+        for tipo in tipos:
+            for paginas in (1, 2):
+                limpio = crear_pdf(tipo, persona, paginas)
+                for degradacion in degradaciones:
+                    if degradacion == "limpio":
+                        data = limpio
+                    else:
+                        data = escanear_pdf(limpio, degradacion, semilla=n)
+
+                    nombre = f"{tipo}_{paginas}pag_{degradacion}_{n}"
+                    for encriptado in (False, True):
+                        ruta = directorio / (nombre + (".pdf.enc" if encriptado else ".pdf"))
+                        ruta.write_bytes(encriptar(data) if encriptado else data)
+                        fixtures.append({
+                            "nombre": ruta.name,
+                            "ruta": str(ruta),
+                            "tipo": tipo,
+                            "paginas": paginas,
+                            "degradacion": degradacion,
+                            "encriptado": encriptado,
+                            "esperado": esperado(tipo, persona),
+                        })
+
+    (directorio / "fixtures.json").write_text(json.dumps(fixtures, indent=2))
+    return fixtures
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Genera cédulas sintéticas para benchmarks")
+    parser.add_argument("--dir", default="benchmarks/fixtures")
+    args = parser.parse_args()
+
+    generados = generar_fixtures(args.dir)
+    print(f"✓ {len(generados)} fixtures en {args.dir}")
@@ -0,0 +1,138 @@
+"""
+Paridad del recorte de fotos carnet con detección sobre una copia reducida.
+
+Para cada foto recorta dos veces: detectando la cara en la foto completa
+(como antes) y en la copia reducida a `--lado` px (CARNET_DETECCION_LADO).
+Compara cuánto se corre el recorte, en píxeles de la foto carnet de salida,
+y la diferencia media de sus píxeles. Termina con código 1 si algún
+desplazamiento supera `--tolerancia-px`.
+
+Sin `--imagenes` usa retratos sintéticos de 12 MP (4000x3000) generados
+localmente, con la cara en distintas posiciones y tamaños.
+
+Uso:
+    python -m benchmarks.paridad_carnet
+    python -m benchmarks.paridad_carnet --imagenes fotos/ --lado 1280 --tolerancia-px 3
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+import benchmarks  # noqa: F401  (clave de prueba si no hay .env)
+
+from src.config import Config
+from src.utils.talentoHumano.carnets import recortar_foto_carnet_con_caja
+
+EXTENSIONES = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
+
+# (radio de la cara, centro x, centro y) sobre una foto de 4000x3000
+RETRATOS = [
+    (400, 2000, 1500),
+    (600, 1500, 1400),
+    (350, 2800, 1200),
+    (700, 2000, 1300),
+    (500, 1200, 1500),
+    (450, 2500, 1600),
+    (250, 2000, 1100),
+    (800, 2100, 1500),
+]
+
+# Parámetros del servicio de fotos carnet
+PARAMETROS = {"ancho_cm": 3.11, "alto_cm": 3.11, "dpi": 300, "zoom_cara": 2}
+
+# Desplazamiento máximo del recorte en píxeles de la foto carnet (también lo
+# usa tests/test_paridad_carnet.py)
+TOLERANCIA_PX = 2.0
+
+
+def retrato_sintetico(radio, cx, cy, ancho=4000, alto=3000, semilla=0):
+    """Foto BGR con una cara dibujada (óvalo, pelo, ojos, nariz, boca y hombros)."""
+    rng = np.random.default_rng(semilla)
+    img = np.full((alto, ancho, 3), (180, 200, 210), np.uint8)
+    img = np.clip(img + rng.integers(-10, 10, img.shape), 0, 255).astype(np.uint8)
+    r = radio
+    cv2.ellipse(img, (cx, cy + int(r * 1.6)), (int(r * 1.6), int(r * 0.9)), 0, 180, 360, (90, 60, 40), -1)
+    cv2.rectangle(img, (cx - r // 3, cy + r // 2), (cx + r // 3, cy + r), (120, 150, 200), -1)
+    cv2.ellipse(img, (cx, cy), (int(r * 0.75), r), 0, 0, 360, (130, 170, 220), -1)
+    cv2.ellipse(img, (cx, cy - int(r * 0.55)), (int(r * 0.8), int(r * 0.55)), 0, 180, 360, (30, 30, 40), -1)
+    for lado in (-1, 1):
+        ex, ey = cx + lado * int(r * 0.32), cy - int(r * 0.15)
+        cv2.ellipse(img, (ex, ey), (int(r * 0.14), int(r * 0.07)), 0, 0, 360, (255, 255, 255), -1)
+        cv2.circle(img, (ex, ey), int(r * 0.06), (40, 30, 20), -1)
+        cv2.line(img, (ex - int(r * 0.15), ey - int(r * 0.15)), (ex + int(r * 0.15), ey - int(r * 0.17)),
+                 (30, 30, 40), max(2, r // 30))
+    cv2.line(img, (cx, cy - int(r * 0.05)), (cx - int(r * 0.06), cy + int(r * 0.25)), (100, 130, 180), max(2, r // 40))
+    cv2.ellipse(img, (cx, cy + int(r * 0.5)), (int(r * 0.25), int(r * 0.08)), 0, 0, 180, (60, 60, 160), max(3, r // 25))
+    return cv2.GaussianBlur(img, (0, 0), 3)
+
+
+def cargar_imagenes(directorio):
+    if directorio is None:
+        return [(f"sintetica_{i}", retrato_sintetico(*r, semilla=i)) for i, r in enumerate(RETRATOS)]
+    rutas = sorted(p for p in Path(directorio).iterdir() if p.suffix.lower() in EXTENSIONES)
+    return [(p.name, cv2.imread(str(p))) for p in rutas]
+
+
+def _recortar(img, lado):
+    inicio = time.perf_counter()
+    carnet, caja = recortar_foto_carnet_con_caja(img, lado_deteccion=lado, **PARAMETROS)
+    return carnet, caja, (time.perf_counter() - inicio) * 1000
+
+
+def comparar(img, lado):
+    """Desplazamiento (px de salida), diferencia media de píxeles y tiempos de ambos caminos."""
+    completa, caja_completa, ms_completa = _recortar(img, 0)
+    reducida, caja_reducida, ms_reducida = _recortar(img, lado)
+
+    # Un píxel de la foto original equivale a carnet/recorte píxeles de salida
+    recorte = max(caja_completa["ancho"], caja_completa["alto"]) * PARAMETROS["zoom_cara"]
+    escala = completa.shape[1] / recorte
+    desplazamiento = max(abs(caja_completa[k] - caja_reducida[k]) for k in caja_completa) * escala
+    diferencia = float(np.abs(completa.astype(np.int16) - reducida.astype(np.int16)).mean())
+    return round(desplazamiento, 2), round(diferencia, 2), ms_completa, ms_reducida
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compara el recorte carnet con detección completa y reducida")
+    parser.add_argument("--imagenes", default=None, help="Carpeta con fotos (por defecto retratos sintéticos)")
+    parser.add_argument("--lado", type=int, default=Config.CARNET_DETECCION_LADO or 1600)
+    parser.add_argument("--tolerancia-px", type=float, default=TOLERANCIA_PX,
+                        help="Desplazamiento máximo del recorte en píxeles de la foto carnet")
+    args = parser.parse_args(argv)
+
+    imagenes = cargar_imagenes(args.imagenes)
+    # El primer uso crea el detector: no se cuenta en los tiempos
+    recortar_foto_carnet_con_caja(imagenes[0][1], **PARAMETROS)
+
+    print(f"{'foto':<28}{'desplaz. px':>12}{'dif. media':>12}{'ms completa':>13}{'ms reducida':>13}")
+    fuera, tiempos = [], []
+    for nombre, img in imagenes:
+        try:
+            desplazamiento, diferencia, ms_completa, ms_reducida = comparar(img, args.lado)
+        except ValueError as e:
+            print(f"{nombre:<28}  sin cara: {e}")
+            fuera.append(nombre)
+            continue
+        tiempos.append((ms_completa, ms_reducida))
+        marca = "  ✗" if desplazamiento > args.tolerancia_px else ""
+        print(f"{nombre:<28}{desplazamiento:>12}{diferencia:>12}{ms_completa:>13.1f}{ms_reducida:>13.1f}{marca}")
+        if marca:
+            fuera.append(nombre)
+
+    if tiempos:
+        completa, reducida = (sum(t) / len(t) for t in zip(*tiempos))
+        print(f"\nMedia: {completa:.1f} ms completa, {reducida:.1f} ms reducida a {args.lado} px "
+              f"({completa / reducida:.1f}x)")
+    if fuera:
+        print(f"✗ {len(fuera)} fotos fuera de la tolerancia de {args.tolerancia_px} px: {', '.join(fuera)}")
+        return 1
+    print(f"✓ Todos los recortes dentro de {args.tolerancia_px} px")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
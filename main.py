@@ -7,7 +7,10 @@ import os
 from dotenv import load_dotenv
 # import random
 # from concurrent import futures
-from src.routes import MODELOS_ROUTES
+from src.server import despachar_accion, ServidorTCPAsincrono, EjecutorHandlers
+from src.server.despacho import respuesta_json_invalido, respuesta_error_interno, respuesta_plazo_invalido
+from src.utils.plazos import fin_desde_deadline_ms
+from src.server.protocolo import es_comando_metricas, codificar_metricas
 from src.config import Config
 
 HOST = Config.HOST 
@@ -47,25 +50,23 @@ def tcpServer():
                                 conn.sendall(b"PONG\n")
                                 continue
 
+                            if es_comando_metricas(data_str):
+                                conn.sendall(codificar_metricas(data_str))
+                                continue
+
+                            recibido = time.perf_counter()
                             data_obj = json.loads(data_str)
                             action = data_obj.get("action")
                             params = data_obj.get('data', {})
 
+                            try:
+                                fin = fin_desde_deadline_ms(data_obj.get("deadline_ms"), recibido)
+                            except ValueError as e:
+                                conn.sendall(json.dumps(respuesta_plazo_invalido(e)).encode())
+                                continue
+
                             # Enrutamos la petición
-                            if action in MODELOS_ROUTES:
-                                handler = MODELOS_ROUTES[action]
-                                
-                                # Si params es un diccionario, desempaquetamos. 
-                                # Si es un string u otro tipo, lo pasamos como argumento único.
-                                if isinstance(params, dict):
-                                    response = handler(**params)
-                                else:
-                                    response = handler(params)
-                            else:
-                                response = {
-                                    "success": False,
-                                    "error": f"Acción no encontrada: {action}"
-                                }
+                            response = despachar_accion(action, params, fin)
                             
                             # Enviamos la respuesta
                             conn.sendall(json.dumps(response).encode('utf-8'))
@@ -74,20 +75,11 @@ def tcpServer():
                             continue  # da oportunidad a KeyboardInterrupt de ser lanzado
 
                         except json.JSONDecodeError as e:
-                            error_msg = {
-                                "status": 400,
-                                "message": "JSON inválido",
-                                "details": str(e)
-                            }
+                            error_msg = respuesta_json_invalido(e)
                             conn.sendall(json.dumps(error_msg).encode())
 
                         except Exception as e:
-                            error_msg = {
-                                "status": 500,
-                                "message": "Error interno del servidor",
-                                "details": str(e),
-                                "trace": traceback.format_exc()
-                            }
+                            error_msg = respuesta_error_interno(e)
                             print(f"❌ Error en handler: {e}")
                             print(traceback.format_exc())
 
@@ -105,7 +97,25 @@ def tcpServer():
             print("\n🛑 Servidor detenido manualmente con Ctrl+C")
 
 
+def tcpServerAsync():
+    ejecutor = EjecutorHandlers(
+        backend=Config.EXECUTOR_BACKEND,
+        max_workers=Config.SERVER_WORKERS,
+        max_cola=Config.SERVER_MAX_QUEUE,
+        start_method=Config.WORKER_START_METHOD
+    )
+    servidor = ServidorTCPAsincrono(HOST, PORT, ejecutor=ejecutor, calentamiento=Config.SERVER_WARMUP)
+    servidor.serve()
+
+
 if __name__ == '__main__':
     # load_dotenv()
     # serve()
-    tcpServer()
\ No newline at end of file
+    # Validar al inicio (no al importar Config: los workers y benchmarks no lo necesitan)
+    Config.validate()
+
+    if Config.SERVER_MODE == "blocking":
+        # Modo de respaldo: una conexión a la vez
+        tcpServer()
+    else:
+        tcpServerAsync()
@@ -20,6 +20,56 @@ class Config:
     UPLOAD_PATH = os.environ.get('UPLOAD_PATH', './uploads')
     HOST = os.environ.get('HOST', '127.0.0.1')
     PORT = int(os.environ.get('PORT', 65432))
+    # Modo del servidor: 'async' (concurrente) o 'blocking' (una conexión a la vez)
+    SERVER_MODE = os.environ.get('SERVER_MODE', 'async')
+    SERVER_WORKERS = int(os.environ.get('SERVER_WORKERS', os.cpu_count() or 4))
+    # Backend de ejecución de handlers: 'thread' o 'process'
+    EXECUTOR_BACKEND = os.environ.get('EXECUTOR_BACKEND', 'thread')
+    # Trabajos que pueden esperar en cola además de los que se ejecutan
+    SERVER_MAX_QUEUE = int(os.environ.get('SERVER_MAX_QUEUE', SERVER_WORKERS * 4))
+    # 'spawn', 'forkserver' (precarga los módulos una vez y los workers la heredan) o 'fork'
+    WORKER_START_METHOD = os.environ.get('WORKER_START_METHOD', 'spawn')
+    # Carga de las rutas: 'eager', 'background' (PING listo de inmediato) o 'lazy'
+    SERVER_WARMUP = os.environ.get('SERVER_WARMUP', 'background')
+    # Cache de resultados de validar_cedula (memoria + disco)
+    CACHE_ENABLED = os.environ.get('CACHE_ENABLED', 'True') == 'True'
+    CACHE_PATH = os.environ.get('CACHE_PATH', './cache/validar_cedula.sqlite3')
+    CACHE_MEMORY_ITEMS = int(os.environ.get('CACHE_MEMORY_ITEMS', 256))
+    # Motor de OCR: 'auto' (libtesseract si está, si no pytesseract), 'capi' o 'pytesseract'
+    OCR_BACKEND = os.environ.get('OCR_BACKEND', 'auto')
+    # Ruta a libtesseract.so y a la carpeta tessdata (vacías = las del sistema)
+    TESSERACT_LIB = os.environ.get('TESSERACT_LIB', '')
+    TESSDATA_PATH = os.environ.get('TESSDATA_PATH', '')
+    # Buscar primero las regiones con códigos de barras y decodificar solo esos
+    # recortes. Acelera las páginas con PDF417 (~35 -> ~19 ms a 300 DPI), pero
+    # las que no lo tienen (solo QR, o van al MRZ) pagan la búsqueda y además la
+    # página completa (~26 -> ~36 ms, en cada nivel de DPI_CASCADA). Conviene
+    # solo si casi todo el tráfico trae PDF417
+    BARCODE_LOCALIZAR = os.environ.get('BARCODE_LOCALIZAR', 'False') == 'True'
+    # DPI con los que se intenta leer el código de barras, de menor a mayor: se
+    # re-renderiza al siguiente solo si el anterior no dio datos completos.
+    # El OCR del MRZ usa la imagen del último nivel.
+    DPI_CASCADA = [int(d) for d in os.environ.get('DPI_CASCADA', '150,300').split(',') if d.strip()]
+    # validar_cedula en modo carrera: PDF417/QR y OCR del MRZ en paralelo sobre
+    # la misma imagen (menos latencia, más CPU). Cada petición puede cambiarlo.
+    VALIDAR_CEDULA_CARRERA = os.environ.get('VALIDAR_CEDULA_CARRERA', 'False') == 'True'
+    # Tiempo (ms) para reintentar el OCR del MRZ con otras variantes de
+    # preprocesamiento cuando sus dígitos de control no cuadran (0 = no reintentar)
+    MRZ_REINTENTOS_MS = int(os.environ.get('MRZ_REINTENTOS_MS', 1000))
+    # Perfil de preprocesamiento del OCR escrito por benchmarks/afinar_ocr.py
+    # (vacío = los parámetros fijos del servicio)
+    OCR_PERFIL_PATH = os.environ.get('OCR_PERFIL_PATH', '')
+    # Lado mayor (px) de la copia reducida en la que se detecta la cara de las
+    # fotos carnet; el recorte se hace sobre la foto original (0 = detectar
+    # sobre la foto completa)
+    CARNET_DETECCION_LADO = int(os.environ.get('CARNET_DETECCION_LADO', 1600))
+    # Tiempo máximo (ms) que un item de un lote sin plazo espera a que la cola
+    # tenga lugar antes de reportarse como ocupado (503)
+    LOTE_ESPERA_OCUPADO_MS = int(os.environ.get('LOTE_ESPERA_OCUPADO_MS', 30000))
+    # Tamaño máximo de un mensaje JSON (bytes) antes del salto de línea
+    MAX_MESSAGE_BYTES = int(os.environ.get('MAX_MESSAGE_BYTES', 1024 * 1024))
+    # Tamaño máximo de un documento o imagen enviado en línea (frame binario)
+    MAX_PAYLOAD_BYTES = int(os.environ.get('MAX_PAYLOAD_BYTES', 100 * 1024 * 1024))
     
     @staticmethod
     def validate():
@@ -36,5 +86,16 @@ class Config:
                 "Si es Hexadecimal, debe tener 32, 48 o 64 caracteres."
             )
 
-# Validar al inicio
-Config.validate()
\ No newline at end of file
+        if not Config.DPI_CASCADA or any(d <= 0 for d in Config.DPI_CASCADA):
+            raise ValueError("DPI_CASCADA debe ser una lista de DPI positivos, por ejemplo '150,300'")
+
+        if Config.CARNET_DETECCION_LADO < 0:
+            raise ValueError("CARNET_DETECCION_LADO debe ser 0 (foto completa) o un lado en píxeles")
+
+        if Config.OCR_PERFIL_PATH and not os.path.isfile(Config.OCR_PERFIL_PATH):
+            raise ValueError(f"OCR_PERFIL_PATH no existe: {Config.OCR_PERFIL_PATH}")
+        if Config.OCR_PERFIL_PATH:
+            # Se prueban los valores ya: un perfil inválido haría fallar cada
+            # OCR del MRZ. Importa OpenCV, solo cuando hay perfil configurado
+            from src.utils.perfil_ocr import cargar_perfil_ocr
+            cargar_perfil_ocr(Config.OCR_PERFIL_PATH)
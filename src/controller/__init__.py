@@ -1,25 +1,30 @@
-
-
 """
 Módulo de controladores para el servidor.
+
+Los controllers se importan bajo demanda (PEP 562): importar el paquete no
+carga las dependencias pesadas de cada uno.
 """
+import importlib
+
+_EXPORTS = {
+    'ValidarDocumentosController': '.validacion_documentos_controller',
+    'VALIDAR_DOCUMENTOS_ROUTES': '.validacion_documentos_controller',
+    'controllerValidarDocumentos': '.validacion_documentos_controller',
+    'ProcesamientoImagenController': '.talentoHumando.imagen_controller',
+    'VALIDAR_DOCUMENTOS_ROUTES_TALENTO_HUMANO': '.talentoHumando.imagen_controller',
+    'controllerProcesamientoImagen': '.talentoHumando.imagen_controller',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    valor = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = valor
+    return valor
 
-from .validacion_documentos_controller import (
-    ValidarDocumentosController,
-    VALIDAR_DOCUMENTOS_ROUTES,
-    controllerValidarDocumentos
-)
-from .talentoHumando.imagen_controller import (
-    ProcesamientoImagenController,
-    VALIDAR_DOCUMENTOS_ROUTES_TALENTO_HUMANO,
-    controllerProcesamientoImagen
-)
 
-__all__ = [
-    'ValidarDocumentosController',
-    'VALIDAR_DOCUMENTOS_ROUTES',
-    'controllerValidarDocumentos',
-    'ProcesamientoImagenController',
-    'VALIDAR_DOCUMENTOS_ROUTES_TALENTO_HUMANO',
-    'controllerProcesamientoImagen'
-]
\ No newline at end of file
+def __dir__():
+    return sorted(list(globals()) + __all__)
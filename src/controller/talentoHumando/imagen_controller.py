@@ -17,6 +17,13 @@ class ProcesamientoImagenController:
             # Obtener path de la imagen
             # Puede venir como argumento posicional (si data es string) o en kwargs
             url_imagen = args[0] if args else envelope.get("urlImagen") or envelope.get("data")
+
+            # Imagen en línea (frame binario): se procesa y se devuelve en memoria
+            contenido = envelope.get("contenido")
+            if contenido is not None:
+                return self.procesamiento_imagen_service.procesar_foto_carnet_contenido_service(
+                    contenido, nombre=url_imagen or envelope.get("nombreArchivo")
+                )
             
             if not url_imagen:
                 return {"success": False, "error": "Falta la ruta de la imagen (parametro 'data')"}
@@ -31,6 +38,31 @@ class ProcesamientoImagenController:
             return {"success": False, "error": str(e)}
     
 
+    def listar_imagenes(self, *args, **envelope):
+        """
+        Endpoint que arma la lista de fotos de un lote: una ruta o lista de
+        rutas ('urlImagenes' o 'data') y/o todas las imágenes de 'directorio'.
+        """
+        try:
+            urls = args[0] if args else envelope.get("urlImagenes") or envelope.get("data")
+            return self.procesamiento_imagen_service.listar_imagenes_service(urls, envelope.get("directorio"))
+        except Exception as e:
+            print(f"❌ Error en controller listar_imagenes: {e}")
+            return {"success": False, "error": str(e)}
+
+    def estado_detectores(self, *args, **envelope):
+        """
+        Endpoint de salud del pool de detectores de caras.
+        Con {"reiniciar": true} descarta los detectores y se recrean en el próximo uso.
+        """
+        try:
+            if envelope.get("reiniciar"):
+                return self.procesamiento_imagen_service.reiniciar_detectores()
+            return self.procesamiento_imagen_service.estado_detectores()
+        except Exception as e:
+            print(f"❌ Error en controller estado_detectores: {e}")
+            return {"success": False, "error": str(e)}
+
 
 # ✅ Instanciamos el controller UNA SOLA VEZ
 controllerProcesamientoImagen = ProcesamientoImagenController()
@@ -38,4 +70,6 @@ controllerProcesamientoImagen = ProcesamientoImagenController()
 # Definimos las rutas apuntando al método del controller
 VALIDAR_DOCUMENTOS_ROUTES_TALENTO_HUMANO = {
     "talentoHumano_procesamiento_imagen": controllerProcesamientoImagen.procesamiento_imagen,
+    "talentoHumano_detector_estado": controllerProcesamientoImagen.estado_detectores,
+    "talentoHumano_listar_imagenes": controllerProcesamientoImagen.listar_imagenes,
 }
\ No newline at end of file
@@ -15,7 +15,9 @@ class ValidarDocumentosController:
         
         Args:
             *args: Puede recibir el url_identificacion como primer argumento posicional.
-            **envelope: Data y urlIdentificacion pasados como keywords.
+            **envelope: Data y urlIdentificacion pasados como keywords. Si el
+                documento viene en línea (frame binario) llega en 'contenido'.
+                Con 'carrera' se elige el modo carrera para esta petición.
             
         Returns:
             dict: Respuesta con resultado de validación
@@ -31,6 +33,17 @@ class ValidarDocumentosController:
             if not url_identificacion:
                 url_identificacion = envelope.get("urlIdentificacion") or envelope.get("data")
 
+            contenido = envelope.get("contenido")
+            if contenido is not None:
+                # Documento en línea: la ruta es opcional y solo se usa como nombre
+                print(f"📥 Documento en línea ({len(contenido)} bytes)")
+                return self.validacion_service.validar_cedula(
+                    url_identificacion or envelope.get("nombreArchivo"),
+                    contenido=contenido,
+                    encriptado=envelope.get("encriptado"),
+                    carrera=envelope.get("carrera")
+                )
+
             if not url_identificacion:
                 print("❌ No se encontró la ruta del PDF (urlIdentificacion o data)")
                 return {"success": False, "error": "Ruta de archivo no proporcionada"}
@@ -40,12 +53,58 @@ class ValidarDocumentosController:
                 url_identificacion = url_identificacion.strip('"').strip("'")
 
             print(f"📂 Intentando leer: {url_identificacion}")
-            return self.validacion_service.validar_cedula(url_identificacion)
+            return self.validacion_service.validar_cedula(url_identificacion, carrera=envelope.get("carrera"))
             
         except Exception as e:
             print(f"❌ Excepción en validar_cedula: {e}")
             return {"success": False, "error": str(e)}
 
+    def validar_cedula_pagina(self, *args, **envelope):
+        """
+        Endpoint para validar la cédula de una página de un PDF con varias.
+        Lo usa el lote 'validar_cedulas_documento', una llamada por página.
+
+        Args:
+            **envelope: 'urlIdentificacion' y 'pagina' (índice desde 0).
+
+        Returns:
+            dict: Respuesta de validar_cedula con 'pagina' y 'metodo'
+        """
+        try:
+            url_identificacion = self._ruta_documento(args, envelope)
+            pagina = envelope.get("pagina")
+            if not url_identificacion or not isinstance(pagina, int):
+                return {"success": False, "error": "Se requieren urlIdentificacion y pagina"}
+            return self.validacion_service.validar_pagina(url_identificacion, pagina)
+        except Exception as e:
+            print(f"❌ Excepción en validar_cedula_pagina: {e}")
+            return {"success": False, "error": str(e)}
+
+    def contar_paginas_documento(self, *args, **envelope):
+        """Endpoint con el número de páginas de un PDF (o .enc)."""
+        try:
+            url_identificacion = self._ruta_documento(args, envelope)
+            if not url_identificacion:
+                return {"success": False, "error": "Ruta de archivo no proporcionada"}
+            return {"success": True, "data": {"paginas": self.validacion_service.contar_paginas(url_identificacion)}}
+        except Exception as e:
+            print(f"❌ Excepción en contar_paginas_documento: {e}")
+            return {"success": False, "error": str(e)}
+
+    @staticmethod
+    def _ruta_documento(args, envelope):
+        url_identificacion = (args[0] if args else None) or envelope.get("urlIdentificacion") or envelope.get("data")
+        if isinstance(url_identificacion, str):
+            url_identificacion = url_identificacion.strip('"').strip("'")
+        return url_identificacion
+
+    def estadisticas_cache(self, *args, **envelope):
+        """
+        Endpoint con los contadores de hit/miss del cache de validar_cedula.
+        Con EXECUTOR_BACKEND=process los contadores son del worker que responde.
+        """
+        return {"success": True, "data": self.validacion_service.estadisticas_cache()}
+
 
 # ✅ Instanciamos el controller UNA SOLA VEZ
 controllerValidarDocumentos = ValidarDocumentosController()
@@ -53,4 +112,7 @@ controllerValidarDocumentos = ValidarDocumentosController()
 # Definimos las rutas apuntando al método del controller
 VALIDAR_DOCUMENTOS_ROUTES = {
     "validar_cedula": controllerValidarDocumentos.validar_cedula,
+    "validar_cedula_pagina": controllerValidarDocumentos.validar_cedula_pagina,
+    "contar_paginas_documento": controllerValidarDocumentos.contar_paginas_documento,
+    "validar_cedula_cache_stats": controllerValidarDocumentos.estadisticas_cache,
 }
\ No newline at end of file
@@ -1 +1,2 @@
-from src.routes.modelos_routes import MODELOS_ROUTES
\ No newline at end of file
+from src.routes.modelos_routes import MODELOS_ROUTES
+from src.routes.lotes_routes import LOTES_ROUTES
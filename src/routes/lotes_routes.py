@@ -0,0 +1,70 @@
+"""
+Acciones por lote: cada una se reparte en llamadas a una acción individual
+de MODELOS_ROUTES y el servidor transmite un resultado por item.
+"""
+
+
+def items_validar_cedula(params, preparacion=None):
+    """Convierte la lista de rutas del lote en parámetros de 'validar_cedula'."""
+    if isinstance(params, dict):
+        urls = params.get("urlIdentificaciones") or params.get("data") or []
+    else:
+        urls = params
+
+    if isinstance(urls, str):
+        urls = [urls]
+
+    return [{"urlIdentificacion": url} for url in urls]
+
+
+def items_paginas_documento(params, preparacion):
+    """Una llamada a 'validar_cedula_pagina' por cada página del documento."""
+    url = params.get("urlIdentificacion") or params.get("data") if isinstance(params, dict) else params
+    paginas = preparacion["data"]["paginas"]
+    return [{"urlIdentificacion": url, "pagina": pagina} for pagina in range(paginas)]
+
+
+def items_fotos_carnet(params, preparacion):
+    """Parámetros de 'talentoHumano_procesamiento_imagen' por cada foto listada."""
+    return [{"urlImagen": url} for url in preparacion["data"]["urlImagenes"]]
+
+
+def clasificar_exito(respuesta):
+    """'exito' o 'fallo' según el campo success de la respuesta."""
+    return "exito" if isinstance(respuesta, dict) and respuesta.get("success") else "fallo"
+
+
+def clasificar_validacion_cedula(respuesta):
+    """Devuelve el método con el que se validó la cédula, o 'fallo'."""
+    if isinstance(respuesta, dict) and respuesta.get("success") and respuesta.get("data"):
+        return respuesta["data"].get("metodo") or "fallo"
+    return "fallo"
+
+
+LOTES_ROUTES = {
+    "validar_cedula_batch": {
+        "accion": "validar_cedula",
+        "items": items_validar_cedula,
+        "clasificar": clasificar_validacion_cedula,
+        "categorias": ["PDF417", "QR", "MRZ-OCR", "fallo"],
+    },
+    # Un PDF con una cédula escaneada por página: cada página se rasteriza y
+    # decodifica en su propio worker y se transmite con su índice y método
+    "validar_cedulas_documento": {
+        "accion": "validar_cedula_pagina",
+        "preparar": "contar_paginas_documento",
+        "items": items_paginas_documento,
+        "clasificar": clasificar_validacion_cedula,
+        "categorias": ["PDF417", "QR", "MRZ-OCR", "fallo"],
+    },
+    # Fotos carnet de una cuadrilla: cada worker usa su propio detector de
+    # caras caliente (POOL_DETECTORES es por proceso y por hilo). El listado
+    # del directorio también corre en el ejecutor, no en el event loop
+    "talentoHumano_procesamiento_imagen_batch": {
+        "accion": "talentoHumano_procesamiento_imagen",
+        "preparar": "talentoHumano_listar_imagenes",
+        "items": items_fotos_carnet,
+        "clasificar": clasificar_exito,
+        "categorias": ["exito", "fallo"],
+    },
+}
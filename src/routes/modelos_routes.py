@@ -1,7 +1,93 @@
-from src.controller import VALIDAR_DOCUMENTOS_ROUTES
-from src.controller.talentoHumando.imagen_controller import VALIDAR_DOCUMENTOS_ROUTES_TALENTO_HUMANO
-# Combinamos rutas
-MODELOS_ROUTES = {
-    **VALIDAR_DOCUMENTOS_ROUTES,
-    **VALIDAR_DOCUMENTOS_ROUTES_TALENTO_HUMANO,
+"""
+Rutas de los modelos. Cada acción se asocia al módulo del controller que la
+atiende y el módulo se importa la primera vez que se usa la acción (o durante
+el calentamiento), así el servidor arranca sin cargar PyMuPDF, OpenCV,
+MediaPipe ni Tesseract.
+"""
+import threading
+from collections.abc import Mapping
+
+from src.utils.arranque import importar_medido
+
+# módulo del controller -> (diccionario de rutas del módulo, acciones que define).
+# Al agregar una acción en un controller hay que declararla aquí.
+RUTAS_POR_MODULO = {
+    "src.controller.validacion_documentos_controller": (
+        "VALIDAR_DOCUMENTOS_ROUTES",
+        [
+            "validar_cedula",
+            "validar_cedula_pagina",
+            "contar_paginas_documento",
+            "validar_cedula_cache_stats",
+        ],
+    ),
+    "src.controller.talentoHumando.imagen_controller": (
+        "VALIDAR_DOCUMENTOS_ROUTES_TALENTO_HUMANO",
+        [
+            "talentoHumano_procesamiento_imagen",
+            "talentoHumano_detector_estado",
+            "talentoHumano_listar_imagenes",
+        ],
+    ),
 }
+
+
+class RutasPerezosas(Mapping):
+    """
+    Diccionario de rutas que importa el módulo de cada acción bajo demanda.
+    `action in rutas` no importa nada; `rutas[action]` carga el módulo.
+    """
+
+    def __init__(self, rutas_por_modulo):
+        self._modulo_de = {}
+        for modulo, (atributo, acciones) in rutas_por_modulo.items():
+            for accion in acciones:
+                self._modulo_de[accion] = (modulo, atributo)
+        self._handlers = {}
+        self._lock = threading.Lock()
+
+    @property
+    def modulos(self):
+        return list(dict.fromkeys(modulo for modulo, _ in self._modulo_de.values()))
+
+    def _cargar_modulo(self, modulo, atributo):
+        rutas = getattr(importar_medido(modulo), atributo)
+
+        faltantes = [a for a, (m, _) in self._modulo_de.items() if m == modulo and a not in rutas]
+        if faltantes:
+            raise LookupError(f"{modulo}.{atributo} no define las acciones {faltantes}")
+        # Una acción del controller que no está en RUTAS_POR_MODULO nunca se
+        # atendería ("acción no encontrada"): mejor fallar al cargar el módulo
+        sin_declarar = [a for a in rutas if self._modulo_de.get(a, (None,))[0] != modulo]
+        if sin_declarar:
+            raise LookupError(f"{modulo}.{atributo} define acciones no declaradas en RUTAS_POR_MODULO: {sin_declarar}")
+        self._handlers.update(rutas)
+
+    def __getitem__(self, accion):
+        handler = self._handlers.get(accion)
+        if handler is not None:
+            return handler
+
+        modulo, atributo = self._modulo_de[accion]
+        with self._lock:
+            if accion not in self._handlers:
+                self._cargar_modulo(modulo, atributo)
+        return self._handlers[accion]
+
+    def __contains__(self, accion):
+        return accion in self._modulo_de
+
+    def __iter__(self):
+        return iter(self._modulo_de)
+
+    def __len__(self):
+        return len(self._modulo_de)
+
+    def cargar_todo(self):
+        """Importa todos los controllers (calentamiento)."""
+        for accion in self._modulo_de:
+            self[accion]
+
+
+# Combinamos rutas
+MODELOS_ROUTES = RutasPerezosas(RUTAS_POR_MODULO)
@@ -0,0 +1,14 @@
+"""
+Módulo del servidor TCP (modo concurrente y despacho de acciones).
+"""
+
+from .despacho import despachar_accion
+from .ejecutores import EjecutorHandlers, ServidorOcupado
+from .servidor_asincrono import ServidorTCPAsincrono
+
+__all__ = [
+    'despachar_accion',
+    'EjecutorHandlers',
+    'ServidorOcupado',
+    'ServidorTCPAsincrono'
+]
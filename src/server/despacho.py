@@ -0,0 +1,98 @@
+import traceback
+from src.routes import MODELOS_ROUTES, LOTES_ROUTES
+from src.utils.metricas import contar, medir_etapa
+from src.utils.plazos import aplicar_plazo, plazo_agotado
+
+
+def despachar_accion(action, params, fin=None):
+    """
+    Ejecuta el handler registrado en MODELOS_ROUTES para una acción.
+
+    Args:
+        action: Nombre de la acción recibida en el mensaje.
+        params: Contenido del campo 'data' del mensaje.
+        fin: Instante límite de la petición (ver src.utils.plazos) o None.
+            Los handlers lo consultan con `verificar_plazo`.
+
+    Returns:
+        dict: Respuesta del handler o error de acción no encontrada.
+    """
+    if action in LOTES_ROUTES:
+        return {
+            "success": False,
+            "error": f"La acción {action} transmite resultados por item y requiere SERVER_MODE=async"
+        }
+
+    if action not in MODELOS_ROUTES:
+        return {
+            "success": False,
+            "error": f"Acción no encontrada: {action}"
+        }
+
+    handler = MODELOS_ROUTES[action]
+
+    with aplicar_plazo(fin):
+        if plazo_agotado():
+            # Esperó en la cola más de lo que el cliente estaba dispuesto a esperar
+            contar("plazo.agotado.cola")
+            return respuesta_plazo_agotado("cola")
+
+        # Si params es un diccionario, desempaquetamos.
+        # Si es un string u otro tipo, lo pasamos como argumento único.
+        with medir_etapa(action, grupo="accion"):
+            if isinstance(params, dict):
+                return handler(**params)
+            return handler(params)
+
+
+def respuesta_json_invalido(e):
+    return {
+        "status": 400,
+        "message": "JSON inválido",
+        "details": str(e)
+    }
+
+
+def respuesta_error_interno(e):
+    return {
+        "status": 500,
+        "message": "Error interno del servidor",
+        "details": str(e),
+        "trace": traceback.format_exc()
+    }
+
+
+def respuesta_mensaje_grande(e):
+    return {
+        "status": 413,
+        "message": "Mensaje demasiado grande",
+        "details": str(e)
+    }
+
+
+def respuesta_plazo_invalido(e):
+    return {
+        "status": 400,
+        "message": "deadline_ms inválido",
+        "details": str(e)
+    }
+
+
+def respuesta_plazo_agotado(etapa):
+    return {
+        "success": False,
+        "status": 504,
+        "error": "deadline",
+        "message": f"Plazo agotado en la etapa '{etapa}'",
+        "etapas": []
+    }
+
+
+def respuesta_ocupado(e):
+    return {
+        "success": False,
+        "status": 503,
+        "error": "busy",
+        "message": "Servidor ocupado, reintente más tarde",
+        "retry_after_ms": e.retry_after_ms
+    }
@@ -0,0 +1,202 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from src.routes import MODELOS_ROUTES
+from src.server.despacho import despachar_accion, respuesta_plazo_agotado
+from src.utils.arranque import DEPENDENCIAS_PESADAS, TIEMPOS_IMPORTACION, importar_medido
+from src.utils.metricas import REGISTRO, contar, recolectar_metricas, registrar_latencia
+
+# Módulos pesados que cada worker importa una sola vez al arrancar (y que el
+# forkserver importa antes de crear los workers). Solo librerías: los
+# controllers abren recursos (la conexión SQLite del cache) que no pueden
+# cruzar un fork, así que cada worker los importa después (cargar_todo)
+MODULOS_PRECARGA = list(DEPENDENCIAS_PESADAS)
+
+
+class ServidorOcupado(Exception):
+    """La cola de trabajos está llena; el cliente debe reintentar más tarde."""
+
+    def __init__(self, retry_after_ms):
+        super().__init__(f"Servidor ocupado, reintente en {retry_after_ms} ms")
+        self.retry_after_ms = retry_after_ms
+
+
+def precargar_modulos():
+    """
+    Importa los módulos pesados (PyMuPDF, OpenCV, MediaPipe...) y los
+    controllers de todas las rutas.
+
+    Returns:
+        dict: Milisegundos de importación por módulo en este proceso.
+    """
+    for modulo in MODULOS_PRECARGA:
+        importar_medido(modulo)
+    MODELOS_ROUTES.cargar_todo()
+    return dict(TIEMPOS_IMPORTACION)
+
+
+def _inicializar_worker():
+    inicio = time.perf_counter()
+    precargar_modulos()
+    print(f"⚙️ Worker {os.getpid()} listo en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+
+def _calentar_worker():
+    # Con forkserver los módulos ya vienen cargados y los tiempos quedan vacíos
+    return os.getpid(), precargar_modulos()
+
+
+def _ejecutar_en_worker(action, params, fin=None):
+    """
+    Ejecuta la acción en el worker y devuelve también sus métricas, para que
+    el proceso principal las fusione (con procesos no comparten memoria).
+    """
+    inicio = time.perf_counter()
+    with recolectar_metricas() as eventos:
+        respuesta = despachar_accion(action, params, fin)
+    return respuesta, eventos, inicio
+
+
+class EjecutorHandlers:
+    """
+    Ejecuta los handlers de MODELOS_ROUTES en un pool de hilos o de procesos.
+    Responsabilidad: Limitar cuántos trabajos hay en vuelo y en cola, y
+    responder "ocupado" con una pista de reintento cuando la cola se llena.
+    """
+
+    def __init__(self, backend="thread", max_workers=None, max_cola=None, start_method="spawn"):
+        if backend not in ("thread", "process"):
+            raise ValueError(f"Backend de ejecución inválido: {backend}")
+
+        self.backend = backend
+        self.max_workers = max_workers or os.cpu_count() or 4
+        self.max_cola = max_cola if max_cola is not None else self.max_workers * 4
+        self.start_method = start_method
+
+        self._pendientes = 0
+        self._latencia_promedio = None  # segundos, media móvil exponencial
+        self._pool = self._crear_pool()
+
+    @property
+    def limite(self):
+        """Trabajos ejecutándose + trabajos en cola."""
+        return self.max_workers + self.max_cola
+
+    @property
+    def pendientes(self):
+        return self._pendientes
+
+    def _crear_pool(self):
+        if self.backend == "process":
+            contexto = multiprocessing.get_context(self.start_method)
+            if self.start_method == "forkserver":
+                # El forkserver importa las librerías una vez; cada worker nace
+                # de un fork suyo y comparte esas páginas (copy-on-write)
+                contexto.set_forkserver_preload(MODULOS_PRECARGA)
+            return ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                mp_context=contexto,
+                initializer=_inicializar_worker
+            )
+        return ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="handler"
+        )
+
+    def _reiniciar_pool(self):
+        print("⚠ Pool de workers roto, creando uno nuevo...")
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        self._pool = self._crear_pool()
+
+    def _registrar_latencia(self, segundos):
+        if self._latencia_promedio is None:
+            self._latencia_promedio = segundos
+        else:
+            self._latencia_promedio = 0.8 * self._latencia_promedio + 0.2 * segundos
+
+    def _retry_after_ms(self):
+        # Tiempo estimado para que se libere un lugar en la cola
+        promedio = self._latencia_promedio or 1.0
+        en_espera = max(1, self._pendientes - self.max_workers + 1)
+        return max(100, int(1000 * promedio * en_espera / self.max_workers))
+
+    async def ejecutar(self, action, params, tiempos=None, fin=None):
+        """
+        Envía una acción al pool y espera su respuesta.
+
+        Args:
+            tiempos: dict opcional donde se dejan 'cola_ms' y 'servicio_ms'.
+            fin: Instante límite de la petición (perf_counter) o None; el
+                tiempo en cola cuenta contra el plazo.
+
+        Raises:
+            ServidorOcupado: Si ya hay `limite` trabajos pendientes.
+        """
+        # Solo se modifica desde el event loop, no necesita lock
+        if self._pendientes >= self.limite:
+            raise ServidorOcupado(self._retry_after_ms())
+
+        self._pendientes += 1
+        inicio = time.perf_counter()
+        pool = self._pool
+        try:
+            trabajo = pool.submit(_ejecutar_en_worker, action, params, fin)
+            futuro = asyncio.wrap_future(trabajo)
+            if fin is not None:
+                await asyncio.wait({futuro}, timeout=max(0.0, fin - time.perf_counter()))
+                # Si venció en cola se retira; si ya está corriendo, el handler
+                # corta por su cuenta y devuelve lo que tenga
+                if not futuro.done() and trabajo.cancel():
+                    contar("plazo.agotado.cola")
+                    return respuesta_plazo_agotado("cola")
+
+            respuesta, eventos, inicio_worker = await futuro
+            # perf_counter es monotónico del sistema: comparable entre procesos
+            cola_ms = max(0.0, inicio_worker - inicio) * 1000
+            registrar_latencia("cola", "executor", cola_ms)
+            REGISTRO.fusionar(eventos)
+
+            if tiempos is not None:
+                tiempos["cola_ms"] = round(cola_ms, 3)
+                tiempos["servicio_ms"] = round((time.perf_counter() - inicio_worker) * 1000, 3)
+            return respuesta
+        except BrokenProcessPool:
+            # Varios trabajos fallan juntos; solo el primero recrea el pool
+            if pool is self._pool:
+                self._reiniciar_pool()
+            raise
+        finally:
+            self._pendientes -= 1
+            self._registrar_latencia(time.perf_counter() - inicio)
+
+    async def calentar(self):
+        """
+        Carga los módulos pesados antes de la primera petición.
+        Con procesos se levantan todos los workers y cada uno reporta sus tiempos.
+
+        Returns:
+            dict: {pid: {módulo: ms}} de cada proceso que cargó módulos.
+        """
+        loop = asyncio.get_running_loop()
+        if self.backend == "thread":
+            # Los hilos comparten sys.modules: basta con importar una vez
+            tiempos = await loop.run_in_executor(self._pool, precargar_modulos)
+            return {os.getpid(): tiempos}
+
+        resultados = await asyncio.gather(*[
+            loop.run_in_executor(self._pool, _calentar_worker)
+            for _ in range(self.max_workers)
+        ])
+        # Un mismo worker puede recibir más de una tarea de calentamiento
+        reporte = dict(resultados)
+        for tiempos in reporte.values():
+            for modulo, ms in tiempos.items():
+                registrar_latencia("arranque", modulo, ms)
+        return reporte
+
+    def cerrar(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,97 @@
+import asyncio
+import time
+import traceback
+
+from src.config import Config
+from src.server.despacho import respuesta_error_interno, respuesta_ocupado, respuesta_plazo_agotado
+from src.server.ejecutores import ServidorOcupado
+
+
+async def _ejecutar_con_reintentos(ejecutor, action, params, fin=None):
+    # El lote comparte la cola con otros clientes: si está llena, esperamos
+    # el tiempo sugerido en vez de devolver "busy" por cada documento, pero
+    # sin plazo no más de LOTE_ESPERA_OCUPADO_MS
+    limite = time.perf_counter() + Config.LOTE_ESPERA_OCUPADO_MS / 1000
+    while True:
+        try:
+            return await ejecutor.ejecutar(action, params, fin=fin)
+        except ServidorOcupado as e:
+            reintento = time.perf_counter() + e.retry_after_ms / 1000
+            if fin is not None and reintento >= fin:
+                return respuesta_plazo_agotado("cola")
+            if fin is None and reintento >= limite:
+                return respuesta_ocupado(e)
+            await asyncio.sleep(e.retry_after_ms / 1000)
+
+
+async def ejecutar_lote(ejecutor, lote, params, enviar, fin=None):
+    """
+    Ejecuta una acción por lote repartiendo los items en el ejecutor.
+
+    Args:
+        ejecutor: EjecutorHandlers donde se ejecuta cada item.
+        lote: Definición del lote (ver LOTES_ROUTES). Si tiene "preparar",
+            esa acción se ejecuta primero con `params` y su respuesta se
+            pasa a "items".
+        params: Campo 'data' del mensaje.
+        enviar: Corrutina que recibe un dict y lo envía al cliente.
+        fin: Instante límite de todo el lote (perf_counter) o None.
+
+    Returns:
+        dict: Resumen con conteo por categoría, tiempo total y throughput.
+    """
+    preparacion = None
+    if "preparar" in lote:
+        # Acción previa en el ejecutor (p. ej. contar las páginas del documento)
+        preparacion = await _ejecutar_con_reintentos(ejecutor, lote["preparar"], params, fin)
+        if not preparacion.get("success"):
+            return preparacion
+
+    items = lote["items"](params, preparacion)
+    if not items:
+        return {"success": False, "error": "El lote no contiene items"}
+
+    inicio = time.perf_counter()
+    conteo = {categoria: 0 for categoria in lote["categorias"]}
+    # No enviamos más trabajos de los que el pool puede ejecutar a la vez
+    limite = asyncio.Semaphore(ejecutor.max_workers)
+
+    async def procesar(indice, item):
+        async with limite:
+            try:
+                resultado = await _ejecutar_con_reintentos(ejecutor, lote["accion"], item, fin)
+            except Exception as e:
+                print(f"❌ Error en item {indice} del lote: {e}")
+                print(traceback.format_exc())
+                resultado = respuesta_error_interno(e)
+
+        categoria = lote["clasificar"](resultado)
+        conteo[categoria] = conteo.get(categoria, 0) + 1
+
+        await enviar({
+            "tipo": "item",
+            "indice": indice,
+            "item": item,
+            "resultado": resultado
+        })
+
+    tareas = [asyncio.create_task(procesar(i, item)) for i, item in enumerate(items)]
+    try:
+        await asyncio.gather(*tareas)
+    except BaseException:
+        # Si el cliente se desconectó no tiene sentido seguir ocupando el pool:
+        # se cancelan los items en cola y los que esperan lugar en el semáforo
+        for tarea in tareas:
+            tarea.cancel()
+        await asyncio.gather(*tareas, return_exceptions=True)
+        raise
+
+    segundos = time.perf_counter() - inicio
+    return {
+        "tipo": "resumen",
+        "success": True,
+        "total": len(items),
+        "metodos": conteo,
+        "tiempo_total_ms": round(segundos * 1000, 1),
+        "items_por_segundo": round(len(items) / segundos, 2) if segundos > 0 else None
+    }
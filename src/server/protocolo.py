@@ -0,0 +1,254 @@
+"""
+Protocolo de mensajes del servidor TCP.
+
+Cada mensaje es un JSON terminado en salto de línea (NDJSON):
+
+    {"id": 7, "action": "validar_cedula", "data": {...}}\\n
+
+El campo 'id' es opcional y se devuelve en la respuesta para que el cliente
+pueda tener varias peticiones en vuelo sobre la misma conexión. Las
+respuestas salen en el orden en que terminan los handlers.
+
+Por compatibilidad, un JSON completo sin salto de línea (clientes antiguos que
+envían un mensaje por escritura) también se acepta.
+
+Frames binarios: si la cabecera JSON trae "payload_bytes": N, los N bytes que
+siguen al salto de línea son el documento o imagen en crudo. El handler los
+recibe en data["contenido"]. Las respuestas con bytes (p. ej. la foto carnet
+procesada) usan el mismo formato.
+"""
+import json
+from src.utils.metricas import REGISTRO
+
+DELIMITADOR = b"\n"
+
+
+class MensajeDemasiadoGrande(Exception):
+    """El cliente envió más bytes de los permitidos sin cerrar el mensaje."""
+
+    def __init__(self, mensaje, id_mensaje=None):
+        super().__init__(mensaje)
+        # 'id' de la cabecera, si se conoce, para que el 413 lo lleve
+        self.id_mensaje = id_mensaje
+
+
+class PayloadInvalido(ValueError):
+    """La cabecera declara un payload_bytes que no es un entero positivo."""
+    pass
+
+
+class DecodificadorMensajes:
+    """
+    Acumula los bytes recibidos y entrega mensajes completos.
+    Resuelve mensajes partidos en varios segmentos TCP y varios mensajes
+    unidos en un mismo segmento. Cada mensaje es una tupla (texto, payload),
+    donde payload son los bytes del frame binario, None, PayloadInvalido si
+    la cabecera declara un tamaño inválido (el servidor responde 400) o
+    MensajeDemasiadoGrande si el frame supera max_payload_bytes o el buffer
+    supera max_bytes sin delimitador (413; en este caso el texto es "").
+    """
+
+    def __init__(self, max_bytes, max_payload_bytes=None):
+        self.max_bytes = max_bytes
+        self.max_payload_bytes = max_payload_bytes
+        self._buffer = bytearray()
+        # Frame binario en curso: cabecera, buffer de destino y bytes ya copiados
+        self._cabecera = None
+        self._payload = None
+        self._recibidos = 0
+        self._descartar = 0
+
+    def alimentar(self, data):
+        """
+        Agrega bytes al buffer y devuelve la lista de mensajes completos.
+        Los errores de tamaño van en la lista, después de los mensajes que
+        llegaron antes, para no perderlos.
+        """
+        self._buffer.extend(data)
+        mensajes = []
+
+        while True:
+            if self._descartar:
+                tomar = min(self._descartar, len(self._buffer))
+                del self._buffer[:tomar]
+                self._descartar -= tomar
+                if self._descartar:
+                    break
+                continue
+
+            if self._payload is not None:
+                if not self._completar_payload():
+                    break
+                mensajes.append((self._cabecera, self._payload))
+                self._cabecera, self._payload = None, None
+                continue
+
+            idx = self._buffer.find(DELIMITADOR)
+            if idx < 0:
+                break
+            linea = bytes(self._buffer[:idx]).strip()
+            del self._buffer[:idx + 1]
+            if not linea:
+                continue
+
+            texto = linea.decode(errors="replace")
+            try:
+                tamano = tamano_payload(texto)
+            except PayloadInvalido as e:
+                # Sin un tamaño válido no hay frame: lo que sigue se lee como mensajes
+                mensajes.append((texto, e))
+                continue
+            if not tamano:
+                mensajes.append((texto, None))
+                continue
+
+            if self.max_payload_bytes is not None and tamano > self.max_payload_bytes:
+                # Saltamos los bytes del frame para no perder la sincronía; los
+                # mensajes anteriores de este segmento se entregan igual
+                self._descartar = tamano
+                mensajes.append((texto, MensajeDemasiadoGrande(
+                    f"Frame binario de {tamano} bytes supera el máximo de {self.max_payload_bytes}",
+                    json.loads(texto).get("id")
+                )))
+                continue
+
+            self._cabecera = texto
+            self._payload = bytearray(tamano)
+            self._recibidos = 0
+
+        if self._payload is None and not self._descartar:
+            mensaje_legacy = self._extraer_mensaje_legacy()
+            if mensaje_legacy is not None:
+                mensajes.append((mensaje_legacy, None))
+
+        if len(self._buffer) > self.max_bytes:
+            self._buffer.clear()
+            mensajes.append(("", MensajeDemasiadoGrande(
+                f"Mensaje supera el máximo de {self.max_bytes} bytes sin delimitador"
+            )))
+
+        return mensajes
+
+    def _completar_payload(self):
+        """Copia al payload lo que haya en el buffer. True si ya está completo."""
+        faltan = len(self._payload) - self._recibidos
+        tomar = min(faltan, len(self._buffer))
+        if tomar:
+            memoryview(self._payload)[self._recibidos:self._recibidos + tomar] = self._buffer[:tomar]
+            del self._buffer[:tomar]
+            self._recibidos += tomar
+        return self._recibidos == len(self._payload)
+
+    def _extraer_mensaje_legacy(self):
+        """
+        Entrega el buffer si ya es un mensaje completo sin salto de línea, o
+        si es un JSON que ya no puede completarse (el servidor responde 400,
+        como con una línea inválida).
+        """
+        resto = bytes(self._buffer).strip()
+        if not resto:
+            self._buffer.clear()
+            return None
+
+        # Solo intentamos parsear cuando puede estar completo, para no
+        # re-escanear en cada segmento un mensaje grande que aún está llegando
+        comandos = (b"PING", b"METRICS")
+        if resto not in comandos and not resto.endswith(b"}"):
+            return None
+
+        texto = resto.decode(errors="replace")
+        if resto not in comandos:
+            try:
+                json.loads(texto)
+            except json.JSONDecodeError as e:
+                if _json_incompleto(e, texto):
+                    return None
+            else:
+                # La cabecera de un frame binario siempre termina en salto de
+                # línea: si aún no llegó, los bytes del frame tampoco
+                try:
+                    if tamano_payload(texto):
+                        return None
+                except PayloadInvalido:
+                    return None
+
+        self._buffer.clear()
+        return texto
+
+
+def _json_incompleto(error, texto):
+    """
+    True si el error de parseo puede deberse a que el mensaje aún no llegó
+    entero: falla al final del texto o dentro de un string sin cerrar (un
+    '}' dentro del string). Cualquier otro error ya no se arregla con más bytes.
+    """
+    return error.pos >= len(texto.rstrip()) or error.msg.startswith("Unterminated string")
+
+
+def tamano_payload(texto):
+    """
+    Bytes binarios que siguen a la cabecera, o 0 si es un mensaje JSON normal.
+
+    Raises:
+        PayloadInvalido: Si payload_bytes no es un entero positivo.
+    """
+    if '"payload_bytes"' not in texto:
+        return 0
+    try:
+        cabecera = json.loads(texto)
+    except json.JSONDecodeError:
+        # El JSON inválido se responde con 400 al despacharlo
+        return 0
+    if not isinstance(cabecera, dict) or "payload_bytes" not in cabecera:
+        return 0
+
+    tamano = cabecera["payload_bytes"]
+    if isinstance(tamano, bool) or not isinstance(tamano, int) or tamano <= 0:
+        raise PayloadInvalido(f"payload_bytes debe ser un entero positivo, no {tamano!r}")
+    return tamano
+
+
+def es_comando_metricas(mensaje):
+    return mensaje == "METRICS" or mensaje.startswith("METRICS ")
+
+
+def codificar_metricas(mensaje, extra=None):
+    """
+    Respuesta al comando METRICS.
+
+    - `METRICS`: JSON en una línea.
+    - `METRICS prometheus`: formato de texto de Prometheus, terminado en `# EOF`.
+    """
+    formato = mensaje[len("METRICS"):].strip().lower()
+    if formato == "prometheus":
+        return (REGISTRO.prometheus() + "# EOF\n").encode('utf-8')
+
+    snapshot = REGISTRO.snapshot()
+    if extra:
+        snapshot["ejecutor"] = extra
+    return codificar_respuesta(snapshot)
+
+
+def codificar_respuesta(respuesta, id_mensaje=None):
+    """
+    Serializa una respuesta como un mensaje del protocolo.
+
+    Args:
+        respuesta: dict con la respuesta del handler.
+        id_mensaje: 'id' de la petición; si viene, se agrega a la respuesta.
+
+    Returns:
+        bytes: JSON terminado en salto de línea (seguido de los bytes de
+            'contenido' si la respuesta los trae).
+    """
+    if id_mensaje is not None and isinstance(respuesta, dict):
+        respuesta = {"id": id_mensaje, **respuesta}
+
+    # Respuesta con bytes: cabecera JSON + frame binario
+    if isinstance(respuesta, dict) and isinstance(respuesta.get("contenido"), (bytes, bytearray)):
+        contenido = respuesta["contenido"]
+        cabecera = {k: v for k, v in respuesta.items() if k != "contenido"}
+        cabecera["payload_bytes"] = len(contenido)
+        return b"".join([json.dumps(cabecera).encode('utf-8'), DELIMITADOR, contenido])
+
+    return json.dumps(respuesta).encode('utf-8') + DELIMITADOR
@@ -0,0 +1,234 @@
+import asyncio
+import json
+import time
+import traceback
+
+from src.config import Config
+from src.routes import LOTES_ROUTES
+from src.server.despacho import (
+    respuesta_json_invalido,
+    respuesta_error_interno,
+    respuesta_mensaje_grande,
+    respuesta_ocupado,
+    respuesta_plazo_invalido
+)
+from src.server.ejecutores import EjecutorHandlers, ServidorOcupado
+from src.server.lotes import ejecutar_lote
+from src.utils.arranque import INICIO, reporte_arranque
+from src.utils.metricas import registrar_latencia
+from src.utils.plazos import fin_desde_deadline_ms
+from src.server.protocolo import (
+    DecodificadorMensajes,
+    MensajeDemasiadoGrande,
+    PayloadInvalido,
+    codificar_respuesta,
+    es_comando_metricas,
+    codificar_metricas
+)
+
+
+class ServidorTCPAsincrono:
+    """
+    Servidor TCP concurrente basado en asyncio.
+    Responsabilidad: Atender muchos clientes a la vez y ejecutar los handlers
+    de MODELOS_ROUTES en un executor para no bloquear el event loop.
+    """
+
+    def __init__(self, host, port, ejecutor=None, calentamiento="background"):
+        if calentamiento not in ("eager", "background", "lazy"):
+            raise ValueError(f"Modo de calentamiento inválido: {calentamiento}")
+
+        self.host = host
+        self.port = port
+        self.ejecutor = ejecutor or EjecutorHandlers()
+        # eager: cargar todo antes de escuchar; background: escuchar ya y cargar
+        # en paralelo; lazy: cada ruta se carga con su primera petición
+        self.calentamiento = calentamiento
+        self._tarea_calentamiento = None
+
+    async def _atender_cliente(self, reader, writer):
+        addr = writer.get_extra_info("peername")
+        print("Conectado por:", addr)
+
+        decodificador = DecodificadorMensajes(Config.MAX_MESSAGE_BYTES, Config.MAX_PAYLOAD_BYTES)
+        lock_escritura = asyncio.Lock()
+        pendientes = set()
+
+        async def enviar(payload):
+            # Un solo escritor a la vez para no intercalar respuestas
+            async with lock_escritura:
+                writer.write(payload)
+                await writer.drain()
+
+        try:
+            while True:
+                data = await reader.read(65536)
+                if not data:
+                    print(f"🔌 Cliente desconectado: {addr}")
+                    break
+
+                for mensaje, payload in decodificador.alimentar(data):
+                    print(f"📥 Mensaje recibido: {repr(mensaje[:200])}")
+
+                    # Frame o mensaje descartado por tamaño: 413 (con el 'id' de
+                    # la cabecera del frame, si lo trae)
+                    if isinstance(payload, MensajeDemasiadoGrande):
+                        await enviar(codificar_respuesta(respuesta_mensaje_grande(payload), payload.id_mensaje))
+                        continue
+
+                    # 💥 RESPONDER AL PING sin pasar por el executor
+                    if mensaje == "PING":
+                        await enviar(b"PONG\n")
+                        continue
+
+                    # 📊 Métricas: mismo camino rápido que el PING
+                    if es_comando_metricas(mensaje):
+                        await enviar(codificar_metricas(mensaje, self._estado_ejecutor()))
+                        continue
+
+                    # Cada petición corre en su propia tarea: las respuestas
+                    # salen apenas termina su handler, aunque sea fuera de orden
+                    tarea = asyncio.create_task(self._responder(mensaje, enviar, payload))
+                    pendientes.add(tarea)
+                    tarea.add_done_callback(pendientes.discard)
+
+            # El cliente cerró su lado de escritura: terminamos lo que está en vuelo
+            if pendientes:
+                await asyncio.gather(*pendientes, return_exceptions=True)
+
+        except ConnectionResetError as e:
+            print(f"🔌 Conexión reseteada por el cliente: {e}")
+
+        except Exception as e:
+            print(f"❌ Error en conexión {addr}: {e}")
+            print(traceback.format_exc())
+
+        finally:
+            for tarea in pendientes:
+                tarea.cancel()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except Exception:
+                pass
+
+    def _estado_ejecutor(self):
+        return {
+            "backend": self.ejecutor.backend,
+            "workers": self.ejecutor.max_workers,
+            "pendientes": self.ejecutor.pendientes,
+            "limite": self.ejecutor.limite,
+        }
+
+    async def _responder(self, mensaje, enviar, payload=None):
+        recibido = time.perf_counter()
+        try:
+            data_obj = json.loads(mensaje)
+        except json.JSONDecodeError as e:
+            await enviar(codificar_respuesta(respuesta_json_invalido(e)))
+            return
+
+        id_mensaje = data_obj.get("id") if isinstance(data_obj, dict) else None
+
+        if isinstance(payload, PayloadInvalido):
+            await enviar(codificar_respuesta(respuesta_json_invalido(payload), id_mensaje))
+            return
+
+        # El plazo corre desde que llegó el mensaje: la espera en cola cuenta
+        fin = None
+        if isinstance(data_obj, dict):
+            try:
+                fin = fin_desde_deadline_ms(data_obj.get("deadline_ms"), recibido)
+            except ValueError as e:
+                await enviar(codificar_respuesta(respuesta_plazo_invalido(e), id_mensaje))
+                return
+
+        if payload is not None and isinstance(data_obj, dict):
+            # Los bytes del frame binario llegan al handler como 'contenido'
+            params = data_obj.get("data")
+            if not isinstance(params, dict):
+                params = {"data": params} if params else {}
+            data_obj["data"] = {**params, "contenido": payload}
+
+        if isinstance(data_obj, dict) and data_obj.get("action") in LOTES_ROUTES:
+            response = await self._procesar_lote(data_obj, id_mensaje, enviar, fin)
+        else:
+            response = await self._procesar_mensaje(data_obj, fin)
+
+        try:
+            await enviar(codificar_respuesta(response, id_mensaje))
+        except ConnectionError as e:
+            print(f"🔌 No se pudo enviar la respuesta {id_mensaje}: {e}")
+
+    async def _procesar_mensaje(self, data_obj, fin=None):
+        try:
+            action = data_obj.get("action")
+            params = data_obj.get('data', {})
+
+            # Con "timing": true se devuelven los tiempos de cola y servicio
+            if not data_obj.get("timing"):
+                return await self.ejecutor.ejecutar(action, params, fin=fin)
+
+            tiempos = {}
+            response = await self.ejecutor.ejecutar(action, params, tiempos=tiempos, fin=fin)
+            if isinstance(response, dict):
+                response = {**response, "server_timing": tiempos}
+            return response
+
+        except ServidorOcupado as e:
+            print(f"⏳ {e}")
+            return respuesta_ocupado(e)
+
+        except Exception as e:
+            print(f"❌ Error en handler: {e}")
+            print(traceback.format_exc())
+            return respuesta_error_interno(e)
+
+    async def _procesar_lote(self, data_obj, id_mensaje, enviar, fin=None):
+        lote = LOTES_ROUTES[data_obj["action"]]
+
+        async def enviar_item(resultado):
+            await enviar(codificar_respuesta(resultado, id_mensaje))
+
+        try:
+            return await ejecutar_lote(self.ejecutor, lote, data_obj.get('data', {}), enviar_item, fin)
+        except Exception as e:
+            print(f"❌ Error en lote: {e}")
+            print(traceback.format_exc())
+            return respuesta_error_interno(e)
+
+    async def _calentar(self):
+        inicio = time.perf_counter()
+        try:
+            reporte = await self.ejecutor.calentar()
+        except Exception as e:
+            print(f"⚠ Falló el calentamiento, las rutas se cargarán bajo demanda: {e}")
+            return
+
+        for pid, tiempos in reporte.items():
+            if tiempos:
+                print(reporte_arranque(tiempos, f"Módulos cargados por {pid}"))
+        print(f"🔥 Calentamiento completo en {(time.perf_counter() - inicio) * 1000:.0f} ms")
+
+    async def iniciar(self):
+        if self.calentamiento == "eager":
+            await self._calentar()
+
+        server = await asyncio.start_server(self._atender_cliente, self.host, self.port)
+        listo_ms = (time.perf_counter() - INICIO) * 1000
+        registrar_latencia("arranque", "servidor_escuchando", listo_ms)
+        print(f"Servidor TCP asíncrono escuchando en {self.host}:{self.port} ({listo_ms:.0f} ms)")
+
+        if self.calentamiento == "background":
+            self._tarea_calentamiento = asyncio.create_task(self._calentar())
+
+        async with server:
+            await server.serve_forever()
+
+    def serve(self):
+        try:
+            asyncio.run(self.iniciar())
+        except KeyboardInterrupt:
+            print("\n🛑 Servidor detenido manualmente con Ctrl+C")
+        finally:
+            self.ejecutor.cerrar()
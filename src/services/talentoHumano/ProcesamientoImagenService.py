@@ -1,8 +1,12 @@
 import cv2
-import mediapipe as mp
 import numpy as np
-from src.utils.talentoHumano.carnets import procesar_foto_carnet
+from src.utils.talentoHumano.carnets import recortar_foto_carnet, recortar_foto_carnet_con_caja
+from src.utils.talentoHumano.detector_caras import POOL_DETECTORES
+from src.utils.metricas import contar
 import os
+import time
+
+EXTENSIONES_IMAGEN = (".jpg", ".jpeg", ".png", ".bmp", ".webp")
 
 class ProcesamientoImagenService:
     """
@@ -15,8 +19,55 @@ class ProcesamientoImagenService:
         self.alto_cm = 3.11
         self.dpi = 300
         self.zoom_cara = 2
+        # Detectores de caras compartidos por hilo, se crean en el primer uso
+        self.detectores = POOL_DETECTORES
     
+    def procesar_foto_carnet_contenido_service(self, contenido, nombre=None):
+        """
+        Procesa una foto recibida en línea (bytes) sin tocar el disco.
+        La imagen resultante se devuelve en 'contenido' (JPEG) para que el
+        servidor la envíe como frame binario.
+        """
+        try:
+            img = cv2.imdecode(np.frombuffer(contenido, dtype=np.uint8), cv2.IMREAD_COLOR)
+            if img is None:
+                return {"success": False, "error": "No se pudo decodificar la imagen recibida"}
+
+            print(f"🖼️ Procesando carnet en memoria ({len(contenido)} bytes)")
+            img_carnet = recortar_foto_carnet(
+                img,
+                ancho_cm = self.ancho_cm,
+                alto_cm = self.alto_cm,
+                dpi = self.dpi,
+                zoom_cara = self.zoom_cara,
+                detectores = self.detectores
+            )
+
+            ok, buffer = cv2.imencode(".jpg", img_carnet, [cv2.IMWRITE_JPEG_QUALITY, 95])
+            if not ok:
+                return {"success": False, "error": "No se pudo codificar la imagen procesada"}
+
+            contar("carnet.exito")
+            return {
+                "success": True,
+                "message": "Imagen procesada correctamente",
+                "formato": "jpg",
+                "original_path": nombre,
+                "contenido": buffer.tobytes()
+            }
+
+        except Exception as e:
+            contar("carnet.fallo")
+            print(f"Error al procesar la foto del carnet: {str(e)}")
+            return {"success": False, "error": str(e)}
+
     def procesar_foto_carnet_service(self, url_img):
+        """
+        Procesa una foto del disco y guarda la foto carnet en la carpeta de uploads.
+        La respuesta trae la cara detectada ('bbox', en píxeles de la foto
+        original) y el tiempo de procesamiento ('tiempo_ms').
+        """
+        inicio = time.perf_counter()
         try:
             # Limpiar comillas si vienen
             if isinstance(url_img, str):
@@ -26,51 +77,97 @@ class ProcesamientoImagenService:
                  print(f"❌ No existe archivo o url vacía: {url_img}")
                  return {"success": False, "error": f"Archivo no encontrado: {url_img}"}
 
-            # Definir carpeta de salida
-            # Subimos 3 niveles desde src/services/talentoHumano para llegar a la raíz del server python
-            # Y luego ajustamos para salir a la carpeta de uploads general del sistema
-            # Asumiendo estructura: /home/analista/server/python-server... y /home/analista/server/uploads
-            
-            # Obtener la raíz del proyecto actual
-            base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
-            # Esto nos lleva a /home/analista/server/python-server-exportacion-fruta
-            
-            # Subir un nivel más para llegar a /home/analista/server
-            server_root = os.path.dirname(base_dir)
-            
-            output_dir = os.path.join(server_root, "uploads", "personal", "fotoCarnetProcessed")
-            
-            if not os.path.exists(output_dir):
-                os.makedirs(output_dir, exist_ok=True)
-
-            filename = os.path.basename(url_img)
-            name, ext = os.path.splitext(filename)
-            output_path = os.path.join(output_dir, f"{name}_processed{ext}")
+            output_path = self._ruta_salida(url_img)
 
             print(f"🖼️ Procesando carnet desde: {url_img}")
             print(f"💾 Guardando en: {output_path}")
-            
-            img_carnet = procesar_foto_carnet(
-                url_img,
-                output_path=output_path,
-                ancho_cm = self.ancho_cm,
-                alto_cm = self.alto_cm,
-                dpi = self.dpi,
-                zoom_cara = self.zoom_cara 
-            )
-            
-            if img_carnet is not None:
+
+            img = cv2.imread(url_img)
+            try:
+                if img is None:
+                    raise ValueError(f"No se pudo leer la imagen: {url_img}")
+                img_carnet, caja = recortar_foto_carnet_con_caja(
+                    img,
+                    ancho_cm = self.ancho_cm,
+                    alto_cm = self.alto_cm,
+                    dpi = self.dpi,
+                    zoom_cara = self.zoom_cara,
+                    detectores = self.detectores
+                )
+            except ValueError as e:
+                contar("carnet.fallo")
+                print(f"Error al procesar la foto carnet: {e}")
                 return {
-                    "success": True, 
-                    "message": "Imagen procesada correctamente",
-                    "path": output_path,
-                    "original_path": url_img
+                    "success": False,
+                    "error": f"No se pudo generar la imagen (falló detección de cara o lectura): {e}",
+                    "original_path": url_img,
+                    "tiempo_ms": round((time.perf_counter() - inicio) * 1000, 1)
                 }
-            else:
-                 return {"success": False, "error": "No se pudo generar la imagen (falló detección de cara o lectura)"}
-        
+
+            cv2.imwrite(output_path, img_carnet, [cv2.IMWRITE_JPEG_QUALITY, 95])
+            contar("carnet.exito")
+            return {
+                "success": True,
+                "message": "Imagen procesada correctamente",
+                "path": output_path,
+                "original_path": url_img,
+                "bbox": caja,
+                "tiempo_ms": round((time.perf_counter() - inicio) * 1000, 1)
+            }
+
         except Exception as e:
             print(f"Error al procesar la foto del carnet: {str(e)}")
             import traceback
             traceback.print_exc()
             return {"success": False, "error": str(e)}
+
+    def listar_imagenes_service(self, urls, directorio=None):
+        """
+        Rutas de las fotos de un lote: las de `urls` seguidas de todas las
+        imágenes de `directorio` (EXTENSIONES_IMAGEN), en orden alfabético.
+        """
+        if isinstance(urls, str):
+            urls = [urls]
+        urls = list(urls or [])
+
+        if directorio:
+            if not os.path.isdir(directorio):
+                print(f"❌ No existe el directorio: {directorio}")
+                return {"success": False, "error": f"Directorio no encontrado: {directorio}"}
+            with os.scandir(directorio) as entradas:
+                urls += sorted(
+                    entrada.path for entrada in entradas
+                    if entrada.is_file() and entrada.name.lower().endswith(EXTENSIONES_IMAGEN)
+                )
+
+        return {"success": True, "data": {"urlImagenes": urls}}
+
+    def estado_detectores(self):
+        """Salud del pool de detectores de caras de este proceso."""
+        return {"success": True, "data": self.detectores.estado()}
+
+    def reiniciar_detectores(self):
+        """Fuerza a recrear los detectores (p. ej. tras errores de MediaPipe)."""
+        return {"success": True, "data": self.detectores.reiniciar()}
+
+    def _ruta_salida(self, url_img):
+        # Definir carpeta de salida
+        # Subimos 3 niveles desde src/services/talentoHumano para llegar a la raíz del server python
+        # Y luego ajustamos para salir a la carpeta de uploads general del sistema
+        # Asumiendo estructura: /home/analista/server/python-server... y /home/analista/server/uploads
+        
+        # Obtener la raíz del proyecto actual
+        base_dir = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        # Esto nos lleva a /home/analista/server/python-server-exportacion-fruta
+        
+        # Subir un nivel más para llegar a /home/analista/server
+        server_root = os.path.dirname(base_dir)
+        
+        output_dir = os.path.join(server_root, "uploads", "personal", "fotoCarnetProcessed")
+        
+        if not os.path.exists(output_dir):
+            os.makedirs(output_dir, exist_ok=True)
+
+        filename = os.path.basename(url_img)
+        name, ext = os.path.splitext(filename)
+        return os.path.join(output_dir, f"{name}_processed{ext}")
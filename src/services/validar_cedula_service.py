@@ -1,24 +1,51 @@
 from src.utils import (
     show_resized, 
-    obtener_imagen_para_barcode, 
-    leer_pdf417_zxing, 
+    imagenes_para_barcode,
+    contar_paginas,
+    leer_codigos_barras,
     extraer_datos_cedula_pdf417, 
-    leer_qr_code, 
     extraer_datos_qr,
-    preprocess_for_ocr,
+    obtener_preprocesador,
     ocr_mrz,
-    get_mrz_candidate_lines,
-    fix_common_mrz_errors,
     obtener_nombre_apellido,
     validar_mrz_tipo_documento,
-    validar_mrz_pais,
-    obtener_numero_identidad,
-    obtener_fecha_nacimiento,
-    obtener_fecha_expiracion,
-    obtener_nacionalidad
+    localizar_banda_mrz,
+    leer_mrz,
+    campos_mrz,
+    cargar_perfil_ocr,
+    hash_documento,
+    desencriptar_documento,
+    CacheResultados
+)
+from src.config import Config
+from src.utils.metricas import contar
+from src.utils.motor_ocr import obtener_motor_ocr
+from src.utils.plazos import (
+    PlazoAgotado, aplicar_cancelacion, aplicar_plazo, plazo_agotado, restante_ms, verificar_plazo
+)
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from functools import partial
+import contextvars
+import hashlib
+import json
+import threading
+import time
+
+# Subir al cambiar la lógica del pipeline: invalida el cache de resultados
+PIPELINE_VERSION = "3"
+
+# Variantes de preprocesamiento (sobre parametros_ocr) con las que se reintenta
+# el OCR del MRZ cuando sus dígitos de control no cuadran
+VARIANTES_MRZ = (
+    {"threshold_kind": "otsu"},
+    {"threshold_kind": "none", "blur_kind": "none"},
+    {"adaptive_block": 31, "adaptive_C": 10},
 )
-import shutil
-import pytesseract
+
+
+def _aciertos(lectura):
+    return sum(lectura["digitos_control"].values()) if lectura else -1
 
 class ValidacionCedulaService:
     """
@@ -27,41 +54,463 @@ class ValidacionCedulaService:
     """
 
     def __init__(self):
-        self.dpi_procesamiento = 300
+        # Niveles de la cascada de resolución; el OCR del MRZ usa el último
+        self.niveles_dpi = list(Config.DPI_CASCADA)
+        self.localizar_codigos = Config.BARCODE_LOCALIZAR
+        # Modo carrera por defecto (cada petición lo puede cambiar con "carrera")
+        self.carrera = Config.VALIDAR_CEDULA_CARRERA
+        self._pool_carrera = None
+        self._lock_carrera = threading.Lock()
+        self.parametros_ocr = {
+            "clahe_clip": 1.2,
+            "clahe_tile": 8,
+            "blur_kind": "gaussian",
+            "blur_ksize": 5,
+            "blur_sigma": 0.5,
+            "threshold_kind": "adaptive",
+            "adaptive_block": 16,
+            "adaptive_C": 3,
+        }
+        if Config.OCR_PERFIL_PATH:
+            # Parámetros elegidos por benchmarks/afinar_ocr.py sobre un corpus etiquetado
+            self.parametros_ocr.update(cargar_perfil_ocr(Config.OCR_PERFIL_PATH))
+            print(f"🔧 Perfil OCR cargado de {Config.OCR_PERFIL_PATH}: {self.parametros_ocr}")
         # Aquí podrías cargar modelos ML, configuraciones, etc.
-     
-    def validar_cedula(self, url_identificacion):
+        self.cache = None
+        if Config.CACHE_ENABLED:
+            self.cache = CacheResultados(
+                Config.CACHE_PATH,
+                version=self._version_pipeline(),
+                max_memoria=Config.CACHE_MEMORY_ITEMS
+            )
+
+    def _version_pipeline(self):
+        """Huella de la versión y parámetros del pipeline, usada como versión del cache."""
+        parametros = {
+            "version": PIPELINE_VERSION,
+            "dpi": self.niveles_dpi,
+            "ocr": self.parametros_ocr,
+            "variantes_mrz": VARIANTES_MRZ,
+        }
+        huella = hashlib.sha256(json.dumps(parametros, sort_keys=True).encode()).hexdigest()
+        return f"{PIPELINE_VERSION}-{huella[:12]}"
+
+    def validar_cedula(self, url_identificacion, contenido=None, encriptado=None, carrera=None):
         """
-        Procesa y valida una cédula desde un PDF.
+        Procesa y valida una cédula desde un PDF, usando el cache de resultados
+        si el mismo documento (mismo contenido desencriptado) ya fue validado.
         
         Args:
-            url_identificacion: Ruta al archivo PDF
+            url_identificacion: Ruta al archivo PDF (o nombre, si viene en línea)
+            contenido: Bytes del documento recibidos en línea (opcional)
+            encriptado: Si el contenido en línea está encriptado (opcional)
+            carrera: Correr los códigos y el MRZ en paralelo (None = VALIDAR_CEDULA_CARRERA)
             
         Returns:
             dict: Datos extraídos y validados de la cédula
         """
+        carrera = self.carrera if carrera is None else bool(carrera)
+        if self.cache is None:
+            return self._procesar_cedula(url_identificacion, contenido, encriptado, carrera)
 
-        print("si corrio validar_cedula...")
-        tesseract_path = shutil.which("tesseract")
-        if not tesseract_path:
-            raise RuntimeError(
-                "❌ Tesseract no está instalado o no está en el PATH.\n"
-                "Instálalo con: sudo apt install tesseract-ocr"
+        try:
+            # Se desencripta una sola vez: el hash y el pipeline usan el mismo texto plano
+            texto_plano = desencriptar_documento(url_identificacion, contenido, encriptado)
+            if texto_plano is not None:
+                contenido, encriptado = texto_plano, False
+            digest = hash_documento(url_identificacion, contenido, encriptado)
+        except Exception as e:
+            # Sin hash no hay cache; el pipeline reporta el error real
+            print(f"⚠ No se pudo calcular el hash del documento: {e}")
+            return self._procesar_cedula(url_identificacion, contenido, encriptado, carrera)
+
+        cacheado = self.cache.obtener(digest)
+        if cacheado is not None:
+            print(f"♻️ Resultado en cache para: {url_identificacion}")
+            return {**cacheado, "etapas": ["cache"], "urlIdentificacion": url_identificacion}
+
+        resultado = self._procesar_cedula(url_identificacion, contenido, encriptado, carrera)
+
+        # Solo cacheamos validaciones exitosas; los fallos pueden ser transitorios
+        if resultado.get("success"):
+            self.cache.guardar(
+                digest,
+                {k: v for k, v in resultado.items() if k not in ("urlIdentificacion", "etapas")}
             )
+        return resultado
+
+    def validar_pagina(self, url_identificacion, pagina):
+        """
+        Valida la cédula de una página de un PDF con varias cédulas escaneadas
+        (una por página). Misma cascada PDF417 → QR → MRZ que validar_cedula,
+        sobre la página completa; solo se rasteriza esa página.
+
+        Sin cache: la clave del cache es el documento completo.
+
+        Returns:
+            dict: Como validar_cedula, con "pagina" y "metodo" (o "fallo").
+        """
+        resultado = self._procesar_cedula(url_identificacion, pagina=pagina)
+        datos = resultado.get("data") or {}
+        return {**resultado, "pagina": pagina, "metodo": datos.get("metodo") or "fallo"}
+
+    def contar_paginas(self, url_identificacion):
+        """Páginas de un documento, para repartirlo en validar_pagina."""
+        return contar_paginas(url_identificacion)
 
-        pytesseract.pytesseract.tesseract_cmd = tesseract_path
-        original = self._obtener_imagen_para_barcode(url_identificacion)
+    def estadisticas_cache(self):
+        if self.cache is None:
+            return {"habilitado": False}
+        return {"habilitado": True, **self.cache.estadisticas()}
+
+    def _procesar_cedula(self, url_identificacion, contenido=None, encriptado=None, carrera=False, pagina=None):
+        """
+        Pipeline completo: PDF417 -> QR (en cascada de DPI) -> OCR del MRZ, o
+        en modo carrera los códigos y el MRZ a la vez (ver _carrera).
+
+        La respuesta incluye las etapas que alcanzaron a correr y, si algún
+        código o el MRZ se leyó incompleto, los datos parciales. Si la
+        petición trae plazo y se acaba, se corta entre etapas (o dentro del
+        OCR) y se responde con status 504 y lo que se tenga hasta ahí.
+        """
+        progreso = {"etapas": [], "parcial": {}}
+        try:
+            resultado = self._ejecutar_estrategias(
+                url_identificacion, contenido, encriptado, progreso, carrera, pagina
+            )
+        except PlazoAgotado as e:
+            print(f"⏱ {e}")
+            contar("validar_cedula.metodo.plazo_agotado")
+            resultado = {
+                "success": False,
+                "status": 504,
+                "message": str(e),
+                "data": None,
+                "urlIdentificacion": url_identificacion
+            }
+
+        resultado["etapas"] = progreso["etapas"]
+        if progreso["parcial"]:
+            resultado["parcial"] = progreso["parcial"]
+        return resultado
+
+    def _ejecutar_estrategias(self, url_identificacion, contenido, encriptado, progreso, carrera=False, pagina=None):
+        print("si corrio validar_cedula...")
+        # El motor se crea una vez por proceso; si no hay Tesseract falla aquí
+        motor = obtener_motor_ocr()
+
+        if carrera and not motor.cancelable:
+            # Con pytesseract el MRZ perdedor no se detiene: seguiría ocupando
+            # un hilo de _pool_carrera y CPU. Se usa la cascada secuencial
+            contar("validar_cedula.carrera.no_cancelable")
+            carrera = False
+
+        if carrera:
+            original, datos_finales, metodo_usado, leer_mrz = self._carrera(
+                url_identificacion, contenido, encriptado, progreso
+            )
+        else:
+            original, datos_finales, metodo_usado = self._cascada_codigos(
+                url_identificacion, contenido, encriptado, progreso, pagina
+            )
+            # En una página suelta sin banda MRZ (p. ej. el frente de la cédula) no se hace OCR
+            leer_mrz = partial(self._leer_mrz, original, progreso, exigir_banda=pagina is not None)
 
         # show_resized("Processed", original)
 
+        # ============================================================
+        # ESTRATEGIA 3: FALLBACK FINAL - OCR del MRZ
+        # ============================================================
+        if not metodo_usado:
+            print("\n" + "="*80)
+            print("ESTRATEGIA 3 (FALLBACK): USANDO OCR DEL MRZ...")
+            print("="*80)
+            
+            try:
+                datos_finales = leer_mrz()
+                metodo_usado = "MRZ-OCR"
+                print("✓ Datos extraídos del MRZ correctamente")
+
+            except PlazoAgotado:
+                raise
+            except Exception as e:
+                import traceback
+                traceback.print_exc()
+                print(f"✗ Error al procesar MRZ: {e}")
+                contar("validar_cedula.metodo.fallo")
+                return {
+                    "success": False,
+                    "message": f"Error interno procesando MRZ: {str(e)}",
+                    "data": None,
+                    "urlIdentificacion": url_identificacion
+                }
+
+    
+        contar(f"validar_cedula.metodo.{metodo_usado or 'fallo'}")
+
+        if original is not None:
+            print("PAth: ", url_identificacion)
+            if metodo_usado:
+                return {
+                    "success": True,
+                    "message": f"Cédula procesada correctamente usando {metodo_usado}",
+                    "data": datos_finales,
+                    "urlIdentificacion": url_identificacion
+                }
+            else:
+                return {
+                    "success": False,
+                    "message": "No se pudo extraer información del documento (PDF417 o QR no detectados)",
+                    "data": None,
+                    "urlIdentificacion": url_identificacion
+                }
+                
+        return {
+            "success": False, 
+            "message": "No se pudo procesar la cédula porque no se obtuvo la imagen",
+            "urlIdentificacion": url_identificacion
+        }
+    
+
+    def _cascada_codigos(self, url_identificacion, contenido, encriptado, progreso, pagina=None):
+        """
+        ESTRATEGIAS 1 y 2: PDF417 y QR, de menor a mayor DPI.
+        Solo se re-renderiza si el nivel anterior no dio datos completos.
+        Con `pagina` se usa esa página completa en vez de la región del barcode.
+
+        Returns:
+            tuple: (imagen del último nivel, datos_finales, metodo_usado)
+        """
+        etapas = progreso["etapas"]
+        original = None
+        datos_finales = {}
+        metodo_usado = None
+
+        imagenes = self._imagenes_para_barcode(url_identificacion, contenido, encriptado, pagina=pagina)
+        with closing(imagenes) as niveles:
+            for dpi, original in niveles:
+                etapas.append(f"pdf_to_images@{dpi}")
+                verificar_plazo("leer_codigos_barras")
+                print(f"Intentando códigos de barras a {dpi} DPI...")
+                datos_finales, metodo_usado = self._leer_codigos(original, progreso["parcial"])
+                etapas.append(f"leer_codigos_barras@{dpi}")
+                contar(f"validar_cedula.dpi.{dpi}.{metodo_usado or 'fallo'}")
+                if metodo_usado:
+                    break
+
+        return original, datos_finales, metodo_usado
+
+    def _carrera(self, url_identificacion, contenido, encriptado, progreso):
+        """
+        Modo carrera: una sola imagen al DPI más alto, y el OCR del MRZ arranca
+        en otro hilo mientras este lee PDF417/QR sobre la misma imagen.
+
+        La prioridad PDF417 > QR > MRZ se mantiene: si los códigos dan datos
+        completos el MRZ se cancela; si no, se usa lo que devuelva el MRZ.
+
+        Returns:
+            tuple: (imagen, datos_finales, metodo_usado, leer_mrz), donde
+            leer_mrz espera el resultado del hilo del MRZ.
+        """
+        dpi = self.niveles_dpi[-1]
+        with closing(self._imagenes_para_barcode(url_identificacion, contenido, encriptado, [dpi])) as niveles:
+            _, original = next(niveles)
+        progreso["etapas"].append(f"pdf_to_images@{dpi}")
+
+        # El hilo hereda el plazo y el recolector de métricas del worker
+        progreso_mrz = {"etapas": [], "parcial": {}}
+        cancelar = threading.Event()
+        contexto = contextvars.copy_context()
+        futuro = self._ejecutor_carrera().submit(
+            contexto.run, self._leer_mrz_cancelable, original, progreso_mrz, cancelar
+        )
+
+        try:
+            datos_finales, metodo_usado = self._cascada_sobre_imagen(original, dpi, progreso)
+        except BaseException:
+            cancelar.set()
+            raise
+
+        if metodo_usado:
+            if not futuro.done():
+                cancelar.set()
+                contar("validar_cedula.carrera.mrz_cancelado")
+            return original, datos_finales, metodo_usado, None
+
+        def leer_mrz():
+            try:
+                return futuro.result()
+            finally:
+                progreso["etapas"].extend(progreso_mrz["etapas"])
+                progreso["parcial"].update(progreso_mrz["parcial"])
+
+        return original, {}, None, leer_mrz
+
+    def _cascada_sobre_imagen(self, original, dpi, progreso):
+        """
+        Los niveles de la cascada sin volver a rasterizar: cada nivel menor
+        es una vista submuestreada (por saltos) de la imagen ya renderizada a `dpi`.
+        """
+        datos_finales, metodo_usado = {}, None
+        for nivel in self.niveles_dpi:
+            paso = max(1, round(dpi / nivel))
+            img = original if paso == 1 else original[::paso, ::paso]
+            verificar_plazo("leer_codigos_barras")
+            print(f"Intentando códigos de barras a {nivel} DPI (en carrera con el MRZ)...")
+            datos_finales, metodo_usado = self._leer_codigos(img, progreso["parcial"])
+            progreso["etapas"].append(f"leer_codigos_barras@{nivel}")
+            contar(f"validar_cedula.dpi.{nivel}.{metodo_usado or 'fallo'}")
+            if metodo_usado:
+                break
+        return datos_finales, metodo_usado
+
+    def _ejecutor_carrera(self):
+        # Un hilo por worker del servidor alcanza: cada petición en carrera usa uno
+        with self._lock_carrera:
+            if self._pool_carrera is None:
+                self._pool_carrera = ThreadPoolExecutor(
+                    max_workers=Config.SERVER_WORKERS,
+                    thread_name_prefix="carrera"
+                )
+        return self._pool_carrera
+
+    def _leer_mrz_cancelable(self, original, progreso, cancelar):
+        with aplicar_cancelacion(cancelar):
+            return self._leer_mrz(original, progreso)
+
+    def _leer_mrz(self, original, progreso, exigir_banda=False):
+        """
+        OCR del MRZ sobre la banda localizada en la imagen del barcode.
+
+        Solo se aceptan los datos si cuadran los dígitos de control; si no,
+        se reintenta con VARIANTES_MRZ mientras dure Config.MRZ_REINTENTOS_MS.
+        Sin banda se lee la imagen completa, salvo con `exigir_banda`.
+
+        Returns:
+            dict: datos_finales del MRZ.
+
+        Raises:
+            ValueError: Si no se encontró el MRZ o sus dígitos de control no cuadran.
+            PlazoAgotado: Si se acabó el plazo (o se canceló la carrera).
+        """
+        etapas = progreso["etapas"]
+        verificar_plazo("localizar_mrz")
+        banda = localizar_banda_mrz(original)
+        etapas.append("localizar_mrz")
+        if banda is None:
+            contar("validar_cedula.mrz.sin_banda")
+            if exigir_banda:
+                progreso["parcial"]["MRZ"] = []
+                raise ValueError("No se encontró la banda MRZ")
+            # Sin banda se lee la imagen completa, como antes
+            region = original
+        else:
+            x0, y0, x1, y1 = banda
+            region = original[y0:y1, x0:x1]
+
+        lectura = self._ocr_mrz(region, self.parametros_ocr)
+        etapas.extend(["preprocess_for_ocr", "ocr_mrz"])
+        if plazo_agotado():
+            # El OCR se cortó: lo que alcanzó a leer va como parcial
+            progreso["parcial"]["MRZ"] = lectura["lineas"] if lectura else []
+            verificar_plazo("ocr_mrz")
+
+        if not (lectura and lectura["valido"]):
+            lectura = self._reintentar_mrz(region, lectura, etapas)
+
+        if lectura is None:
+            progreso["parcial"]["MRZ"] = []
+            raise ValueError("No se encontraron las líneas MRZ")
+
+        if not lectura["valido"]:
+            contar("validar_cedula.mrz.digitos_invalidos")
+            progreso["parcial"]["MRZ"] = lectura["lineas"]
+            progreso["parcial"]["digitos_control"] = lectura["digitos_control"]
+            fallidos = [campo for campo, ok in lectura["digitos_control"].items() if not ok]
+            raise ValueError(f"Dígitos de control del MRZ inválidos: {', '.join(fallidos)}")
+
+        lineas = lectura["lineas"]
+        campos = campos_mrz(lineas, lectura["formato"])
+        apellido, nombre = obtener_nombre_apellido(campos["nombres"])
+
+        return {
+            "metodo": "MRZ-OCR",
+            "tipoDocumento": validar_mrz_tipo_documento(lineas[0]),
+            "pais": campos["pais"],
+            "cedula": campos["numero_documento"],
+            "fecha_nacimiento": campos["fecha_nacimiento"],
+            "sexo": campos["sexo"],
+            "fecha_expiracion": campos["fecha_expiracion"],
+            "nacionalidad": campos["nacionalidad"],
+            "apellidos": apellido,
+            "nombres": nombre,
+        }
+
+    def _ocr_mrz(self, region, parametros):
+        """Preprocesa, reconoce y valida el MRZ de una región con unos parámetros."""
+        verificar_plazo("preprocess_for_ocr")
+        # Sin copia: el resultado se usa solo hasta el OCR
+        processed = obtener_preprocesador(**parametros)(region)
+        # show_resized("Processed", processed)
+        raw_text = ocr_mrz(processed)
+        print(raw_text)
+        return leer_mrz(raw_text)
+
+    def _reintentar_mrz(self, region, mejor, etapas):
+        """
+        Reintenta el OCR con VARIANTES_MRZ hasta que cuadren los dígitos de
+        control o se acabe el presupuesto (o el plazo de la petición, si es
+        menor). Retorna la lectura con más dígitos de control correctos.
+        """
+        fin = time.perf_counter() + Config.MRZ_REINTENTOS_MS / 1000
+        restante = restante_ms()
+        if restante is not None:
+            fin = min(fin, time.perf_counter() + restante / 1000)
+
+        for variante in VARIANTES_MRZ:
+            if time.perf_counter() >= fin:
+                contar("validar_cedula.mrz.presupuesto_agotado")
+                break
+            contar("validar_cedula.mrz.reintento")
+            # El presupuesto se aplica como plazo: corta el OCR del reintento
+            try:
+                with aplicar_plazo(fin):
+                    lectura = self._ocr_mrz(region, {**self.parametros_ocr, **variante})
+                    cortado = plazo_agotado()
+            except PlazoAgotado:
+                lectura, cortado = None, True
+            # El plazo de la petición (o la cancelación) manda sobre el presupuesto
+            verificar_plazo("ocr_mrz")
+            etapas.append("ocr_mrz_reintento")
+            if cortado:
+                contar("validar_cedula.mrz.presupuesto_agotado")
+                break
+
+            if _aciertos(lectura) > _aciertos(mejor):
+                mejor = lectura
+            if mejor and mejor["valido"]:
+                contar("validar_cedula.mrz.reintento_valido")
+                break
+        return mejor
+
+    def _leer_codigos(self, original, parcial=None):
+        """
+        Intenta PDF417 y luego QR sobre una imagen. Ambos salen de una sola
+        pasada de ZXing. Los datos incompletos se dejan en `parcial`.
+
+        Returns:
+            tuple: (datos_finales, metodo_usado); metodo_usado es None si
+            ninguno dio datos completos.
+        """
         datos_finales = {}
         metodo_usado = None
+        codigos = leer_codigos_barras(original, localizar=self.localizar_codigos)
 
         # ============================================================
         # ESTRATEGIA 1: Intentar leer PDF417 (MÁS COMÚN EN CÉDULAS)
         # ============================================================
         print("ESTRATEGIA 1: USANDO PDF417...")
-        pdf417_data = leer_pdf417_zxing(original)
+        pdf417_data = codigos["pdf417"]
         print("si corrio  pdf417_data...")
         if pdf417_data:
 
@@ -83,6 +532,8 @@ class ValidacionCedulaService:
                 metodo_usado = "PDF417"
             else:
                 print("⚠ PDF417 detectado pero datos incompletos")
+                if parcial is not None:
+                    parcial["PDF417"] = info_pdf417
         else:
             print("✗ No se detectó código PDF417")
 
@@ -91,7 +542,7 @@ class ValidacionCedulaService:
         # ============================================================
 
         if not metodo_usado:
-            qr_data = leer_qr_code(original)
+            qr_data = codigos["qr"]
 
             if qr_data:
                 print("✓ QR Code detectado")
@@ -111,96 +562,26 @@ class ValidacionCedulaService:
                     metodo_usado = "QR"
                 else:
                     print("⚠ QR detectado pero datos incompletos")
+                    if parcial is not None:
+                        parcial["QR"] = info_qr
             else:
                 print("✗ No se detectó código QR")
-        # ============================================================
-        # ESTRATEGIA 3: FALLBACK FINAL - OCR del MRZ
-        # ============================================================
-        if not metodo_usado:
-            print("\n" + "="*80)
-            print("ESTRATEGIA 3 (FALLBACK): USANDO OCR DEL MRZ...")
-            print("="*80)
-            
-            try:
-                processed = preprocess_for_ocr(
-                    original,
-                    clahe_clip=1.2,
-                    clahe_tile=8,
-                    blur_kind="gaussian",
-                    blur_ksize=5,
-                    blur_sigma=0.5,
-                    threshold_kind="adaptive",
-                    adaptive_block=16,
-                    adaptive_C=3,
-                )
-                # show_resized("Processed", processed)
-                # processed = crop_mrz_last_quarter(processed)
-                raw_text = ocr_mrz(processed)
-                print(raw_text)
-                mrz_lines = get_mrz_candidate_lines(raw_text)
-
-                if len(mrz_lines) < 3:
-                    raise ValueError("No se encontraron 3 líneas MRZ")
-
-                mrz_lines[0] = fix_common_mrz_errors(mrz_lines[0])
-                mrz_lines[1] = fix_common_mrz_errors(mrz_lines[1])
-                mrz_lines[2] = fix_common_mrz_errors(mrz_lines[2])
-
-                apellido, nombre = obtener_nombre_apellido(mrz_lines[2])
-                
-                datos_finales = {
-                    "metodo": "MRZ-OCR",
-                    "tipoDocumento": validar_mrz_tipo_documento(mrz_lines[0]),
-                    "pais": validar_mrz_pais(mrz_lines[0]),
-                    "cedula": obtener_numero_identidad(mrz_lines[0]),
-                    "fecha_nacimiento": obtener_fecha_nacimiento(mrz_lines[1]),
-                    "sexo": mrz_lines[1][7],
-                    "fecha_expiracion": obtener_fecha_expiracion(mrz_lines[1]),
-                    "nacionalidad": obtener_nacionalidad(mrz_lines[1]),
-                    "apellidos": apellido,
-                    "nombres": nombre,
-                }
-                metodo_usado = "MRZ-OCR"
-                print("✓ Datos extraídos del MRZ correctamente")
-                
-            except Exception as e:
-                import traceback
-                traceback.print_exc()
-                print(f"✗ Error al procesar MRZ: {e}")
-                return {
-                    "success": False,
-                    "message": f"Error interno procesando MRZ: {str(e)}",
-                    "data": None,
-                    "urlIdentificacion": url_identificacion
-                }
 
-    
-        if original is not None:
-            print("PAth: ", url_identificacion)
-            if metodo_usado:
-                return {
-                    "success": True,
-                    "message": f"Cédula procesada correctamente usando {metodo_usado}",
-                    "data": datos_finales,
-                    "urlIdentificacion": url_identificacion
-                }
-            else:
-                return {
-                    "success": False,
-                    "message": "No se pudo extraer información del documento (PDF417 o QR no detectados)",
-                    "data": None,
-                    "urlIdentificacion": url_identificacion
-                }
-                
-        return {
-            "success": False, 
-            "message": "No se pudo procesar la cédula porque no se obtuvo la imagen",
-            "urlIdentificacion": url_identificacion
-        }
-    
+        return datos_finales, metodo_usado
 
-    def _obtener_imagen_para_barcode(self, pdf_path):
-        """Obtiene la imagen para el barcode"""
-        return obtener_imagen_para_barcode(pdf_path, dpi=self.dpi_procesamiento)
+    def _imagenes_para_barcode(self, pdf_path, contenido=None, encriptado=None, niveles_dpi=None, pagina=None):
+        """
+        Genera (dpi, imagen) para el barcode por cada nivel de la cascada (o
+        de `niveles_dpi`), en escala de grises: ZXing y el preprocesamiento
+        del OCR la usan tal cual, sin conversiones de color.
+        """
+        return imagenes_para_barcode(
+            pdf_path,
+            niveles_dpi or self.niveles_dpi,
+            contenido=contenido,
+            encriptado=encriptado,
+            color="gris",
+            pagina=pagina
+        )
     
     
\ No newline at end of file
@@ -1,43 +1,57 @@
 """
 Módulo de utilidades para procesamiento de documentos.
+
+Las funciones se importan bajo demanda (PEP 562): `src.utils.metricas` o
+`src.utils.cache_resultados` no deben cargar PyMuPDF, OpenCV ni Tesseract.
 """
-from .document_processing import (
-    pdf_to_images, 
-    obtener_imagen_para_barcode, 
-    leer_pdf417_zxing, 
-    extraer_datos_cedula_pdf417,
-    preprocess_for_ocr,
-    ocr_mrz,
-    get_mrz_candidate_lines,
-    fix_common_mrz_errors,
-    obtener_nombre_apellido,
-    validar_mrz_tipo_documento,
-    validar_mrz_pais,
-    obtener_numero_identidad,
-    obtener_fecha_nacimiento,
-    obtener_fecha_expiracion,
-    obtener_nacionalidad
-)
-from .documento_view import show_resized
-from .procesar_qr import leer_qr_code, extraer_datos_qr
+import importlib
+
+_EXPORTS = {
+    'pdf_to_images': '.document_processing',
+    'show_resized': '.documento_view',
+    'obtener_imagen_para_barcode': '.document_processing',
+    'imagenes_para_barcode': '.document_processing',
+    'contar_paginas': '.document_processing',
+    'hash_documento': '.document_processing',
+    'desencriptar_documento': '.document_processing',
+    'leer_pdf417_zxing': '.document_processing',
+    'extraer_datos_cedula_pdf417': '.document_processing',
+    'leer_qr_code': '.procesar_qr',
+    'leer_codigos_barras': '.codigos_barras',
+    'localizar_regiones_codigo': '.codigos_barras',
+    'localizar_banda_mrz': '.mrz',
+    'leer_mrz': '.mrz',
+    'campos_mrz': '.mrz',
+    'digito_control': '.mrz',
+    'validar_digitos_control': '.mrz',
+    'cargar_perfil_ocr': '.perfil_ocr',
+    'extraer_datos_qr': '.procesar_qr',
+    'preprocess_for_ocr': '.document_processing',
+    'obtener_preprocesador': '.preprocesamiento_ocr',
+    'PreprocesadorOCR': '.preprocesamiento_ocr',
+    'ocr_mrz': '.document_processing',
+    'get_mrz_candidate_lines': '.document_processing',
+    'fix_common_mrz_errors': '.document_processing',
+    'obtener_nombre_apellido': '.document_processing',
+    'validar_mrz_tipo_documento': '.document_processing',
+    'validar_mrz_pais': '.document_processing',
+    'obtener_numero_identidad': '.document_processing',
+    'obtener_fecha_nacimiento': '.document_processing',
+    'obtener_fecha_expiracion': '.document_processing',
+    'obtener_nacionalidad': '.document_processing',
+    'CacheResultados': '.cache_resultados',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    if name not in _EXPORTS:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    valor = getattr(importlib.import_module(_EXPORTS[name], __name__), name)
+    globals()[name] = valor
+    return valor
+
 
-__all__ = [
-    'pdf_to_images', 
-    'show_resized',
-    'obtener_imagen_para_barcode', 
-    'leer_pdf417_zxing', 
-    'extraer_datos_cedula_pdf417', 
-    'leer_qr_code', 
-    'extraer_datos_qr',
-    'preprocess_for_ocr',
-    'ocr_mrz',
-    'get_mrz_candidate_lines',
-    'fix_common_mrz_errors',
-    'obtener_nombre_apellido',
-    'validar_mrz_tipo_documento',
-    'validar_mrz_pais',
-    'obtener_numero_identidad',
-    'obtener_fecha_nacimiento',
-    'obtener_fecha_expiracion',
-    'obtener_nacionalidad'
-]
\ No newline at end of file
+def __dir__():
+    return sorted(list(globals()) + __all__)
@@ -0,0 +1,50 @@
+"""
+Tiempos de importación por módulo, para el reporte de arranque.
+
+Cada módulo se mide por separado en el orden dado, así el tiempo de un
+controller no incluye el de las librerías que ya se cargaron antes.
+"""
+import importlib
+import sys
+import time
+
+from src.utils.metricas import registrar_latencia
+
+# Instante de referencia para "listo para atender" (primer import del servidor)
+INICIO = time.perf_counter()
+
+# Librerías pesadas que usan los handlers, de la más usada a la menos usada
+DEPENDENCIAS_PESADAS = [
+    "numpy",
+    "cv2",
+    "fitz",
+    "zxingcpp",
+    "src.utils.motor_ocr",
+    "Crypto.Cipher.AES",
+    "mediapipe",
+]
+
+TIEMPOS_IMPORTACION = {}
+
+
+def importar_medido(modulo):
+    """Importa `modulo` y registra cuánto tardó si no estaba cargado."""
+    if modulo in sys.modules:
+        return sys.modules[modulo]
+
+    inicio = time.perf_counter()
+    cargado = importlib.import_module(modulo)
+    ms = (time.perf_counter() - inicio) * 1000
+    TIEMPOS_IMPORTACION[modulo] = round(ms, 1)
+    registrar_latencia("arranque", modulo, ms)
+    return cargado
+
+
+def reporte_arranque(tiempos=None, titulo="Tiempos de importación"):
+    """Tabla de texto con los módulos ordenados del más lento al más rápido."""
+    tiempos = TIEMPOS_IMPORTACION if tiempos is None else tiempos
+    lineas = [f"⏱ {titulo}:"]
+    for modulo, ms in sorted(tiempos.items(), key=lambda x: -x[1]):
+        lineas.append(f"   {ms:>9.1f} ms  {modulo}")
+    lineas.append(f"   {sum(tiempos.values()):>9.1f} ms  total")
+    return "\n".join(lineas)
@@ -0,0 +1,100 @@
+import json
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from src.utils.metricas import contar
+
+
+class CacheResultados:
+    """
+    Cache de resultados en dos niveles:
+    - LRU en memoria para las entradas más usadas.
+    - SQLite en disco, persistente entre reinicios y compartido entre procesos.
+
+    Las claves incluyen la versión del pipeline: al cambiar la versión o los
+    parámetros, las entradas viejas dejan de encontrarse y se borran al abrir.
+    """
+
+    def __init__(self, ruta_db, version, max_memoria=256):
+        self.ruta_db = ruta_db
+        self.version = version
+        self.max_memoria = max_memoria
+
+        self._memoria = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits_memoria = 0
+        self.hits_disco = 0
+        self.misses = 0
+
+        directorio = os.path.dirname(os.path.abspath(ruta_db))
+        os.makedirs(directorio, exist_ok=True)
+
+        self._db = sqlite3.connect(ruta_db, timeout=10, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS resultados ("
+            " clave TEXT PRIMARY KEY,"
+            " version TEXT NOT NULL,"
+            " valor TEXT NOT NULL)"
+        )
+        # Invalidar entradas de otras versiones del pipeline
+        self._db.execute("DELETE FROM resultados WHERE version != ?", (version,))
+        self._db.commit()
+
+    def obtener(self, digest):
+        """Busca un resultado por hash del documento. Retorna None si no existe."""
+        with self._lock:
+            valor = self._memoria.get(digest)
+            if valor is not None:
+                self._memoria.move_to_end(digest)
+                self.hits_memoria += 1
+                contar("cache.hit_memoria")
+                return json.loads(valor)
+
+            fila = self._db.execute(
+                "SELECT valor FROM resultados WHERE clave = ? AND version = ?",
+                (digest, self.version)
+            ).fetchone()
+
+            if fila is None:
+                self.misses += 1
+                contar("cache.miss")
+                return None
+
+            self.hits_disco += 1
+            contar("cache.hit_disco")
+            self._guardar_en_memoria(digest, fila[0])
+            return json.loads(fila[0])
+
+    def guardar(self, digest, resultado):
+        """Guarda un resultado (dict serializable a JSON) en ambos niveles."""
+        valor = json.dumps(resultado)
+        with self._lock:
+            self._guardar_en_memoria(digest, valor)
+            self._db.execute(
+                "INSERT OR REPLACE INTO resultados (clave, version, valor) VALUES (?, ?, ?)",
+                (digest, self.version, valor)
+            )
+            self._db.commit()
+
+    def _guardar_en_memoria(self, digest, valor):
+        # Guardamos el JSON serializado para que nadie modifique la entrada cacheada
+        self._memoria[digest] = valor
+        self._memoria.move_to_end(digest)
+        while len(self._memoria) > self.max_memoria:
+            self._memoria.popitem(last=False)
+
+    def estadisticas(self):
+        with self._lock:
+            consultas = self.hits_memoria + self.hits_disco + self.misses
+            return {
+                "pid": os.getpid(),
+                "version": self.version,
+                "hits_memoria": self.hits_memoria,
+                "hits_disco": self.hits_disco,
+                "misses": self.misses,
+                "hit_ratio": round((self.hits_memoria + self.hits_disco) / consultas, 3) if consultas else 0.0,
+                "entradas_memoria": len(self._memoria),
+            }
@@ -0,0 +1,120 @@
+"""
+Lectura de los códigos de barras de la cédula (PDF417 y QR) con ZXing.
+
+Una sola pasada de ZXing restringida a los dos formatos devuelve ambos
+resultados. Opcionalmente se localizan antes las regiones con códigos
+(densidad de gradiente + morfología, sobre una versión reducida de la
+imagen) y ZXing solo recorre esos recortes. Si en ellos no aparece un
+PDF417 se decodifica también la imagen completa: un QR dentro de las
+regiones no puede ganarle a un PDF417 que quedó fuera de ellas.
+"""
+import cv2
+import numpy as np
+import zxingcpp
+
+from src.utils.metricas import contar, medir_etapa
+
+FORMATOS_CEDULA = zxingcpp.BarcodeFormat.PDF417 | zxingcpp.BarcodeFormat.QRCode
+
+# Lado mayor (px) de la imagen reducida sobre la que se buscan las regiones
+LADO_LOCALIZACION = 400
+# Regiones más pequeñas que esta fracción de la imagen se descartan (texto, ruido)
+AREA_MINIMA_REGION = 0.01
+# Margen alrededor de cada región, relativo a su lado mayor
+MARGEN_REGION = 0.05
+
+
+def _como_uint8(img):
+    # ZXing lee 3 canales como RGB: con BGR solo cambian los pesos de la
+    # luminancia, lo que no afecta a códigos en blanco y negro, así que no se convierte
+    if not isinstance(img, np.ndarray):
+        img = np.array(img)
+    if img.dtype != np.uint8:
+        img = img.astype(np.uint8)
+    return img
+
+
+def decodificar(img, formatos=FORMATOS_CEDULA):
+    """Textos por formato ('PDF417', 'QRCode', ...) de los códigos encontrados en `img`."""
+    textos = {}
+    for r in zxingcpp.read_barcodes(_como_uint8(img), formats=formatos):
+        if r.text:
+            textos.setdefault(r.format.name, r.text)
+    return textos
+
+
+@medir_etapa("localizar_codigos")
+def localizar_regiones_codigo(img):
+    """
+    Regiones candidatas a contener un código de barras, de mayor a menor área.
+
+    Returns:
+        list[tuple]: (x0, y0, x1, y1) en coordenadas de `img`.
+    """
+    img = _como_uint8(img)
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    alto, ancho = img.shape
+
+    # Submuestreo por saltos: es una vista, mucho más barato que un resize
+    paso = max(1, max(alto, ancho) // LADO_LOCALIZACION)
+    reducida = np.ascontiguousarray(img[::paso, ::paso])
+
+    gx = cv2.convertScaleAbs(cv2.Sobel(reducida, cv2.CV_16S, 1, 0, ksize=3))
+    gy = cv2.convertScaleAbs(cv2.Sobel(reducida, cv2.CV_16S, 0, 1, ksize=3))
+    densidad = cv2.blur(cv2.addWeighted(gx, 0.5, gy, 0.5, 0), (5, 5))
+    _, mascara = cv2.threshold(densidad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+
+    # Cerrar une las barras/módulos en un bloque; abrir borra líneas de texto sueltas
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (9, 9))
+    mascara = cv2.morphologyEx(mascara, cv2.MORPH_CLOSE, kernel)
+    mascara = cv2.morphologyEx(mascara, cv2.MORPH_OPEN, kernel)
+
+    contornos, _ = cv2.findContours(mascara, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    area_minima = AREA_MINIMA_REGION * reducida.size
+    regiones = []
+    for contorno in contornos:
+        x, y, w, h = cv2.boundingRect(contorno)
+        if w * h < area_minima:
+            continue
+        margen = int(MARGEN_REGION * max(w, h)) + 2
+        regiones.append((
+            max(0, (x - margen) * paso),
+            max(0, (y - margen) * paso),
+            min(ancho, (x + w + margen) * paso),
+            min(alto, (y + h + margen) * paso),
+        ))
+
+    return sorted(regiones, key=lambda r: (r[2] - r[0]) * (r[3] - r[1]), reverse=True)
+
+
+@medir_etapa("leer_codigos_barras")
+def leer_codigos_barras(img, localizar=False):
+    """
+    Lee PDF417 y QR en una sola pasada de ZXing.
+
+    Args:
+        img: Imagen en escala de grises o BGR.
+        localizar: Si True, decodifica primero las regiones candidatas y
+            recurre a la imagen completa cuando en ellas no hay un PDF417.
+
+    Returns:
+        dict: {"pdf417": texto o None, "qr": texto o None}
+    """
+    img = _como_uint8(img)
+    textos = {}
+
+    if localizar:
+        for x0, y0, x1, y1 in localizar_regiones_codigo(img):
+            for formato, texto in decodificar(img[y0:y1, x0:x1]).items():
+                textos.setdefault(formato, texto)
+            if len(textos) == 2:
+                break
+        contar(f"codigos_barras.roi.{'acierto' if 'PDF417' in textos else 'respaldo'}")
+
+    # PDF417 > QR: sin PDF417 en las regiones puede haber uno fuera de ellas
+    if "PDF417" not in textos:
+        textos = {**textos, **decodificar(img)}
+
+    print("ZXing encontró:", ", ".join(f"{f} (len {len(t)})" for f, t in textos.items()) or "nada")
+    return {"pdf417": textos.get("PDF417"), "qr": textos.get("QRCode")}
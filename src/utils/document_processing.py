@@ -5,26 +5,45 @@ import numpy as np
 import cv2
 import zxingcpp
 import re
-import pytesseract
 from Crypto.Cipher import AES
 import os
-import tempfile
+import mmap
+import hashlib
+from contextlib import contextmanager
+from functools import lru_cache
 from src.config import Config
+from src.utils.metricas import medir_etapa
+from src.utils.codigos_barras import decodificar
+from src.utils.motor_ocr import obtener_motor_ocr
+from src.utils.plazos import plazo_agotado, restante_ms, verificar_plazo
+from src.utils.preprocesamiento_ocr import obtener_preprocesador
 
 IV_LENGTH = 16
+# Tamaño de cada bloque al desencriptar (múltiplo de 16 bytes)
+TAMANO_BLOQUE_DESENCRIPTADO = 1024 * 1024
 
-def pdf_to_images(pdf_path, dpi, page_numbers=None, max_pages=None):
+# Mitad inferior de la página (x0, y0, x1, y1 relativos), donde va el PDF417
+CLIP_MITAD_INFERIOR = (0.0, 0.5, 1.0, 1.0)
 
-    pdf_path = Path(pdf_path).resolve()
-
-    if not pdf_path.exists():
-        raise FileNotFoundError(f"No existe el archivo PDF: {pdf_path}")
-
-    if pdf_path.suffix.lower() != ".pdf":
-        raise ValueError(f"El archivo no es un PDF válido: {pdf_path}")
+@medir_etapa("pdf_to_images")
+def pdf_to_images(pdf_path, dpi, page_numbers=None, max_pages=None, stream=None,
+                  pagina=None, clip=None, color="bgr"):
+    """
+    Rasteriza páginas del PDF a imágenes.
+    Si se pasa `stream` (bytes o memoryview del PDF) se abre desde memoria y
+    `pdf_path` se ignora. Los archivos se abren mapeados en memoria.
+
+    Args:
+        pagina: Índice de una sola página a renderizar (ignora page_numbers y max_pages).
+        clip: Rectángulo (x0, y0, x1, y1) en fracciones de la página; solo se
+            rasteriza esa región.
+        color: 'bgr' (por defecto, para OpenCV), 'rgb' (lo que espera ZXing,
+            sin conversión) o 'gris' (un canal, renderizado directo por MuPDF).
+    """
+    if pagina is not None:
+        page_numbers = [pagina]
 
-    images: List[np.ndarray] = []
-    with fitz.open(pdf_path) as doc:
+    with abrir_pdf(pdf_path, stream) as doc:
         total_pages = doc.page_count
         
         if page_numbers is not None:
@@ -35,29 +54,64 @@ def pdf_to_images(pdf_path, dpi, page_numbers=None, max_pages=None):
                 limit = min(total_pages, max_pages)
             pages = range(limit)
 
+        images: List[np.ndarray] = []
         for page_index in pages:
             if page_index < 0 or page_index >= total_pages:
-                continue # Skip invalid pages instead of crashing, or crash if strictly required. Keeping original intent but safer? No, original raised.
-                # raise IndexError(f"Página fuera de rango: {page_index}") 
-                # Original raised, let's keep raising if explicitly requested, but for range it won't happen.
+                # Las páginas fuera de rango se omiten (no se lanza IndexError)
+                continue
 
-            page = doc.load_page(page_index)
-            pix = page.get_pixmap(dpi=dpi)
+            images.append(renderizar_pagina(doc.load_page(page_index), dpi, clip=clip, color=color))
 
-            img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+    return images
 
-            if pix.n == 4:
-                img = cv2.cvtColor(img, cv2.COLOR_RGBA2BGR)
-            elif pix.n == 3:
-                img = cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
-            elif pix.n == 1:
-                img = cv2.cvtColor(img, cv2.COLOR_GRAY2BGR)
-            else:
-                img = img[:, :, :3]
+@contextmanager
+def abrir_pdf(pdf_path=None, stream=None):
+    """Abre el PDF desde `stream` o desde el archivo mapeado en memoria."""
+    if stream is not None:
+        with fitz.open(stream=stream, filetype="pdf") as doc:
+            yield doc
+        return
 
-            images.append(img)
+    pdf_path = Path(pdf_path).resolve()
 
-    return images
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"No existe el archivo PDF: {pdf_path}")
+
+    if pdf_path.suffix.lower() != ".pdf":
+        raise ValueError(f"El archivo no es un PDF válido: {pdf_path}")
+
+    # El documento se cierra antes de soltar el mapeo
+    with mapear_archivo(pdf_path) as datos, fitz.open(stream=datos, filetype="pdf") as doc:
+        yield doc
+
+def renderizar_pagina(page, dpi, clip=None, color="bgr"):
+    """
+    Rasteriza una página (o la región `clip`) en el formato pedido.
+    'rgb' y 'gris' devuelven el buffer de MuPDF sin conversiones (solo lectura).
+    """
+    if color not in ("bgr", "rgb", "gris"):
+        raise ValueError(f"Color inválido: {color}")
+
+    rect = None
+    if clip is not None:
+        r = page.rect
+        x0, y0, x1, y1 = clip
+        rect = fitz.Rect(
+            r.x0 + x0 * r.width, r.y0 + y0 * r.height,
+            r.x0 + x1 * r.width, r.y0 + y1 * r.height
+        )
+
+    colorspace = fitz.csGRAY if color == "gris" else fitz.csRGB
+    pix = page.get_pixmap(dpi=dpi, clip=rect, colorspace=colorspace, alpha=False)
+
+    img = np.frombuffer(pix.samples, dtype=np.uint8).reshape(pix.height, pix.stride)
+    img = img[:, :pix.width * pix.n].reshape(pix.height, pix.width, pix.n)
+
+    if color == "gris":
+        return img[:, :, 0]
+    if color == "bgr":
+        return cv2.cvtColor(img, cv2.COLOR_RGB2BGR)
+    return img
 
 def crop_mrz_last_quarter(img, ratio=0.65):
     """
@@ -69,98 +123,291 @@ def crop_mrz_last_quarter(img, ratio=0.65):
     y0 = int(h * ratio)
     return img[y0:h, 0:w]
 
-def decrypt_file(encrypted_file_path):
+@contextmanager
+def mapear_archivo(ruta):
     """
-    Desencripta un archivo y retorna los bytes desencriptados
+    Mapea el archivo en memoria y entrega un memoryview de solo lectura.
+    El memoryview (y lo que se abra sobre él) no debe usarse fuera del `with`.
+    """
+    with open(ruta, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap no acepta archivos vacíos
+            yield memoryview(b"")
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            datos = memoryview(mapa)
+            try:
+                yield datos
+            finally:
+                datos.release()
+
+@medir_etapa("decrypt_file")
+def decrypt_file(encrypted_file_path, destino=None):
+    """
+    Desencripta un archivo y retorna el texto plano (memoryview, ver decrypt_bytes).
+
+    El archivo se mapea en memoria y se desencripta por bloques; las páginas
+    ya leídas se devuelven al sistema, así el pico de memoria es el tamaño
+    del texto plano (o un bloque, si se pasa `destino`).
     """
     with open(encrypted_file_path, 'rb') as f:
-        encrypted_data = f.read()
-    
+        if os.fstat(f.fileno()).st_size == 0:
+            return desencriptar_en_bloques(b"", destino)
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapa:
+            def liberar(inicio, fin):
+                # madvise exige un inicio alineado a página
+                inicio -= inicio % mmap.PAGESIZE
+                if fin > inicio:
+                    mapa.madvise(mmap.MADV_DONTNEED, inicio, fin - inicio)
+
+            datos = memoryview(mapa)
+            try:
+                return desencriptar_en_bloques(datos, destino, al_avanzar=liberar)
+            finally:
+                datos.release()
+
+@medir_etapa("decrypt_bytes")
+def decrypt_bytes(encrypted_data, destino=None):
+    """
+    Desencripta bytes (IV + contenido AES-CBC) ya cargados en memoria.
+
+    El IV y el contenido se toman como vistas (sin copiar) y el texto plano se
+    escribe en un solo buffer. Retorna un memoryview sin el padding, que
+    PyMuPDF (fitz.open(stream=...)) y hashlib aceptan sin copiarlo.
+
+    Raises:
+        ValueError: Si el tamaño o el padding PKCS7 no son válidos (clave
+            incorrecta o archivo dañado).
+    """
+    return desencriptar_en_bloques(encrypted_data, destino)
+
+def desencriptar_en_bloques(encrypted_data, destino=None, tamano_bloque=TAMANO_BLOQUE_DESENCRIPTADO,
+                            al_avanzar=None):
+    """
+    Desencripta AES-CBC (IV + contenido) de a `tamano_bloque` bytes.
+
+    Args:
+        encrypted_data: bytes, bytearray o memoryview (p. ej. sobre un mmap).
+        destino: None para desencriptar en un buffer preasignado del tamaño
+            final, o una función que recibe cada bloque de texto plano
+            (memoryview válido solo durante la llamada), p. ej. `sha.update`.
+            El padding se verifica al final: si es inválido, `destino` ya
+            recibió los bloques anteriores.
+        al_avanzar: función opcional (inicio, fin) con el rango de
+            `encrypted_data` ya consumido.
+
+    Returns:
+        memoryview con el texto plano sin padding, o su longitud si hay `destino`.
+
+    Raises:
+        ValueError: Si el tamaño o el padding PKCS7 no son válidos.
+    """
+    if tamano_bloque % AES.block_size:
+        raise ValueError("El tamaño de bloque debe ser múltiplo de 16")
+
+    datos = memoryview(encrypted_data)
+    if len(datos) < IV_LENGTH + AES.block_size or (len(datos) - IV_LENGTH) % AES.block_size:
+        raise ValueError(f"Tamaño de archivo encriptado inválido: {len(datos)} bytes")
+
     # Extrae IV (primeros 16 bytes)
-    iv = encrypted_data[:IV_LENGTH]
-    encrypted_content = encrypted_data[IV_LENGTH:]
-    
-    # Desencripta
-    cipher = AES.new(Config.ENCRYPTION_KEY, AES.MODE_CBC, iv)
-    decrypted = cipher.decrypt(encrypted_content)
-    
+    cipher = AES.new(Config.ENCRYPTION_KEY, AES.MODE_CBC, datos[:IV_LENGTH])
+    encrypted_content = datos[IV_LENGTH:]
+    total = len(encrypted_content)
+
+    if destino is None:
+        salida = memoryview(bytearray(total))
+    else:
+        bloque = memoryview(bytearray(min(tamano_bloque, total)))
+        escritos = 0
+
+    for inicio in range(0, total, tamano_bloque):
+        fin = min(inicio + tamano_bloque, total)
+        if destino is None:
+            cipher.decrypt(encrypted_content[inicio:fin], output=salida[inicio:fin])
+        else:
+            parte = bloque[:fin - inicio]
+            cipher.decrypt(encrypted_content[inicio:fin], output=parte)
+            if fin == total:
+                # Remueve padding PKCS7 del último bloque
+                parte = parte[:validar_padding_pkcs7(parte)]
+            destino(parte)
+            escritos += len(parte)
+        if al_avanzar is not None:
+            al_avanzar(IV_LENGTH + inicio, IV_LENGTH + fin)
+
+    if destino is not None:
+        return escritos
+
     # Remueve padding PKCS7
+    return salida[:validar_padding_pkcs7(salida)]
+
+def validar_padding_pkcs7(decrypted):
+    """
+    Verifica el padding PKCS7 y retorna la longitud del texto plano.
+
+    Raises:
+        ValueError: Si el padding no es válido.
+    """
     padding_length = decrypted[-1]
-    return decrypted[:-padding_length]
+    if not 1 <= padding_length <= AES.block_size:
+        raise ValueError("Padding PKCS7 inválido: clave incorrecta o archivo dañado")
+    inicio = len(decrypted) - padding_length
+    if decrypted[inicio:] != bytes([padding_length]) * padding_length:
+        raise ValueError("Padding PKCS7 inválido: clave incorrecta o archivo dañado")
+    return inicio
+
+def es_contenido_encriptado(contenido, nombre=None, encriptado=None):
+    """
+    Decide si un documento recibido en memoria está encriptado:
+    primero el indicador explícito, luego la extensión .enc del nombre y
+    por último si los bytes no empiezan con la cabecera %PDF-.
+    """
+    if encriptado is not None:
+        return bool(encriptado)
+    if nombre:
+        return str(nombre).endswith('.enc')
+    return bytes(contenido[:5]) != b"%PDF-"
+
+def desencriptar_documento(pdf_path, contenido=None, encriptado=None):
+    """
+    Texto plano (memoryview) de un documento encriptado, ya sea un .enc en
+    disco o `contenido` en línea encriptado. None si no está encriptado.
+    """
+    if contenido is not None:
+        if es_contenido_encriptado(contenido, pdf_path, encriptado):
+            return decrypt_bytes(contenido)
+        return None
+    if pdf_path.endswith('.enc'):
+        return decrypt_file(pdf_path)
+    return None
 
-def obtener_imagen_para_barcode(pdf_path, dpi=300):
+def hash_documento(pdf_path, contenido=None, encriptado=None):
     """
-    Devuelve una imagen (np.ndarray BGR) adecuada para detectar PDF417:
+    Retorna el SHA-256 del contenido del documento.
+    Para archivos .enc se calcula sobre el texto plano, porque cada
+    re-encriptación usa un IV nuevo y el hash del archivo cambia.
+    Si se pasa `contenido` (bytes recibidos en línea) no se lee el disco.
+    """
+    if contenido is not None:
+        sha = hashlib.sha256()
+        if es_contenido_encriptado(contenido, pdf_path, encriptado):
+            decrypt_bytes(contenido, destino=sha.update)
+        else:
+            sha.update(contenido)
+        return sha.hexdigest()
+
+    if pdf_path.endswith('.enc'):
+        # Se hashea mientras se desencripta, sin armar el texto plano completo
+        sha = hashlib.sha256()
+        decrypt_file(pdf_path, destino=sha.update)
+        return sha.hexdigest()
+
+    with mapear_archivo(pdf_path) as datos:
+        return hashlib.sha256(datos).hexdigest()
+
+def obtener_imagen_para_barcode(pdf_path, dpi=300, contenido=None, encriptado=None, color="bgr"):
+    """
+    Devuelve una imagen (np.ndarray, ver `color` en pdf_to_images) adecuada para detectar PDF417:
     - Si el PDF tiene 2+ páginas: usa la segunda página completa
-    - Si el PDF tiene 1 página: recorta la mitad inferior
+    - Si el PDF tiene 1 página: la mitad inferior
     
-    Soporta archivos encriptados (con extensión .enc)
+    Solo se rasteriza esa página o esa región.
+    Soporta archivos encriptados (con extensión .enc) y documentos recibidos
+    en memoria (`contenido`), que se procesan sin tocar el disco.
     """
-    
-    # Verificar si el archivo está encriptado
-    is_encrypted = pdf_path.endswith('.enc')
-    
-    if is_encrypted:
-        # Desencriptar el archivo
-        decrypted_data = decrypt_file(pdf_path)
-        
-        # Crear archivo temporal con los datos desencriptados
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.pdf') as temp_file:
-            temp_file.write(decrypted_data)
-            temp_pdf_path = temp_file.name
-        
-        try:
-            # Procesar el archivo temporal desencriptado
-            # Solo necesitamos las primeras 2 páginas máximo para decidir
-            print("Procesando archivo temporal desencriptado...")
-            images = pdf_to_images(temp_pdf_path, dpi=dpi, page_numbers=None, max_pages=2)
-        finally:
-            # Eliminar archivo temporal
-            os.unlink(temp_pdf_path)
-    else:
-        # Archivo no encriptado, procesar normalmente
-        # Solo necesitamos las primeras 2 páginas máximo
-        print("Procesando archivo no encriptado...")
-        images = pdf_to_images(pdf_path, dpi=dpi, page_numbers=None, max_pages=2)
 
-    if not images:
-        raise ValueError("No se pudieron extraer imágenes del PDF")
+    ruta, stream = _fuente_documento(pdf_path, contenido, encriptado)
+    return _renderizar_para_barcode(ruta, stream, dpi, color)
 
-    # Elegir imagen base
-    if len(images) >= 2:
-        img = images[1]  # segunda página (índice 1)
-    else:
-        img = images[0]  # única página
-        
-        # Recortar mitad inferior
-        h, w = img.shape[:2]
-        img = img[int(h * 0.5):h, 0:w]
+def imagenes_para_barcode(pdf_path, niveles_dpi, contenido=None, encriptado=None, color="bgr", pagina=None):
+    """
+    Genera (dpi, imagen) de la misma región que obtener_imagen_para_barcode,
+    una por cada nivel de `niveles_dpi` y solo cuando se pide la siguiente.
+    Con `pagina` (índice desde 0) se rasteriza esa página completa: un PDF
+    con varias cédulas escaneadas, una por página.
+
+    El documento se desencripta y se abre una sola vez para todos los niveles;
+    si el consumidor se detiene en el primero, los demás no se rasterizan.
+    Antes de cada nivel se verifica el plazo de la petición (PlazoAgotado).
+    """
+    # Las páginas de un mismo .enc se reparten entre llamadas: se reutiliza el desencriptado
+    ruta, stream = _fuente_documento(pdf_path, contenido, encriptado, reutilizar=pagina is not None)
+    with abrir_pdf(ruta, stream) as doc:
+        for dpi in niveles_dpi:
+            verificar_plazo("pdf_to_images")
+            with medir_etapa("pdf_to_images"):
+                if pagina is None:
+                    img = _renderizar_region_barcode(doc, dpi, color)
+                else:
+                    img = _renderizar_pagina_completa(doc, pagina, dpi, color)
+            yield dpi, img
+
+def contar_paginas(pdf_path):
+    """Número de páginas de un PDF (o .enc), sin rasterizar ninguna."""
+    ruta, stream = _fuente_documento(pdf_path, reutilizar=True)
+    with abrir_pdf(ruta, stream) as doc:
+        return doc.page_count
+
+@lru_cache(maxsize=1)
+def _desencriptado_reciente(ruta, _mtime_ns, _tamano):
+    # Un solo documento por proceso: acota la memoria a un texto plano por worker
+    return decrypt_file(ruta)
+
+def _fuente_documento(pdf_path, contenido=None, encriptado=None, reutilizar=False):
+    """
+    (ruta, stream) para abrir_pdf; los .enc se desencriptan en memoria.
+    Con `reutilizar` el texto plano del último .enc se guarda para las
+    siguientes llamadas con el mismo archivo (mismo mtime y tamaño).
+    """
+    if contenido is not None:
+        if es_contenido_encriptado(contenido, pdf_path, encriptado):
+            contenido = decrypt_bytes(contenido)
+        print("Procesando documento en memoria...")
+        return None, contenido
 
-    return img
+    # Verificar si el archivo está encriptado
+    if pdf_path.endswith('.enc'):
+        # Desencriptar en memoria: el texto plano nunca se escribe a disco
+        if reutilizar:
+            estado = os.stat(pdf_path)
+            decrypted_data = _desencriptado_reciente(pdf_path, estado.st_mtime_ns, estado.st_size)
+        else:
+            decrypted_data = decrypt_file(pdf_path)
+        print("Procesando archivo desencriptado en memoria...")
+        return None, decrypted_data
 
-def leer_pdf417_zxing(img):
-    if not isinstance(img, np.ndarray):
-        img = np.array(img)
+    # Archivo no encriptado, procesar normalmente
+    print("Procesando archivo no encriptado...")
+    return pdf_path, None
 
-    if img.dtype != np.uint8:
-        img = img.astype(np.uint8)
+@medir_etapa("pdf_to_images")
+def _renderizar_para_barcode(pdf_path, stream, dpi, color):
+    with abrir_pdf(pdf_path, stream) as doc:
+        return _renderizar_region_barcode(doc, dpi, color)
 
-    if img.ndim == 3:
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    else:
-        img_rgb = img
+def _renderizar_region_barcode(doc, dpi, color):
+    if doc.page_count == 0:
+        raise ValueError("No se pudieron extraer imágenes del PDF")
 
-    results = zxingcpp.read_barcodes(img_rgb)
+    if doc.page_count >= 2:
+        # segunda página (índice 1)
+        return renderizar_pagina(doc.load_page(1), dpi, color=color)
 
-    print("ZXing encontró:", len(results))
-    for r in results:
-        print("Formato:", r.format.name, "len:", len(r.text))
+    # única página: mitad inferior
+    return renderizar_pagina(doc.load_page(0), dpi, clip=CLIP_MITAD_INFERIOR, color=color)
 
-    for r in results:
-        if r.format.name == "PDF417" and r.text:
-            return r.text
+def _renderizar_pagina_completa(doc, pagina, dpi, color):
+    if not 0 <= pagina < doc.page_count:
+        raise ValueError(f"Página {pagina} fuera de rango: el documento tiene {doc.page_count}")
+    return renderizar_pagina(doc.load_page(pagina), dpi, color=color)
 
-    return None
+@medir_etapa("leer_pdf417_zxing")
+def leer_pdf417_zxing(img):
+    """Texto del primer PDF417 de la imagen (ZXing buscando solo ese formato)."""
+    texto = decodificar(img, zxingcpp.BarcodeFormat.PDF417).get("PDF417")
+    print("ZXing encontró PDF417:", f"len {len(texto)}" if texto else "no")
+    return texto
 
 def extraer_datos_cedula_pdf417(raw):
     
@@ -230,60 +477,36 @@ def preprocess_for_ocr(
     adaptive_block: int = 31,
     adaptive_C: int = 10,
 ):
-    if image is None or not isinstance(image, np.ndarray):
-        raise ValueError("Imagen inválida para preprocesamiento")
-
-    gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    """
+    Gris → CLAHE → filtro ("gaussian", "median" o "none") → umbral ("otsu",
+    "adaptive" o "none"). Los tamaños de kernel pares se suben al impar siguiente.
 
-    clahe = cv2.createCLAHE(
-        clipLimit=float(clahe_clip),
-        tileGridSize=(int(clahe_tile), int(clahe_tile))
+    Retorna un array nuevo. El trabajo lo hace el PreprocesadorOCR compartido
+    de estos parámetros; quien pueda usar el resultado antes de la siguiente
+    llamada puede llamar a obtener_preprocesador(...) directamente y ahorrarse la copia.
+    """
+    preprocesador = obtener_preprocesador(
+        clahe_clip=clahe_clip,
+        clahe_tile=clahe_tile,
+        blur_kind=blur_kind,
+        blur_ksize=blur_ksize,
+        blur_sigma=blur_sigma,
+        threshold_kind=threshold_kind,
+        adaptive_block=adaptive_block,
+        adaptive_C=adaptive_C,
     )
-    proc = clahe.apply(gray)
-
-    # Blur (opcional)
-    if blur_kind == "gaussian":
-        k = int(blur_ksize)
-        if k % 2 == 0:
-            k += 1
-        proc = cv2.GaussianBlur(proc, (k, k), float(blur_sigma))
-    elif blur_kind == "median":
-        k = int(blur_ksize)
-        if k % 2 == 0:
-            k += 1
-        proc = cv2.medianBlur(proc, k)
-    elif blur_kind == "none":
-        pass
-    else:
-        raise ValueError(f"blur_kind inválido: {blur_kind}")
-
-    # Threshold (opcional)
-    if threshold_kind == "otsu":
-        _, proc = cv2.threshold(proc, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-    elif threshold_kind == "adaptive":
-        b = int(adaptive_block)
-        if b % 2 == 0:
-            b += 1
-        proc = cv2.adaptiveThreshold(
-            proc, 255,
-            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
-            cv2.THRESH_BINARY,
-            b,
-            int(adaptive_C)
-        )
-    elif threshold_kind == "none":
-        pass
-    else:
-        raise ValueError(f"threshold_kind inválido: {threshold_kind}")
+    return preprocesador(image).copy()
 
-    return proc
+MRZ_WHITELIST = "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789<"
 
+@medir_etapa("ocr_mrz")
 def ocr_mrz(img):
-    config = (
-        "--oem 3 --psm 6 "
-        "-c tessedit_char_whitelist=ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789<"
+    # psm 6: un bloque de texto uniforme (las líneas del MRZ)
+    # Si la petición tiene plazo (o se cancela), el OCR se corta
+    verificar_plazo("ocr_mrz")
+    return obtener_motor_ocr().reconocer(
+        img, psm=6, whitelist=MRZ_WHITELIST, limite_ms=restante_ms(), cancelar=plazo_agotado
     )
-    return pytesseract.image_to_string(img, lang="eng", config=config)
 
 def get_mrz_candidate_lines(text):
     lines = []
@@ -0,0 +1,168 @@
+"""
+Métricas de latencia por acción y por etapa, y contadores de eventos.
+
+Las etapas se miden con `medir_etapa`, que funciona como context manager o
+como decorador. Dentro de un worker (hilo o proceso) los eventos se acumulan
+en un recolector y el proceso principal los fusiona en REGISTRO, así las
+métricas son globales aunque el trabajo corra en otro proceso.
+"""
+import bisect
+import contextvars
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+# Límites superiores (ms) de los buckets del histograma
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, math.inf)
+
+_recolector = contextvars.ContextVar("recolector_metricas", default=None)
+
+
+class Histograma:
+    """Histograma de latencias con buckets fijos."""
+
+    def __init__(self):
+        self.conteos = [0] * len(BUCKETS_MS)
+        self.total = 0
+        self.suma_ms = 0.0
+        self.max_ms = 0.0
+
+    def observar(self, ms):
+        self.conteos[bisect.bisect_left(BUCKETS_MS, ms)] += 1
+        self.total += 1
+        self.suma_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentil(self, p):
+        """Percentil estimado: límite superior del bucket que lo contiene."""
+        if not self.total:
+            return 0.0
+        objetivo = math.ceil(self.total * p)
+        acumulado = 0
+        for limite, conteo in zip(BUCKETS_MS, self.conteos):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                return round(min(limite, self.max_ms), 3)
+        return round(self.max_ms, 3)
+
+    def resumen(self):
+        return {
+            "count": self.total,
+            "sum_ms": round(self.suma_ms, 3),
+            "avg_ms": round(self.suma_ms / self.total, 3) if self.total else 0.0,
+            "p50_ms": self.percentil(0.50),
+            "p90_ms": self.percentil(0.90),
+            "p99_ms": self.percentil(0.99),
+            "max_ms": round(self.max_ms, 3),
+        }
+
+
+class RegistroMetricas:
+    """
+    Registro global de histogramas y contadores del proceso.
+    Responsabilidad: Acumular eventos y exportarlos como JSON o Prometheus.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histogramas = {}
+        self._contadores = {}
+        self.inicio = time.time()
+
+    def observar(self, grupo, nombre, ms):
+        with self._lock:
+            clave = (grupo, nombre)
+            histograma = self._histogramas.get(clave)
+            if histograma is None:
+                histograma = self._histogramas[clave] = Histograma()
+            histograma.observar(ms)
+
+    def incrementar(self, nombre, n=1):
+        with self._lock:
+            self._contadores[nombre] = self._contadores.get(nombre, 0) + n
+
+    def fusionar(self, eventos):
+        """Aplica los eventos recolectados en un worker."""
+        for evento in eventos:
+            if evento[0] == "contador":
+                self.incrementar(evento[1], evento[2])
+            else:
+                self.observar(*evento)
+
+    def snapshot(self):
+        with self._lock:
+            latencias = {}
+            for (grupo, nombre), histograma in sorted(self._histogramas.items()):
+                latencias.setdefault(grupo, {})[nombre] = histograma.resumen()
+            return {
+                "uptime_s": round(time.time() - self.inicio, 1),
+                "latencias": latencias,
+                "contadores": dict(sorted(self._contadores.items())),
+            }
+
+    def prometheus(self):
+        """Exporta las métricas en formato de texto de Prometheus."""
+        lineas = []
+        with self._lock:
+            grupos = sorted({grupo for grupo, _ in self._histogramas})
+            for grupo in grupos:
+                metrica = f"servidor_{grupo}_latencia_ms"
+                lineas.append(f"# TYPE {metrica} histogram")
+                for (g, nombre), histograma in sorted(self._histogramas.items()):
+                    if g != grupo:
+                        continue
+                    acumulado = 0
+                    for limite, conteo in zip(BUCKETS_MS, histograma.conteos):
+                        acumulado += conteo
+                        le = "+Inf" if math.isinf(limite) else str(limite)
+                        lineas.append(f'{metrica}_bucket{{{grupo}="{nombre}",le="{le}"}} {acumulado}')
+                    lineas.append(f'{metrica}_sum{{{grupo}="{nombre}"}} {histograma.suma_ms:.3f}')
+                    lineas.append(f'{metrica}_count{{{grupo}="{nombre}"}} {histograma.total}')
+
+            lineas.append("# TYPE servidor_eventos_total counter")
+            for nombre, valor in sorted(self._contadores.items()):
+                lineas.append(f'servidor_eventos_total{{evento="{nombre}"}} {valor}')
+
+        return "\n".join(lineas) + "\n"
+
+
+REGISTRO = RegistroMetricas()
+
+
+def registrar_latencia(grupo, nombre, ms):
+    recolector = _recolector.get()
+    if recolector is not None:
+        recolector.append((grupo, nombre, ms))
+    else:
+        REGISTRO.observar(grupo, nombre, ms)
+
+
+def contar(nombre, n=1):
+    """Incrementa un contador (p. ej. la estrategia que tuvo éxito)."""
+    recolector = _recolector.get()
+    if recolector is not None:
+        recolector.append(("contador", nombre, n))
+    else:
+        REGISTRO.incrementar(nombre, n)
+
+
+@contextmanager
+def medir_etapa(etapa, grupo="etapa"):
+    """Mide la duración de una etapa. Se puede usar con `with` o como decorador."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        registrar_latencia(grupo, etapa, (time.perf_counter() - inicio) * 1000)
+
+
+@contextmanager
+def recolectar_metricas():
+    """Acumula en una lista los eventos de métricas del contexto actual."""
+    eventos = []
+    token = _recolector.set(eventos)
+    try:
+        yield eventos
+    finally:
+        _recolector.reset(token)
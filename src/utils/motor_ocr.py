@@ -0,0 +1,261 @@
+"""
+Motores de OCR para el MRZ.
+
+- MotorTesseractCAPI: usa libtesseract por ctypes. Carga `eng.traineddata` una
+  sola vez por hilo y recibe el buffer de numpy directamente, sin archivos
+  temporales ni un proceso `tesseract` por llamada.
+- MotorPytesseract: el camino original (pytesseract), como respaldo cuando la
+  librería compartida no está instalada.
+
+La instancia TessBaseAPI no se puede usar desde dos hilos a la vez, así que
+cada hilo tiene la suya (y cada proceso worker, su copia del módulo).
+"""
+import atexit
+import ctypes
+import ctypes.util
+import shutil
+import threading
+
+import numpy as np
+
+from src.config import Config
+from src.utils.metricas import contar, medir_etapa
+from src.utils.plazos import cancelado
+
+# Valores de TessPageSegMode en la API de C
+PSM_SINGLE_BLOCK = 6
+
+# bool (*TessCancelFunc)(void* cancel_this, int words)
+TESS_CANCEL_FUNC = ctypes.CFUNCTYPE(ctypes.c_bool, ctypes.c_void_p, ctypes.c_int)
+
+
+class MotorOCRNoDisponible(RuntimeError):
+    """No se encontró ni libtesseract ni el ejecutable de Tesseract."""
+
+
+def _cargar_libtesseract(ruta=None):
+    ruta = ruta or ctypes.util.find_library("tesseract")
+    if not ruta:
+        raise OSError("No se encontró libtesseract")
+
+    lib = ctypes.CDLL(ruta)
+    lib.TessVersion.restype = ctypes.c_char_p
+    lib.TessBaseAPICreate.restype = ctypes.c_void_p
+    lib.TessBaseAPIInit3.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
+    lib.TessBaseAPIInit3.restype = ctypes.c_int
+    lib.TessBaseAPISetPageSegMode.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.TessBaseAPISetVariable.argtypes = [ctypes.c_void_p, ctypes.c_char_p, ctypes.c_char_p]
+    lib.TessBaseAPISetVariable.restype = ctypes.c_int
+    lib.TessBaseAPISetImage.argtypes = [
+        ctypes.c_void_p, ctypes.c_void_p, ctypes.c_int, ctypes.c_int, ctypes.c_int, ctypes.c_int
+    ]
+    lib.TessBaseAPIRecognize.argtypes = [ctypes.c_void_p, ctypes.c_void_p]
+    lib.TessBaseAPIRecognize.restype = ctypes.c_int
+    lib.TessMonitorCreate.restype = ctypes.c_void_p
+    lib.TessMonitorSetDeadlineMSecs.argtypes = [ctypes.c_void_p, ctypes.c_int]
+    lib.TessMonitorSetCancelFunc.argtypes = [ctypes.c_void_p, TESS_CANCEL_FUNC]
+    lib.TessMonitorDelete.argtypes = [ctypes.c_void_p]
+    lib.TessBaseAPIGetUTF8Text.argtypes = [ctypes.c_void_p]
+    # c_void_p y no c_char_p: el texto se libera con TessDeleteText
+    lib.TessBaseAPIGetUTF8Text.restype = ctypes.c_void_p
+    lib.TessDeleteText.argtypes = [ctypes.c_void_p]
+    lib.TessBaseAPIClear.argtypes = [ctypes.c_void_p]
+    lib.TessBaseAPIEnd.argtypes = [ctypes.c_void_p]
+    lib.TessBaseAPIDelete.argtypes = [ctypes.c_void_p]
+    return lib
+
+
+class MotorTesseractCAPI:
+    """
+    Tesseract en el mismo proceso a través de la API de C.
+    Responsabilidad: Mantener un TessBaseAPI inicializado por hilo y
+    reconocer imágenes de numpy.
+    """
+
+    nombre = "capi"
+    # Tesseract consulta `cancelar` entre palabras
+    cancelable = True
+
+    def __init__(self, ruta_lib=None, tessdata=None, idioma="eng"):
+        self._lib = _cargar_libtesseract(ruta_lib)
+        self.version = self._lib.TessVersion().decode()
+        self.tessdata = tessdata
+        self.idioma = idioma
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._handles = []
+
+        # Falla aquí (y no en la primera petición) si falta el traineddata
+        self._handle_del_hilo()
+        atexit.register(self.cerrar)
+
+    def _handle_del_hilo(self):
+        handle = getattr(self._local, "handle", None)
+        if handle is not None:
+            return handle
+
+        with medir_etapa("ocr_init"):
+            handle = self._lib.TessBaseAPICreate()
+            datapath = self.tessdata.encode() if self.tessdata else None
+            if self._lib.TessBaseAPIInit3(handle, datapath, self.idioma.encode()) != 0:
+                self._lib.TessBaseAPIDelete(handle)
+                raise MotorOCRNoDisponible(
+                    f"libtesseract no pudo cargar '{self.idioma}' (tessdata: {self.tessdata or 'por defecto'})"
+                )
+        contar("ocr.motor_creado")
+
+        self._local.handle = handle
+        with self._lock:
+            self._handles.append(handle)
+        return handle
+
+    def reconocer(self, img, psm=PSM_SINGLE_BLOCK, whitelist=None, limite_ms=None, cancelar=None):
+        """
+        Texto reconocido en una imagen en escala de grises, BGR o BGRA.
+
+        Con `limite_ms` Tesseract deja de reconocer al vencer el plazo (un
+        ETEXT_DESC con deadline) y se devuelve lo que alcanzó a leer.
+        `cancelar` es una función sin argumentos que Tesseract consulta entre
+        palabras; si devuelve True deja de reconocer. El análisis de layout
+        previo no es interrumpible.
+        """
+        img = np.ascontiguousarray(img, dtype=np.uint8)
+        if img.ndim == 3 and img.shape[2] == 4:
+            img = np.ascontiguousarray(img[:, :, :3])
+        if img.ndim == 3:
+            # Tesseract espera RGB
+            img = np.ascontiguousarray(img[:, :, ::-1])
+        bytes_por_pixel = 1 if img.ndim == 2 else 3
+        alto, ancho = img.shape[:2]
+
+        handle = self._handle_del_hilo()
+        lib = self._lib
+        lib.TessBaseAPISetPageSegMode(handle, psm)
+        lib.TessBaseAPISetVariable(handle, b"tessedit_char_whitelist", (whitelist or "").encode())
+        lib.TessBaseAPISetImage(handle, img.ctypes.data, ancho, alto, bytes_por_pixel, img.strides[0])
+
+        monitor = None
+        if limite_ms is not None or cancelar is not None:
+            monitor = lib.TessMonitorCreate()
+        if limite_ms is not None:
+            lib.TessMonitorSetDeadlineMSecs(monitor, max(1, int(limite_ms)))
+        if cancelar is not None:
+            # La referencia debe vivir mientras Tesseract pueda llamarla
+            callback = TESS_CANCEL_FUNC(lambda _cancel_this, _palabras: bool(cancelar()))
+            lib.TessMonitorSetCancelFunc(monitor, callback)
+
+        puntero = None
+        try:
+            if lib.TessBaseAPIRecognize(handle, monitor) < 0:
+                contar("ocr.cancelado" if cancelado() else "ocr.cortado_por_plazo")
+            puntero = lib.TessBaseAPIGetUTF8Text(handle)
+            texto = ctypes.string_at(puntero).decode("utf-8", errors="replace") if puntero else ""
+        finally:
+            if puntero:
+                lib.TessDeleteText(puntero)
+            if monitor:
+                lib.TessMonitorDelete(monitor)
+            # Libera la imagen y los resultados, pero conserva el modelo cargado
+            lib.TessBaseAPIClear(handle)
+        return texto
+
+    def cerrar(self):
+        with self._lock:
+            handles, self._handles = self._handles, []
+        for handle in handles:
+            self._lib.TessBaseAPIEnd(handle)
+            self._lib.TessBaseAPIDelete(handle)
+        self._local = threading.local()
+
+
+class MotorPytesseract:
+    """
+    Respaldo con pytesseract: un proceso `tesseract` y un archivo temporal por llamada.
+    El ejecutable se busca una sola vez, no en cada petición.
+    """
+
+    nombre = "pytesseract"
+    # El proceso `tesseract` no consulta `cancelar`: sigue hasta terminar
+    cancelable = False
+
+    def __init__(self):
+        import pytesseract
+
+        ruta = shutil.which("tesseract")
+        if not ruta:
+            raise MotorOCRNoDisponible(
+                "❌ Tesseract no está instalado o no está en el PATH.\n"
+                "Instálalo con: sudo apt install tesseract-ocr"
+            )
+        pytesseract.pytesseract.tesseract_cmd = ruta
+        self._pytesseract = pytesseract
+        self.version = str(pytesseract.get_tesseract_version())
+
+    def reconocer(self, img, psm=PSM_SINGLE_BLOCK, whitelist=None, limite_ms=None, cancelar=None):
+        """
+        Con `limite_ms` el proceso `tesseract` se mata al vencer el plazo y se
+        devuelve "". `cancelar` no se puede consultar durante el proceso y se ignora.
+        """
+        config = f"--oem 3 --psm {psm}"
+        if whitelist:
+            config += f" -c tessedit_char_whitelist={whitelist}"
+        # timeout=0 es "sin límite" para pytesseract
+        timeout = max(0.001, limite_ms / 1000) if limite_ms is not None else 0
+        try:
+            return self._pytesseract.image_to_string(img, lang="eng", config=config, timeout=timeout)
+        except RuntimeError as e:
+            if "timeout" not in str(e):
+                raise
+            contar("ocr.cortado_por_plazo")
+            return ""
+
+    def cerrar(self):
+        pass
+
+
+_motor = None
+_error_motor = None
+_lock_motor = threading.Lock()
+
+
+def _crear_motor(backend):
+    if backend not in ("auto", "capi", "pytesseract"):
+        raise ValueError(f"OCR_BACKEND inválido: {backend}")
+
+    if backend in ("auto", "capi"):
+        try:
+            return MotorTesseractCAPI(Config.TESSERACT_LIB or None, Config.TESSDATA_PATH or None)
+        except (OSError, AttributeError, MotorOCRNoDisponible) as e:
+            if backend == "capi":
+                raise MotorOCRNoDisponible(f"No se pudo usar libtesseract: {e}") from e
+            print(f"⚠ libtesseract no disponible ({e}), se usa pytesseract")
+
+    return MotorPytesseract()
+
+
+def obtener_motor_ocr():
+    """
+    Motor de OCR del proceso, creado la primera vez que se pide.
+    Si no hay ninguno disponible se recuerda el error y se vuelve a lanzar
+    sin buscar de nuevo en cada petición.
+
+    Raises:
+        MotorOCRNoDisponible: Si no hay libtesseract ni ejecutable de Tesseract.
+    """
+    global _motor, _error_motor
+    if _motor is not None:
+        return _motor
+    if _error_motor is not None:
+        raise _error_motor
+
+    with _lock_motor:
+        if _motor is None and _error_motor is None:
+            try:
+                _motor = _crear_motor(Config.OCR_BACKEND)
+                print(f"🔤 Motor OCR: {_motor.nombre} (tesseract {_motor.version})")
+            except MotorOCRNoDisponible as e:
+                _error_motor = e
+                raise
+    if _motor is None:
+        raise _error_motor
+    return _motor
@@ -0,0 +1,299 @@
+"""
+Zona MRZ (ICAO 9303) de la cédula o el pasaporte.
+
+- Localiza la banda MRZ por su textura: caracteres oscuros, densos y del
+  mismo alto en líneas largas, con muchos `<` (black-hat + gradiente
+  horizontal + morfología sobre una versión reducida de la imagen).
+- Extrae las líneas de un texto de OCR en formato TD1 (3 x 30, cédula) o
+  TD3 (2 x 44, pasaporte).
+- Valida los dígitos de control (pesos 7, 3, 1), que detectan los errores
+  de OCR que pasan el formato pero cambian un número o una fecha.
+"""
+import itertools
+
+import cv2
+import numpy as np
+
+from src.utils.document_processing import fix_common_mrz_errors
+from src.utils.metricas import medir_etapa
+
+# formato: (número de líneas, largo de cada línea)
+FORMATOS_MRZ = {"TD1": (3, 30), "TD3": (2, 44)}
+
+# Largo mínimo y máximo de una línea leída: sobran unos caracteres de ruido
+# en los bordes o faltan los `<` del relleno
+LARGOS_LEIDOS = {"TD1": (21, 33), "TD3": (40, 47)}
+# Caracteres de ruido que se prueban a quitar al principio de cada línea
+RUIDO_INICIAL = 3
+
+_VALORES = {**{str(d): d for d in range(10)},
+            **{chr(ord("A") + i): 10 + i for i in range(26)},
+            "<": 0}
+_PESOS = (7, 3, 1)
+
+# Confusiones típicas del OCR en posiciones que solo pueden ser dígitos
+_A_DIGITO = str.maketrans("OQDILBSZG", "000118526")
+_A_LETRA = str.maketrans("0125869", "OIZSBGB")
+_A_RELLENO = str.maketrans("SKCEXL", "<<<<<<")
+
+# campo: (línea, inicio, fin, posición del dígito de control)
+_CAMPOS_CONTROL = {
+    "TD1": {
+        "numero_documento": (0, 5, 14, 14),
+        "fecha_nacimiento": (1, 0, 6, 6),
+        "fecha_expiracion": (1, 8, 14, 14),
+    },
+    "TD3": {
+        "numero_documento": (1, 0, 9, 9),
+        "fecha_nacimiento": (1, 13, 19, 19),
+        "fecha_expiracion": (1, 21, 27, 27),
+        "numero_personal": (1, 28, 42, 42),
+    },
+}
+
+# Tramos (línea, inicio, fin) que cubre el dígito de control compuesto
+_COMPUESTO = {
+    "TD1": ([(0, 5, 30), (1, 0, 7), (1, 8, 15), (1, 18, 29)], (1, 29)),
+    "TD3": ([(1, 0, 10), (1, 13, 20), (1, 21, 43)], (1, 43)),
+}
+
+# Tramos (línea, inicio, fin) que solo contienen dígitos: fechas y dígitos de control
+_NUMERICOS = {
+    "TD1": [(0, 14, 15), (1, 0, 7), (1, 8, 15), (1, 29, 30)],
+    "TD3": [(1, 9, 10), (1, 13, 20), (1, 21, 28), (1, 43, 44)],
+}
+
+# Número de documento (línea, inicio, fin)
+_NUMERO_DOCUMENTO = {"TD1": (0, 5, 14), "TD3": (1, 0, 9)}
+# Fracción de dígitos a partir de la cual un número de documento se trata como numérico
+NUMERICO_MINIMO = 0.75
+
+# Tramos que solo contienen letras (o `<`): tipo de documento, países, sexo y nombres
+_LETRAS = {
+    "TD1": [(0, 0, 5), (1, 7, 8), (1, 15, 18), (2, 0, 30)],
+    "TD3": [(0, 0, 44), (1, 10, 13), (1, 20, 21)],
+}
+
+# Datos opcionales, normalmente solo relleno
+_RELLENO = {
+    "TD1": [(0, 15, 30), (1, 18, 29)],
+    "TD3": [],
+}
+
+# Lado mayor (px) de la imagen reducida sobre la que se busca la banda
+LADO_LOCALIZACION = 600
+# Relación ancho/alto mínima de la banda (TD1 ~5:1, TD3 ~10:1 sin margen)
+ASPECTO_MINIMO = 3.0
+# La banda debe ocupar al menos esta fracción del ancho de la imagen
+ANCHO_MINIMO = 0.3
+# Margen alrededor de la banda, relativo a su alto
+MARGEN_BANDA = 0.25
+
+
+def digito_control(texto):
+    """Dígito de control ICAO 9303 de `texto` (dígitos, A-Z y `<`)."""
+    return str(sum(_VALORES.get(c, 0) * _PESOS[i % 3] for i, c in enumerate(texto)) % 10)
+
+
+def _alineaciones(linea, largo):
+    # Sin el ruido del principio, recortada o rellenada con `<` hasta su largo
+    return [linea[i:i + largo].ljust(largo, "<") for i in range(min(RUIDO_INICIAL, len(linea) - 1) + 1)]
+
+
+def extraer_lineas_mrz(texto):
+    """
+    Líneas MRZ del texto de OCR, sin ajustar a su largo.
+
+    Se buscan líneas consecutivas con el largo de TD3 o TD1 (ver
+    LARGOS_LEIDOS) y al menos un `<`.
+
+    Returns:
+        tuple: (formato, líneas) o (None, []) si el texto no tiene un MRZ.
+    """
+    lineas = [fix_common_mrz_errors(ln) for ln in (texto or "").splitlines()]
+    lineas = [ln for ln in lineas if ln]
+
+    for formato in ("TD3", "TD1"):
+        cantidad = FORMATOS_MRZ[formato][0]
+        minimo, maximo = LARGOS_LEIDOS[formato]
+        for i in range(len(lineas) - cantidad + 1):
+            grupo = lineas[i:i + cantidad]
+            if all(minimo <= len(ln) <= maximo for ln in grupo) and any("<" in ln for ln in grupo):
+                return formato, grupo
+    return None, []
+
+
+def _traducir(lineas, tramos, tabla):
+    lineas = list(lineas)
+    for n, inicio, fin in tramos:
+        ln = lineas[n]
+        lineas[n] = ln[:inicio] + ln[inicio:fin].translate(tabla) + ln[fin:]
+    return lineas
+
+
+def corregir_caracteres(lineas, formato):
+    """
+    Cambia O→0, I→1... donde solo caben dígitos (y en números de documento
+    numéricos) y 0→O, 1→I... donde solo caben letras.
+    """
+    lineas = _traducir(lineas, _NUMERICOS[formato], _A_DIGITO)
+    lineas = _traducir(lineas, _LETRAS[formato], _A_LETRA)
+
+    # En un número de documento casi todo dígitos (como el de la cédula) las
+    # letras son errores del OCR; el dígito de control no detecta algunas
+    # (L = 21 pesa igual que 1)
+    n, inicio, fin = _NUMERO_DOCUMENTO[formato]
+    numero = lineas[n][inicio:fin].replace("<", "")
+    if numero and sum(c.isdigit() for c in numero) >= NUMERICO_MINIMO * len(numero):
+        lineas = _traducir(lineas, [(n, inicio, fin)], _A_DIGITO)
+
+    if formato == "TD1" and lineas[0][0] in "TL":
+        # El código de un documento TD1 empieza por I, A o C
+        lineas[0] = "I" + lineas[0][1:]
+    return lineas
+
+
+def limpiar_relleno(lineas, formato):
+    """
+    Los `<` del relleno se leen a veces como S, K, C...: en los datos
+    opcionales que son casi todo relleno, esos caracteres pasan a `<`.
+    """
+    lineas = list(lineas)
+    for n, inicio, fin in _RELLENO[formato]:
+        tramo = lineas[n][inicio:fin]
+        if tramo.count("<") * 2 >= len(tramo):
+            lineas[n] = lineas[n][:inicio] + tramo.translate(_A_RELLENO) + lineas[n][fin:]
+    return lineas
+
+
+def validar_digitos_control(lineas, formato):
+    """
+    Resultado de cada dígito de control del MRZ.
+
+    Returns:
+        dict: {campo: bool, ..., "compuesto": bool}
+    """
+    resultado = {}
+    for campo, (n, inicio, fin, control) in _CAMPOS_CONTROL[formato].items():
+        # Un campo opcional vacío puede llevar `<` como dígito de control
+        esperado = lineas[n][control].replace("<", "0")
+        resultado[campo] = digito_control(lineas[n][inicio:fin]) == esperado
+
+    tramos, (n, control) = _COMPUESTO[formato]
+    compuesto = "".join(lineas[ln][inicio:fin] for ln, inicio, fin in tramos)
+    resultado["compuesto"] = digito_control(compuesto) == lineas[n][control]
+    return resultado
+
+
+def leer_mrz(texto):
+    """
+    Extrae, corrige y valida el MRZ de un texto de OCR.
+
+    Entre las alineaciones posibles de cada línea (con o sin limpiar el
+    relleno) se queda con la que más dígitos de control cumple; ante un
+    empate, con la que menos cambia el texto leído.
+
+    Returns:
+        dict | None: {"formato", "lineas", "digitos_control", "valido"}, o
+        None si el texto no tiene líneas con forma de MRZ.
+    """
+    formato, leidas = extraer_lineas_mrz(texto)
+    if formato is None:
+        return None
+
+    largo = FORMATOS_MRZ[formato][1]
+    mejor = None
+    for alineacion in itertools.product(*(_alineaciones(ln, largo) for ln in leidas)):
+        lineas = corregir_caracteres(alineacion, formato)
+        for candidato in (lineas, limpiar_relleno(lineas, formato)):
+            digitos = validar_digitos_control(candidato, formato)
+            aciertos = sum(digitos.values())
+            if mejor is None or aciertos > mejor[0]:
+                mejor = (aciertos, candidato, digitos)
+        if mejor[0] == len(mejor[2]):
+            break
+
+    _, lineas, digitos = mejor
+    return {
+        "formato": formato,
+        "lineas": lineas,
+        "digitos_control": digitos,
+        "valido": all(digitos.values()),
+    }
+
+
+def campos_mrz(lineas, formato):
+    """Campos del titular en un MRZ TD1 o TD3 ya validado."""
+    if formato == "TD1":
+        l1, l2, l3 = lineas
+        return {
+            "pais": l1[2:5].replace("<", ""),
+            "numero_documento": l1[5:14].replace("<", ""),
+            "fecha_nacimiento": l2[0:6],
+            "sexo": l2[7],
+            "fecha_expiracion": l2[8:14],
+            "nacionalidad": l2[15:18].replace("<", ""),
+            "nombres": l3,
+        }
+    l1, l2 = lineas
+    return {
+        "pais": l1[2:5].replace("<", ""),
+        "numero_documento": l2[0:9].replace("<", ""),
+        "fecha_nacimiento": l2[13:19],
+        "sexo": l2[20],
+        "fecha_expiracion": l2[21:27],
+        "nacionalidad": l2[10:13].replace("<", ""),
+        "nombres": l1[5:44],
+    }
+
+
+@medir_etapa("localizar_mrz")
+def localizar_banda_mrz(img):
+    """
+    Rectángulo de la banda MRZ en `img`.
+
+    Returns:
+        tuple | None: (x0, y0, x1, y1) en coordenadas de `img`, o None si no
+        hay una región con la forma de la banda.
+    """
+    if img.ndim == 3:
+        img = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    alto, ancho = img.shape
+
+    # Submuestreo por saltos: es una vista, mucho más barato que un resize
+    paso = max(1, max(alto, ancho) // LADO_LOCALIZACION)
+    reducida = cv2.GaussianBlur(np.ascontiguousarray(img[::paso, ::paso]), (3, 3), 0)
+
+    # Black-hat resalta caracteres oscuros sobre fondo claro; el gradiente
+    # horizontal se queda con los trazos verticales, densos en el MRZ
+    rect = cv2.getStructuringElement(cv2.MORPH_RECT, (13, 5))
+    blackhat = cv2.morphologyEx(reducida, cv2.MORPH_BLACKHAT, rect)
+    grad = np.absolute(cv2.Sobel(blackhat, cv2.CV_32F, 1, 0, ksize=-1))
+    grad = cv2.normalize(grad, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+
+    # Cerrar une los caracteres de cada línea y luego las líneas entre sí
+    grad = cv2.morphologyEx(grad, cv2.MORPH_CLOSE, rect)
+    _, mascara = cv2.threshold(grad, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)
+    cuadrado = cv2.getStructuringElement(cv2.MORPH_RECT, (21, 21))
+    mascara = cv2.morphologyEx(mascara, cv2.MORPH_CLOSE, cuadrado)
+    mascara = cv2.erode(mascara, None, iterations=4)
+
+    contornos, _ = cv2.findContours(mascara, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    mejor = None
+    for contorno in contornos:
+        x, y, w, h = cv2.boundingRect(contorno)
+        if h == 0 or w / h < ASPECTO_MINIMO or w < ANCHO_MINIMO * reducida.shape[1]:
+            continue
+        if mejor is None or w * h > mejor[2] * mejor[3]:
+            mejor = (x, y, w, h)
+    if mejor is None:
+        return None
+
+    x, y, w, h = mejor
+    margen = int(MARGEN_BANDA * h) + 2
+    return (
+        max(0, (x - margen) * paso),
+        max(0, (y - margen) * paso),
+        min(ancho, (x + w + margen) * paso),
+        min(alto, (y + h + margen) * paso),
+    )
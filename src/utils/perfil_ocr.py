@@ -0,0 +1,50 @@
+"""
+Perfil de parámetros de `preprocess_for_ocr` para el OCR del MRZ.
+
+Lo escribe la herramienta de afinación (`python -m benchmarks.afinar_ocr`) y
+el servicio lo carga al arrancar si `OCR_PERFIL_PATH` apunta a él.
+"""
+import inspect
+import json
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+from src.utils.document_processing import preprocess_for_ocr
+from src.utils.preprocesamiento_ocr import PreprocesadorOCR
+
+PARAMETROS_OCR = tuple(p for p in inspect.signature(preprocess_for_ocr).parameters if p != "image")
+
+
+def cargar_perfil_ocr(ruta):
+    """
+    Parámetros recomendados de un perfil.
+
+    Returns:
+        dict: Argumentos para preprocess_for_ocr.
+
+    Raises:
+        ValueError: Si el archivo no existe o no es un perfil válido. Los
+            valores se prueban sobre una imagen pequeña: un perfil que haría
+            fallar cada OCR del MRZ falla aquí, al arrancar.
+    """
+    try:
+        parametros = json.loads(Path(ruta).read_text())["recomendado"]
+        desconocidos = set(parametros) - set(PARAMETROS_OCR)
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Perfil OCR inválido en {ruta}: {e}") from e
+    if desconocidos:
+        raise ValueError(f"Perfil OCR inválido en {ruta}: parámetros desconocidos {sorted(desconocidos)}")
+
+    try:
+        PreprocesadorOCR(**parametros)(np.zeros((64, 256), np.uint8))
+    except (ValueError, TypeError, cv2.error) as e:
+        raise ValueError(f"Perfil OCR inválido en {ruta}: {e}") from e
+    return dict(parametros)
+
+
+def guardar_perfil_ocr(ruta, recomendado, ranking, **metadatos):
+    """Escribe el perfil: los parámetros recomendados y el ranking completo."""
+    perfil = {**metadatos, "recomendado": recomendado, "ranking": ranking}
+    Path(ruta).write_text(json.dumps(perfil, indent=2, ensure_ascii=False))
@@ -0,0 +1,101 @@
+"""
+Plazos (deadlines) por petición.
+
+El servidor convierte el `deadline_ms` del mensaje en un instante límite de
+`time.perf_counter()` (monotónico del sistema, comparable entre procesos) y
+el worker lo fija en un ContextVar mientras corre el handler, igual que el
+recolector de métricas. Las etapas largas consultan el plazo entre pasos y
+el OCR lo usa para cortar el reconocimiento.
+
+Un contexto también puede ser cancelable (`aplicar_cancelacion`): al fijar el
+evento las etapas se detienen igual que si hubiera vencido el plazo. Así se
+descartan las estrategias que pierden una carrera.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from src.utils.metricas import contar
+
+_fin = ContextVar("plazo_fin", default=None)
+_cancelacion = ContextVar("plazo_cancelacion", default=None)
+
+
+class PlazoAgotado(Exception):
+    """Se acabó el plazo de la petición antes de empezar (o terminar) una etapa."""
+
+    def __init__(self, etapa):
+        super().__init__(f"Plazo agotado en la etapa '{etapa}'")
+        self.etapa = etapa
+
+
+def fin_desde_deadline_ms(deadline_ms, inicio=None):
+    """
+    Instante límite para un `deadline_ms` relativo a `inicio` (ahora por defecto).
+
+    Returns:
+        float | None: None si la petición no trae plazo.
+
+    Raises:
+        ValueError: Si deadline_ms no es un número positivo.
+    """
+    if deadline_ms is None:
+        return None
+    if isinstance(deadline_ms, bool) or not isinstance(deadline_ms, (int, float)) or deadline_ms <= 0:
+        raise ValueError(f"deadline_ms debe ser un número positivo, no {deadline_ms!r}")
+    return (inicio if inicio is not None else time.perf_counter()) + deadline_ms / 1000
+
+
+@contextmanager
+def aplicar_plazo(fin):
+    """Fija el instante límite (o ninguno, con None) para el contexto actual."""
+    token = _fin.set(fin)
+    try:
+        yield
+    finally:
+        _fin.reset(token)
+
+
+@contextmanager
+def aplicar_cancelacion(evento):
+    """Hace cancelable el contexto actual: `evento.set()` (desde otro hilo) lo detiene."""
+    token = _cancelacion.set(evento)
+    try:
+        yield evento
+    finally:
+        _cancelacion.reset(token)
+
+
+def restante_ms():
+    """Milisegundos que quedan del plazo actual; None si la petición no tiene plazo."""
+    fin = _fin.get()
+    if fin is None:
+        return None
+    return (fin - time.perf_counter()) * 1000
+
+
+def cancelado():
+    """True si se canceló el contexto (p. ej. la estrategia perdió la carrera)."""
+    evento = _cancelacion.get()
+    return evento is not None and evento.is_set()
+
+
+def plazo_agotado():
+    """True si venció el plazo o se canceló el contexto."""
+    if cancelado():
+        return True
+    restante = restante_ms()
+    return restante is not None and restante <= 0
+
+
+def verificar_plazo(etapa):
+    """
+    Lanza PlazoAgotado si ya no queda tiempo para `etapa`. Una cancelación
+    se cuenta aparte (plazo.cancelado.*): no es un plazo vencido.
+    """
+    if cancelado():
+        contar(f"plazo.cancelado.{etapa}")
+        raise PlazoAgotado(etapa)
+    if plazo_agotado():
+        contar(f"plazo.agotado.{etapa}")
+        raise PlazoAgotado(etapa)
@@ -0,0 +1,104 @@
+"""
+Preprocesamiento compilado para el OCR del MRZ.
+
+`PreprocesadorOCR` se arma una vez por juego de parámetros: valida las
+opciones, fija los tamaños de kernel y guarda el objeto CLAHE. Cada paso
+(gris → CLAHE → filtro → umbral) escribe con `dst` en dos buffers que se
+alternan y se reutilizan entre llamadas, así que en régimen no se crea
+ningún array.
+
+El objeto CLAHE y los buffers no se pueden usar desde dos hilos a la vez:
+cada hilo tiene los suyos, como los motores de OCR.
+"""
+import threading
+from functools import lru_cache
+
+import cv2
+import numpy as np
+
+from src.utils.metricas import contar, medir_etapa
+
+
+def _impar(k):
+    k = int(k)
+    return k + 1 if k % 2 == 0 else k
+
+
+class PreprocesadorOCR:
+    """
+    preprocess_for_ocr con los parámetros resueltos de antemano.
+    Responsabilidad: Aplicar CLAHE, filtro y umbral sobre buffers reutilizados.
+
+    El resultado es una vista sobre un buffer interno: vale hasta la
+    siguiente llamada desde el mismo hilo (copiarlo si se necesita después).
+    """
+
+    def __init__(self, clahe_clip=0.6, clahe_tile=16, blur_kind="gaussian", blur_ksize=3,
+                 blur_sigma=0.5, threshold_kind="otsu", adaptive_block=31, adaptive_C=10):
+        self.clahe_clip = float(clahe_clip)
+        self.clahe_tile = (int(clahe_tile), int(clahe_tile))
+        # Fuera de estos rangos OpenCV falla en cada llamada (o, con tile 0, aborta el proceso)
+        if self.clahe_clip <= 0 or self.clahe_tile[0] < 1:
+            raise ValueError(f"CLAHE inválido: clip {clahe_clip}, tile {clahe_tile}")
+        if blur_kind != "none" and int(blur_ksize) < 1:
+            raise ValueError(f"blur_ksize inválido: {blur_ksize}")
+        if threshold_kind == "adaptive" and int(adaptive_block) < 3:
+            raise ValueError(f"adaptive_block inválido: {adaptive_block}")
+        self._pasos = []
+
+        if blur_kind == "gaussian":
+            k, sigma = _impar(blur_ksize), float(blur_sigma)
+            self._pasos.append(lambda src, dst: cv2.GaussianBlur(src, (k, k), sigma, dst=dst))
+        elif blur_kind == "median":
+            k = _impar(blur_ksize)
+            self._pasos.append(lambda src, dst: cv2.medianBlur(src, k, dst=dst))
+        elif blur_kind != "none":
+            raise ValueError(f"blur_kind inválido: {blur_kind}")
+
+        if threshold_kind == "otsu":
+            self._pasos.append(
+                lambda src, dst: cv2.threshold(src, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU, dst=dst)
+            )
+        elif threshold_kind == "adaptive":
+            bloque, c = _impar(adaptive_block), int(adaptive_C)
+            self._pasos.append(lambda src, dst: cv2.adaptiveThreshold(
+                src, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, bloque, c, dst=dst
+            ))
+        elif threshold_kind != "none":
+            raise ValueError(f"threshold_kind inválido: {threshold_kind}")
+
+        self._local = threading.local()
+
+    def _estado_del_hilo(self, pixeles):
+        estado = self._local
+        if getattr(estado, "clahe", None) is None:
+            estado.clahe = cv2.createCLAHE(clipLimit=self.clahe_clip, tileGridSize=self.clahe_tile)
+            estado.buffers = (np.empty(0, np.uint8), np.empty(0, np.uint8))
+        # Los buffers solo crecen: una imagen más chica usa una vista de los actuales
+        if estado.buffers[0].size < pixeles:
+            contar("preprocess_for_ocr.buffers_nuevos")
+            estado.buffers = (np.empty(pixeles, np.uint8), np.empty(pixeles, np.uint8))
+        return estado
+
+    def __call__(self, image):
+        if image is None or not isinstance(image, np.ndarray):
+            raise ValueError("Imagen inválida para preprocesamiento")
+
+        with medir_etapa("preprocess_for_ocr"):
+            alto, ancho = image.shape[:2]
+            estado = self._estado_del_hilo(alto * ancho)
+            a, b = (buf[:alto * ancho].reshape(alto, ancho) for buf in estado.buffers)
+
+            gray = image if image.ndim == 2 else cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=b)
+            src = estado.clahe.apply(gray, dst=a)
+            dst = b
+            for paso in self._pasos:
+                paso(src, dst)
+                src, dst = dst, src
+            return src
+
+
+@lru_cache(maxsize=16)
+def obtener_preprocesador(**parametros):
+    """PreprocesadorOCR compartido para estos parámetros (los de preprocess_for_ocr)."""
+    return PreprocesadorOCR(**parametros)
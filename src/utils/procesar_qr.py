@@ -1,30 +1,14 @@
-import numpy as np
-import cv2
 import zxingcpp
 import re
+from src.utils.metricas import medir_etapa
+from src.utils.codigos_barras import decodificar
+
+@medir_etapa("leer_qr_code")
 def leer_qr_code(img):
     """
     Lee códigos QR de la imagen usando ZXing.
     """
-    if not isinstance(img, np.ndarray):
-        img = np.array(img)
-
-    if img.dtype != np.uint8:
-        img = img.astype(np.uint8)
-
-    if img.ndim == 3:
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-    else:
-        img_rgb = img
-
-    results = zxingcpp.read_barcodes(img_rgb)
-
-    # Buscar QR Code
-    for r in results:
-        if r.format.name == "QRCode" and r.text:
-            return r.text
-
-    return None
+    return decodificar(img, zxingcpp.BarcodeFormat.QRCode).get("QRCode")
 
 def extraer_datos_qr(raw: str) -> dict:
     """
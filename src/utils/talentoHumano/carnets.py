@@ -1,103 +1,110 @@
 import cv2
-import mediapipe as mp
 import numpy as np
+from src.config import Config
+from src.utils.metricas import medir_etapa
+from src.utils.talentoHumano.detector_caras import POOL_DETECTORES
 
-def procesar_foto_carnet( imagen_path, output_path=None, 
-                             ancho_cm=3.11, alto_cm=3.11, dpi=300, 
-                             zoom_cara=1.8):
+def recortar_foto_carnet(img, ancho_cm=3.11, alto_cm=3.11, dpi=300, zoom_cara=1.8, detectores=None,
+                         lado_deteccion=None):
     """
-    Convierte una foto a formato carnet centrado.
-        
-    Args:
-            imagen_path: ruta de la imagen de entrada
-            output_path: ruta para guardar (opcional)
-            ancho_cm: ancho final en centímetros
-            alto_cm: alto final en centímetros
-            dpi: resolución en puntos por pulgada (300 para impresión de calidad)
-            zoom_cara: factor de zoom (menor = cara más grande)
-                       1.5 = muy cerca, 1.8 = cerca, 2.2 = normal, 2.8 = lejos
-        
+    Recorta y redimensiona una imagen BGR en memoria a formato carnet.
+    El detector de caras se toma prestado del pool (ya no se crea uno por foto).
+    La cara se detecta en una copia reducida (ver imagen_para_deteccion).
+
+    Raises:
+            ValueError: si no se detecta ninguna cara
+    """
+    return recortar_foto_carnet_con_caja(img, ancho_cm, alto_cm, dpi, zoom_cara, detectores, lado_deteccion)[0]
+
+
+def recortar_foto_carnet_con_caja(img, ancho_cm=3.11, alto_cm=3.11, dpi=300, zoom_cara=1.8, detectores=None,
+                                  lado_deteccion=None):
+    """
+    Como `recortar_foto_carnet`, pero devuelve también la cara detectada.
+
     Returns:
-            imagen procesada en formato carnet
-        """
-    try:
-        # Convertir cm a píxeles
-        mp_face_detection = mp.solutions.face_detection
-        ancho_carnet = int(ancho_cm / 2.54 * dpi)
-        alto_carnet = int(alto_cm / 2.54 * dpi)
-        
-        # Leer imagen
-        img = cv2.imread(imagen_path)
-        if img is None:
-            raise ValueError(f"No se pudo leer la imagen: {imagen_path}")
-            
-        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        h, w = img.shape[:2]
-            
-        # Inicializar detector de caras dentro de la función (Context Manager)
-        # Esto responde a tu pregunta: Sí, es mejor aquí para que la función sea autónoma.
-        with mp_face_detection.FaceDetection(model_selection=1, min_detection_confidence=0.5) as face_detection:
-            # Detectar cara
-            results = face_detection.process(img_rgb)
-                
-            if not results.detections:
-                raise ValueError("No se detectó ninguna cara en la imagen")
-                
-            # Tomar la primera cara detectada
-            detection = results.detections[0]
-            bbox = detection.location_data.relative_bounding_box
-                
-            # Convertir coordenadas relativas a píxeles
-            x = int(bbox.xmin * w)
-            y = int(bbox.ymin * h)
-            ancho_cara = int(bbox.width * w)
-            alto_cara = int(bbox.height * h)
-                
-            # Calcular centro de la cara
-            centro_x = x + ancho_cara // 2
-            centro_y = y + alto_cara // 2
-                
-            # Definir dimensiones del recorte para foto carnet cuadrada
-            # Como es cuadrado, usar el mismo tamaño para ancho y alto
-            tamaño_recorte = int(max(ancho_cara, alto_cara) * zoom_cara)
-                
-            # Calcular coordenadas del recorte
-            # Para foto carnet cuadrada, centrar más la cara verticalmente
-            x1 = max(0, centro_x - tamaño_recorte // 2)
-            y1 = max(0, centro_y - int(tamaño_recorte * 0.55))  # 55% arriba, 45% abajo
-            x2 = min(w, x1 + tamaño_recorte)
-            y2 = min(h, y1 + tamaño_recorte)
-                
-            # Ajustar si se sale de los bordes
-            if x2 - x1 < tamaño_recorte:
-                if x1 == 0:
-                    x2 = min(w, tamaño_recorte)
-                else:
-                    x1 = max(0, w - tamaño_recorte)
-                
-            if y2 - y1 < tamaño_recorte:
-                if y1 == 0:
-                    y2 = min(h, tamaño_recorte)
-                else:
-                    y1 = max(0, h - tamaño_recorte)
-                
-            # Recortar imagen
-            img_recortada = img[y1:y2, x1:x2]
-                
-            # Redimensionar a tamaño carnet estándar
-            img_carnet = cv2.resize(img_recortada, (ancho_carnet, alto_carnet), interpolation=cv2.INTER_LANCZOS4)
-                
-            # Guardar si se especifica ruta
-            if output_path:
-                cv2.imwrite(output_path, img_carnet, [cv2.IMWRITE_JPEG_QUALITY, 95])
-                print(f"Foto carnet guardada en: {output_path}")
+            tuple: (foto carnet, {"x", "y", "ancho", "alto"} de la cara en píxeles de `img`)
+    """
+    detectores = detectores or POOL_DETECTORES
+    detecciones = detectores.detectar(imagen_para_deteccion(img, lado_deteccion))
+    return _recortar_desde_deteccion(img, detecciones, ancho_cm, alto_cm, dpi, zoom_cara)
 
-            return output_path
 
-    except Exception as e:
-        print(f"Error al procesar la foto carnet: {str(e)}")
-        import traceback
-        traceback.print_exc()
-        return None
+def imagen_para_deteccion(img, lado_deteccion=None):
+    """
+    Copia RGB de `img` para el detector de caras, reducida para que su lado
+    mayor no pase de `lado_deteccion` (None = Config.CARNET_DETECCION_LADO,
+    0 = tamaño original).
+
+    MediaPipe reescala la entrada al tamaño de su modelo, así que convertir y
+    pasarle una foto de 12 MP entera solo cuesta memoria y tiempo. La caja
+    que devuelve es relativa: vale igual para la foto original, donde se hace
+    el recorte (ver benchmarks/paridad_carnet.py).
+    """
+    lado = Config.CARNET_DETECCION_LADO if lado_deteccion is None else lado_deteccion
+    h, w = img.shape[:2]
+    escala = lado / max(h, w) if lado else 1.0
+    if escala >= 1.0:
+        return cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+
+    with medir_etapa("face_detection_proxy"):
+        # Bilineal, como el reescalado interno de MediaPipe (INTER_AREA con
+        # escalas no enteras cuesta más que detectar sobre la foto completa)
+        reducida = cv2.resize(img, (max(1, round(w * escala)), max(1, round(h * escala))),
+                              interpolation=cv2.INTER_LINEAR)
+        return cv2.cvtColor(reducida, cv2.COLOR_BGR2RGB, dst=reducida)
+
+
+def _recortar_desde_deteccion(img, detecciones, ancho_cm, alto_cm, dpi, zoom_cara):
+    # Convertir cm a píxeles
+    ancho_carnet = int(ancho_cm / 2.54 * dpi)
+    alto_carnet = int(alto_cm / 2.54 * dpi)
+    h, w = img.shape[:2]
+
+    if not detecciones:
+        raise ValueError("No se detectó ninguna cara en la imagen")
+        
+    # Tomar la primera cara detectada
+    detection = detecciones[0]
+    bbox = detection.location_data.relative_bounding_box
+        
+    # Convertir coordenadas relativas a píxeles
+    x = int(bbox.xmin * w)
+    y = int(bbox.ymin * h)
+    ancho_cara = int(bbox.width * w)
+    alto_cara = int(bbox.height * h)
+        
+    # Calcular centro de la cara
+    centro_x = x + ancho_cara // 2
+    centro_y = y + alto_cara // 2
+        
+    # Definir dimensiones del recorte para foto carnet cuadrada
+    # Como es cuadrado, usar el mismo tamaño para ancho y alto
+    tamaño_recorte = int(max(ancho_cara, alto_cara) * zoom_cara)
+        
+    # Calcular coordenadas del recorte
+    # Para foto carnet cuadrada, centrar más la cara verticalmente
+    x1 = max(0, centro_x - tamaño_recorte // 2)
+    y1 = max(0, centro_y - int(tamaño_recorte * 0.55))  # 55% arriba, 45% abajo
+    x2 = min(w, x1 + tamaño_recorte)
+    y2 = min(h, y1 + tamaño_recorte)
+        
+    # Ajustar si se sale de los bordes
+    if x2 - x1 < tamaño_recorte:
+        if x1 == 0:
+            x2 = min(w, tamaño_recorte)
+        else:
+            x1 = max(0, w - tamaño_recorte)
+        
+    if y2 - y1 < tamaño_recorte:
+        if y1 == 0:
+            y2 = min(h, tamaño_recorte)
+        else:
+            y1 = max(0, h - tamaño_recorte)
+        
+    # Recortar imagen
+    img_recortada = img[y1:y2, x1:x2]
         
-    
+    # Redimensionar a tamaño carnet estándar
+    img_carnet = cv2.resize(img_recortada, (ancho_carnet, alto_carnet), interpolation=cv2.INTER_LANCZOS4)
+    return img_carnet, {"x": x, "y": y, "ancho": ancho_cara, "alto": alto_cara}
@@ -0,0 +1,110 @@
+"""
+Pool de detectores de caras de MediaPipe.
+
+Crear un FaceDetection carga el grafo TFLite, lo que cuesta más que detectar
+la cara de una foto pequeña. El pool mantiene un detector vivo por hilo (una
+instancia no se puede usar desde dos hilos a la vez) y, como cada proceso
+importa su propia copia del módulo, también uno por proceso worker.
+"""
+import threading
+import time
+
+import mediapipe as mp
+
+from src.utils.metricas import contar, medir_etapa
+
+
+class PoolDetectoresCara:
+    """
+    Detectores de caras reutilizables, uno por hilo, creados bajo demanda.
+    Responsabilidad: Prestar un detector caliente, reconstruirlo si falla y
+    exponer su estado.
+    """
+
+    def __init__(self, model_selection=1, min_detection_confidence=0.5):
+        self.model_selection = model_selection
+        self.min_detection_confidence = min_detection_confidence
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._activos = 0
+        self._generacion = 0
+
+        self.creados = 0
+        self.usos = 0
+        self.errores = 0
+        self.ultimo_error = None
+
+    def _crear(self):
+        with medir_etapa("face_detector_init"):
+            detector = mp.solutions.face_detection.FaceDetection(
+                model_selection=self.model_selection,
+                min_detection_confidence=self.min_detection_confidence
+            )
+        contar("detector_cara.creado")
+        with self._lock:
+            self._activos += 1
+            self.creados += 1
+        return detector
+
+    def _detector_del_hilo(self):
+        # Tras reiniciar() la generación cambia y cada hilo reemplaza el suyo
+        if getattr(self._local, "generacion", None) != self._generacion:
+            self._descartar_del_hilo()
+            self._local.detector = self._crear()
+            self._local.generacion = self._generacion
+        return self._local.detector
+
+    def _descartar_del_hilo(self):
+        # Solo el hilo dueño cierra su detector: puede estar en uso
+        detector = getattr(self._local, "detector", None)
+        self._local.generacion = None
+        self._local.detector = None
+        if detector is None:
+            return
+        with self._lock:
+            self._activos -= 1
+        try:
+            detector.close()
+        except Exception:
+            pass
+
+    def _procesar(self, detector, img_rgb):
+        try:
+            with medir_etapa("face_detection"):
+                resultado = detector.process(img_rgb)
+        except Exception as e:
+            # El grafo puede quedar en mal estado: se reconstruye en el próximo uso
+            with self._lock:
+                self.errores += 1
+                self.ultimo_error = f"{time.strftime('%Y-%m-%dT%H:%M:%S')} {e}"
+            contar("detector_cara.error")
+            self._descartar_del_hilo()
+            raise
+        with self._lock:
+            self.usos += 1
+        return resultado.detections or []
+
+    def detectar(self, img_rgb):
+        """Detecciones de MediaPipe en una imagen RGB (lista vacía si no hay caras)."""
+        return self._procesar(self._detector_del_hilo(), img_rgb)
+
+    def estado(self):
+        """Salud del pool en este proceso."""
+        return {
+            "detectores_activos": self._activos,
+            "detectores_creados": self.creados,
+            "generacion": self._generacion,
+            "usos": self.usos,
+            "errores": self.errores,
+            "ultimo_error": self.ultimo_error,
+        }
+
+    def reiniciar(self):
+        """Invalida todos los detectores; cada hilo crea uno nuevo en su próximo uso."""
+        with self._lock:
+            self._generacion += 1
+        return self.estado()
+
+
+POOL_DETECTORES = PoolDetectoresCara()
@@ -0,0 +1,42 @@
+"""
+Paridad del recorte de fotos carnet: detectar la cara en la copia reducida
+(CARNET_DETECCION_LADO) debe dar el mismo recorte que detectarla en la foto
+completa, dentro de TOLERANCIA_PX píxeles de la foto carnet de salida.
+
+Usa los mismos retratos sintéticos de 12 MP que benchmarks/paridad_carnet.py.
+
+    python -m pytest tests/test_paridad_carnet.py
+"""
+import pytest
+
+from benchmarks.paridad_carnet import PARAMETROS, RETRATOS, TOLERANCIA_PX, comparar, retrato_sintetico
+from src.config import Config
+from src.utils.talentoHumano.carnets import recortar_foto_carnet_con_caja
+
+LADO = Config.CARNET_DETECCION_LADO or 1600
+
+
+@pytest.fixture(scope="module", autouse=True)
+def detector_caliente():
+    # El primer uso crea el detector de caras del pool
+    recortar_foto_carnet_con_caja(retrato_sintetico(*RETRATOS[0]), **PARAMETROS)
+
+
+@pytest.mark.parametrize("semilla, retrato", list(enumerate(RETRATOS)),
+                         ids=[f"sintetica_{i}" for i in range(len(RETRATOS))])
+def test_recorte_reducido_igual_al_completo(semilla, retrato):
+    desplazamiento, diferencia, _, _ = comparar(retrato_sintetico(*retrato, semilla=semilla), LADO)
+
+    assert desplazamiento <= TOLERANCIA_PX, (
+        f"el recorte se corre {desplazamiento} px (tolerancia {TOLERANCIA_PX} px) "
+        f"detectando a {LADO} px; diferencia media {diferencia}"
+    )
+
+
+def test_reduce_solo_fotos_grandes():
+    # Una foto que ya cabe en LADO se detecta tal cual: mismo recorte exacto
+    img = retrato_sintetico(300, 700, 500, ancho=1400, alto=1000)
+    desplazamiento, diferencia, _, _ = comparar(img, LADO)
+
+    assert desplazamiento == 0
+    assert diferencia == 0
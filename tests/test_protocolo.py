@@ -0,0 +1,139 @@
+"""
+Framing del protocolo TCP (DecodificadorMensajes).
+
+    python -m pytest tests/test_protocolo.py
+"""
+import json
+
+import pytest
+
+from src.server.protocolo import DecodificadorMensajes, MensajeDemasiadoGrande, PayloadInvalido
+
+CABECERA = json.dumps({"id": 7, "action": "validar_cedula", "payload_bytes": 4}).encode()
+
+
+def alimentar_en_trozos(decodificador, datos, cortes):
+    """Alimenta `datos` cortado en las posiciones `cortes` y junta los mensajes."""
+    mensajes = []
+    inicio = 0
+    for corte in list(cortes) + [len(datos)]:
+        mensajes += decodificador.alimentar(datos[inicio:corte])
+        inicio = corte
+    return mensajes
+
+
+def test_mensajes_unidos_en_un_segmento():
+    decodificador = DecodificadorMensajes(1 << 20)
+
+    assert decodificador.alimentar(b'{"id": 1, "action": "a"}\n{"action": "b"}\n\nPING\n') == [
+        ('{"id": 1, "action": "a"}', None),
+        ('{"action": "b"}', None),
+        ("PING", None),
+    ]
+
+
+@pytest.mark.parametrize("corte", range(1, 24))
+def test_mensaje_partido_en_dos_segmentos(corte):
+    datos = b'{"id": 1, "action": "a"}\n'
+    decodificador = DecodificadorMensajes(1 << 20)
+
+    assert alimentar_en_trozos(decodificador, datos, [corte]) == [('{"id": 1, "action": "a"}', None)]
+
+
+def test_mensaje_byte_a_byte():
+    datos = b'{"id": 1}\n{"id": 2}\n'
+    decodificador = DecodificadorMensajes(1 << 20)
+
+    assert alimentar_en_trozos(decodificador, datos, range(1, len(datos))) == [
+        ('{"id": 1}', None),
+        ('{"id": 2}', None),
+    ]
+
+
+def test_legacy_json_completo_sin_salto_de_linea():
+    decodificador = DecodificadorMensajes(1 << 20)
+
+    assert decodificador.alimentar(b'{"action": "a"}') == [('{"action": "a"}', None)]
+    assert decodificador.alimentar(b"PING") == [("PING", None)]
+    assert decodificador.alimentar(b"METRICS") == [("METRICS", None)]
+
+
+def test_legacy_incompleto_espera_el_resto():
+    decodificador = DecodificadorMensajes(1 << 20)
+
+    # Termina en '}' pero le falta el cierre del objeto o del string
+    assert decodificador.alimentar(b'{"data": {"a": 1}') == []
+    assert decodificador.alimentar(b'}') == [('{"data": {"a": 1}}', None)]
+    assert decodificador.alimentar(b'{"data": "x}') == []
+    assert decodificador.alimentar(b'"}') == [('{"data": "x}"}', None)]
+
+
+def test_legacy_invalido_se_entrega_para_responder_400():
+    decodificador = DecodificadorMensajes(1 << 20)
+
+    assert decodificador.alimentar(b'{"action": x}') == [('{"action": x}', None)]
+    # El buffer quedó vacío: lo siguiente se lee normalmente
+    assert decodificador.alimentar(b'{"id": 2}\n') == [('{"id": 2}', None)]
+
+
+def test_frame_binario_partido_en_cada_byte():
+    datos = CABECERA + b"\n" + b"\x00\n{}" + b'{"id": 8}\n'
+    esperado = [(CABECERA.decode(), bytearray(b"\x00\n{}")), ('{"id": 8}', None)]
+
+    # Un corte en cada posición de la cabecera, el salto de línea y el payload
+    for corte in range(1, len(datos)):
+        assert alimentar_en_trozos(DecodificadorMensajes(1 << 20, 1 << 20), datos, [corte]) == esperado, corte
+    assert alimentar_en_trozos(DecodificadorMensajes(1 << 20, 1 << 20), datos, range(1, len(datos))) == esperado
+
+
+@pytest.mark.parametrize("tamano", [0, -5, "4", 1.5, True, None])
+def test_payload_bytes_invalido_no_abre_frame(tamano):
+    decodificador = DecodificadorMensajes(1 << 20, 1 << 20)
+    cabecera = json.dumps({"id": 3, "payload_bytes": tamano})
+
+    mensajes = decodificador.alimentar(cabecera.encode() + b'\n{"id": 4}\n')
+
+    assert mensajes[0][0] == cabecera
+    assert isinstance(mensajes[0][1], PayloadInvalido)
+    assert mensajes[1] == ('{"id": 4}', None)
+
+
+def test_cabecera_de_frame_sin_salto_de_linea_espera_el_delimitador():
+    # Sin el '\n' la cabecera parece un JSON legacy completo: no debe despacharse
+    decodificador = DecodificadorMensajes(1 << 20, 1 << 20)
+
+    assert decodificador.alimentar(CABECERA) == []
+    assert decodificador.alimentar(b"\nab") == []
+    assert decodificador.alimentar(b"cd" + b'{"id": 8}\n') == [
+        (CABECERA.decode(), bytearray(b"abcd")),
+        ('{"id": 8}', None),
+    ]
+
+
+def test_frame_demasiado_grande_no_pierde_los_mensajes_anteriores():
+    decodificador = DecodificadorMensajes(1 << 20, 100)
+    grande = json.dumps({"id": 10, "action": "validar_cedula", "payload_bytes": 500}).encode()
+
+    mensajes = decodificador.alimentar(b'{"id": 9, "action": "PING"}\n' + grande + b"\n" + b"x" * 200)
+
+    assert mensajes[0] == ('{"id": 9, "action": "PING"}', None)
+    texto, error = mensajes[1]
+    assert texto == grande.decode()
+    assert isinstance(error, MensajeDemasiadoGrande)
+    assert error.id_mensaje == 10
+    # Los 500 bytes del frame se descartan aunque lleguen en varios segmentos
+    assert decodificador.alimentar(b"x" * 300 + b'{"id": 11}\n') == [('{"id": 11}', None)]
+
+
+def test_buffer_sin_delimitador_no_pierde_los_mensajes_anteriores():
+    decodificador = DecodificadorMensajes(64)
+
+    mensajes = decodificador.alimentar(b'{"id": 1}\n{"id": 2}\n' + b"x" * 100)
+
+    assert mensajes[:2] == [('{"id": 1}', None), ('{"id": 2}', None)]
+    texto, error = mensajes[2]
+    assert texto == ""
+    assert isinstance(error, MensajeDemasiadoGrande)
+    assert error.id_mensaje is None
+    # El buffer se vacía y la conexión sigue
+    assert decodificador.alimentar(b'{"id": 3}\n') == [('{"id": 3}', None)]